@@ -1,15 +1,35 @@
 """Public API re-exports for Borax.
 
 These provide stable imports like `from borax import tagging` while the
-internal implementation is organized into subpackages.
+internal implementation is organized into subpackages. The subpackages are
+imported on first attribute access so that `import borax` (and the CLI)
+stays cheap for commands that do not need them.
 """
 
-from . import tagging  # re-export package
-from . import bibtex_exporter  # re-export package
-from .core import history_tracker  # re-export core module
+import importlib
+
+_SUBMODULES = {
+    "tagging": ".tagging",  # re-export package
+    "bibtex_exporter": ".bibtex_exporter",  # re-export package
+    "processing": ".processing",  # re-export package
+    "history_tracker": ".core.history_tracker",  # re-export core module
+}
 
 __all__ = [
     "tagging",
     "bibtex_exporter",
+    "processing",
     "history_tracker",
 ]
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(_SUBMODULES[name], __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,37 @@
 #!/usr/bin/env python3
 """BibTeX export for Borax (per-library)."""
 
-import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+from .bib_index import BibIndex, normalize_doi, normalize_isbn
 from .metadata_fetcher import fetch_from_doi, fetch_from_isbn
-from borax.core.utils import exiftool_read_json
+from borax.core import profiling
+from borax.core.utils import exiftool_read_json, exiftool_read_json_many
+from borax.core.walker import walk_pdfs
+
+# Metadata fields requested from ExifTool for every PDF
+EXIF_FIELDS = [
+    "-Title",
+    "-Author",
+    "-Subject",
+    "-PDF:PublicationYear",
+    "-PDF:Edition",
+    "-PDF:Volume",
+    "-PDF:Publisher",
+    "-PDF:ISBN",
+    "-PDF:DOI",
+    "-XMP:Publisher",
+    "-XMP:Identifier",
+]
+
+# Number of PDFs whose metadata is read per ExifTool call during export
+DEFAULT_BATCH_SIZE = 200
+
+# Number of new entries buffered in memory before they are appended to the bib
+FLUSH_EVERY = 500
 
 
 def sanitize_bib_key(text: str) -> str:
@@ -16,23 +41,20 @@ def sanitize_bib_key(text: str) -> str:
 
 def extract_metadata_with_exif(filepath: Path) -> dict:
     """Extract a set of known metadata fields from a PDF via ExifTool."""
-    fields = [
-        "-Title",
-        "-Author",
-        "-Subject",
-        "-PDF:PublicationYear",
-        "-PDF:Edition",
-        "-PDF:Volume",
-        "-PDF:Publisher",
-        "-PDF:ISBN",
-        "-PDF:DOI",
-        "-XMP:Publisher",
-        "-XMP:Identifier",
-    ]
-    data = exiftool_read_json(str(filepath), *fields)
+    data = exiftool_read_json(str(filepath), *EXIF_FIELDS)
     return data or {}
 
 
+def extract_metadata_batch(filepaths) -> dict:
+    """Extract metadata for several PDFs in one ExifTool call.
+
+    Returns a dict mapping each input Path to its metadata dict.
+    """
+    filepaths = list(filepaths)
+    data = exiftool_read_json_many(filepaths, *EXIF_FIELDS)
+    return {p: data.get(str(p)) or {} for p in filepaths}
+
+
 def get_meta_field(meta: dict, keys, default=""):
     """Return the first present metadata value for the provided keys."""
     for k in keys:
@@ -41,21 +63,133 @@ def get_meta_field(meta: dict, keys, default=""):
     return default
 
 
-def enrich_metadata(meta: dict) -> dict:
-    """Optionally enrich parsed metadata using DOI or ISBN lookups."""
-    doi = meta.get("PDF:DOI") or meta.get("XMP:Identifier") or ""
-    isbn = meta.get("PDF:ISBN") or meta.get("Custom:ISBN") or ""
-    extra = {}
+# DOI / ISBN patterns searched for in extracted (lowercase) PDF text
+DOI_TEXT_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)")
+ISBN_TEXT_RE = re.compile(
+    r"isbn(?:-1[03])?[:\s]*((?:97[89][-\s]?)?(?:\d[-\s]?){9}[\dx])\b"
+)
+
+
+def _isbn_is_valid(isbn: str) -> bool:
+    """Check the ISBN-10 or ISBN-13 check digit of a normalized ISBN."""
+    if len(isbn) == 10:
+        digits = [10 if c == "X" else int(c) for c in isbn]
+        if "X" in isbn[:-1]:
+            return False
+        return sum((10 - i) * d for i, d in enumerate(digits)) % 11 == 0
+    if len(isbn) == 13 and isbn.isdigit():
+        return sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(isbn)) % 10 == 0
+    return False
+
+
+def identifiers_from_text(text: str) -> dict:
+    """Find the first DOI and valid ISBN in PDF text.
+
+    Returns a dict with "doi" and/or "isbn" keys (normalized) for the
+    identifiers found, suitable for merging into metadata.
+    """
+    found = {}
+    m = DOI_TEXT_RE.search(text)
+    if m:
+        found["doi"] = normalize_doi(m.group(1).rstrip(".,;:)]}'"))
+    for m in ISBN_TEXT_RE.finditer(text):
+        isbn = normalize_isbn(m.group(1))
+        if _isbn_is_valid(isbn):
+            found["isbn"] = isbn
+            break
+    return found
+
+
+def _text_value(value):
+    """Return an ExifTool tag value as a string, or None.
+
+    Tags holding an XMP bag (e.g. `XMP:Identifier`) come back as a list; its
+    first string is used. Numbers (e.g. an ISBN) are converted.
+    """
+    if isinstance(value, list):
+        value = next((v for v in value if isinstance(v, str)), None)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    return value if isinstance(value, str) else None
+
+
+def _identifier(meta: dict):
+    """Return ("doi"|"isbn", normalized id) used to enrich `meta`, or None."""
+    doi = normalize_doi(
+        _text_value(
+            meta.get("PDF:DOI") or meta.get("XMP:Identifier") or meta.get("doi")
+        )
+    )
     if doi:
-        extra = fetch_from_doi(doi)
-    elif isbn:
-        extra = fetch_from_isbn(isbn)
+        return "doi", doi
+    isbn = normalize_isbn(
+        _text_value(meta.get("PDF:ISBN") or meta.get("Custom:ISBN") or meta.get("isbn"))
+    )
+    if isbn:
+        return "isbn", isbn
+    return None
+
+
+def _lookup(identifier, cache=None, refresh=False, client=None) -> dict:
+    kind, value = identifier
+    fetch = fetch_from_doi if kind == "doi" else fetch_from_isbn
+    with profiling.stage("enrich"):
+        return fetch(value, cache=cache, refresh=refresh, client=client)
+
+
+def _merge(meta: dict, extra: dict) -> dict:
     for k, v in extra.items():
         if v and k not in meta:
             meta[k] = v
     return meta
 
 
+def enrich_metadata(meta: dict, cache=None, refresh: bool = False, client=None) -> dict:
+    """Optionally enrich parsed metadata using DOI or ISBN lookups.
+
+    Lookups go through `cache` (an `EnrichmentCache`) when given; `refresh`
+    ignores cached results and re-queries. `client` is the `HttpClient` to
+    use (default: the shared one).
+    """
+    identifier = _identifier(meta)
+    if identifier is None:
+        return meta
+    return _merge(meta, _lookup(identifier, cache, refresh, client))
+
+
+def enrich_many(
+    metas, cache=None, refresh: bool = False, jobs: int = 1, client=None
+) -> int:
+    """Enrich several metadata dicts in place; return how many gained data.
+
+    Each distinct DOI/ISBN is looked up once, with up to `jobs` lookups in
+    flight on a thread pool sharing `client`'s connection pool and rate
+    limits.
+    """
+    groups = {}
+    for meta in metas:
+        identifier = _identifier(meta)
+        if identifier is not None:
+            groups.setdefault(identifier, []).append(meta)
+
+    def lookup(identifier):
+        return identifier, _lookup(identifier, cache, refresh, client)
+
+    if jobs > 1 and len(groups) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(lookup, groups))
+    else:
+        results = [lookup(identifier) for identifier in groups]
+
+    enriched = 0
+    for identifier, extra in results:
+        for meta in groups[identifier]:
+            _merge(meta, extra)
+        if extra:
+            enriched += len(groups[identifier])
+    return enriched
+
+
 def make_bibtex_entry(filepath: Path, meta: dict):
     """Build a BibTeX entry string and return (key, entry)."""
     title = get_meta_field(meta, ["Title", "XMP:Title", "title"], filepath.stem)
@@ -106,38 +240,138 @@ def make_bibtex_entry(filepath: Path, meta: dict):
     return bibkey, bib_entry
 
 
-def append_to_bib(bib_path: Path, filepath: Path, bib_entry: str) -> bool:
-    """Append the entry if the file path is not already present; return added."""
-    bib_path.parent.mkdir(parents=True, exist_ok=True)
-    if not bib_path.exists():
-        bib_path.write_text("", encoding="utf-8")
-    with open(bib_path, "r+", encoding="utf-8") as f:
-        content = f.read()
-        if str(filepath) in content:
-            return False
-        f.write(bib_entry)
-    return True
+def append_to_bib(
+    bib_path: Path, filepath: Path, bib_entry: str, index: Optional[BibIndex] = None
+) -> bool:
+    """Add the entry for `filepath` unless the file, DOI or ISBN is present.
+
+    With an `index` the entry is checked against it and queued there (call
+    `index.flush(bib_path)` to write); a colliding key gets a letter suffix.
+    Without one the bib is parsed and the entry written immediately.
+    Returns True if the entry was added.
+    """
+    if index is None:
+        index = BibIndex.load(bib_path)
+        added = append_to_bib(bib_path, filepath, bib_entry, index)
+        index.flush(bib_path)
+        return added
+    if index.has_file(filepath):
+        return False
+    return index.add(bib_entry) is not None
+
 
+def process_pdf(
+    filepath: Path,
+    bib_path: Path,
+    enrich: bool = True,
+    meta: Optional[dict] = None,
+    index: Optional[BibIndex] = None,
+    cache=None,
+    refresh: bool = False,
+):
+    """Process a single PDF into BibTeX, optionally enriching metadata.
 
-def process_pdf(filepath: Path, bib_path: Path, enrich: bool = True):
-    """Process a single PDF into BibTeX, optionally enriching metadata."""
-    meta = extract_metadata_with_exif(filepath)
+    `meta` may be passed when the ExifTool metadata was already read (e.g.
+    in a batch); otherwise it is read for this file alone. With an `index`
+    the entry is queued in it rather than written (see `append_to_bib`), and
+    files it already lists are skipped before any metadata lookup.
+    `cache` and `refresh` are passed to `enrich_metadata`.
+    Returns the entry's key, or None if it was not added.
+    """
+    if index is not None and index.has_file(filepath):
+        return None
+    if meta is None:
+        meta = extract_metadata_with_exif(filepath)
     if enrich:
-        meta = enrich_metadata(meta)
+        meta = enrich_metadata(meta, cache=cache, refresh=refresh)
     bibkey, entry = make_bibtex_entry(filepath, meta)
-    added = append_to_bib(bib_path, filepath, entry)
-    return bibkey if added else None
+    if index is None:
+        index = BibIndex.load(bib_path)
+        bibkey = index.add(entry)
+        index.flush(bib_path)
+        return bibkey
+    return index.add(entry)
 
 
-def export_all_to_bib(library_root: Path, bib_path: Path) -> int:
-    """Walk library and append BibTeX entries for all PDFs; return count."""
-    added = 0
-    for dirpath, _, files in os.walk(library_root):
+def _iter_pdf_batches(library_root: Path, batch_size: int, walk=None):
+    """Yield lists of up to `batch_size` PDF paths found under the library.
+
+    `walk` is the (dirpath, pdf names) iterable to use, by default
+    `walk_pdfs(library_root)`.
+    """
+    batch = []
+    for dirpath, files in walk if walk is not None else walk_pdfs(library_root):
         for fname in files:
-            if not fname.lower().endswith(".pdf"):
+            batch.append(Path(dirpath) / fname)
+            if len(batch) >= max(1, batch_size):
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def export_all_to_bib(
+    library_root: Path,
+    bib_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache=None,
+    refresh: bool = False,
+    jobs: int = 1,
+    client=None,
+    walk=None,
+) -> int:
+    """Walk library and append BibTeX entries for all PDFs; return count.
+
+    The existing bib is parsed once into a `BibIndex`. Metadata is read
+    `batch_size` PDFs at a time with one ExifTool call per batch and each
+    batch is enriched with `enrich_many` (`jobs` concurrent lookups through
+    `cache` unless `refresh` is set). New entries are appended every
+    `FLUSH_EVERY` entries and at the end. `walk` overrides the default
+    `walk_pdfs(library_root)` walk.
+    """
+    index = BibIndex.load(bib_path)
+    added = 0
+    try:
+        for batch in _iter_pdf_batches(library_root, batch_size, walk):
+            todo = [p for p in batch if not index.has_file(p)]
+            if not todo:
                 continue
-            p = Path(dirpath) / fname
-            if process_pdf(p, bib_path):
-                added += 1
+            metas = extract_metadata_batch(todo)
+            enrich_many(metas.values(), cache, refresh, jobs=jobs, client=client)
+            for p in todo:
+                if process_pdf(p, bib_path, enrich=False, meta=metas[p], index=index):
+                    added += 1
+            if len(index.pending) >= FLUSH_EVERY:
+                index.flush(bib_path)
+    finally:
+        index.flush(bib_path)
     return added
 
+
+def enrich_library(
+    library_root: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache=None,
+    refresh: bool = False,
+    jobs: int = 1,
+    client=None,
+    walk=None,
+) -> dict:
+    """Run only the enrichment stage over every PDF in the library.
+
+    Reads identifiers in ExifTool batches and looks them up concurrently so
+    that `cache` is warm for a later `export_all_to_bib`. Nothing is
+    written to the bib. Returns counts of files, files with a DOI/ISBN and
+    files enriched. `walk` overrides the default `walk_pdfs(library_root)`.
+    """
+    stats = {"files": 0, "identified": 0, "enriched": 0}
+    for batch in _iter_pdf_batches(library_root, batch_size, walk):
+        metas = extract_metadata_batch(batch)
+        stats["files"] += len(batch)
+        stats["identified"] += sum(
+            1 for meta in metas.values() if _identifier(meta) is not None
+        )
+        stats["enriched"] += enrich_many(
+            metas.values(), cache, refresh, jobs=jobs, client=client
+        )
+    return stats
@@ -0,0 +1,172 @@
+"""In-memory index of a library's BibTeX file.
+
+The bib file is parsed once into sets of file paths, citation keys, DOIs
+and ISBNs. New entries are checked against the index (exact path match, not
+substring search), given a collision-free key, and buffered so they can be
+appended to the file in a single write, which also keeps the entry count
+used by `summary` (see `borax.core.library_stats`) up to date.
+"""
+
+import re
+from pathlib import Path
+
+from borax.core import profiling
+from borax.core.library_stats import (
+    BIB_NON_ENTRY_TYPES,
+    appended_bib_stats,
+    file_signature,
+)
+
+# `@type{key,` at the start of an entry
+ENTRY_RE = re.compile(r"^[ \t]*@(\w+)[ \t]*\{[ \t]*([^,\s]*)[ \t]*,", re.MULTILINE)
+# `name = {value}` fields that identify a work, one per line
+FIELD_RE = re.compile(
+    r"^[ \t]*(file|doi|isbn)[ \t]*=[ \t]*\{(.*)\}[ \t]*,?[ \t]*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+# Resolver URLs and `doi:` in front of a DOI
+DOI_PREFIX_RE = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:)+")
+
+
+def normalize_doi(doi: str) -> str:
+    """Lowercase a DOI and strip resolver/`doi:` prefixes."""
+    return DOI_PREFIX_RE.sub("", (doi or "").strip().lower()).strip()
+
+
+def normalize_isbn(isbn: str) -> str:
+    """Keep only the digits (and a check-digit X) of an ISBN."""
+    return re.sub(r"[^0-9X]", "", str(isbn or "").upper())
+
+
+def _suffixes():
+    """Yield key suffixes a, b, ..., z, aa, ab, ..."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    length = 1
+    while True:
+        n = len(letters) ** length
+        for i in range(n):
+            s = ""
+            for _ in range(length):
+                i, r = divmod(i, len(letters))
+                s = letters[r] + s
+            yield s
+        length += 1
+
+
+class BibIndex:
+    """Paths, keys, DOIs and ISBNs of the entries in one BibTeX file."""
+
+    def __init__(self):
+        self.files = set()
+        self.keys = set()
+        self.dois = set()
+        self.isbns = set()
+        self.entries = 0
+        self.pending = []
+        # Size and mtime of the bib file the index mirrors (None: no file)
+        self.source = None
+
+    @classmethod
+    def load(cls, bib_path: Path) -> "BibIndex":
+        """Parse `bib_path` (if it exists) into a new index."""
+        index = cls()
+        index.source = file_signature(bib_path)
+        if bib_path.exists():
+            with profiling.stage("bib.load") as st:
+                text = bib_path.read_text(encoding="utf-8")
+                st.add_bytes(len(text))
+                index.add_text(text)
+        return index
+
+    @staticmethod
+    def parse_entries(text: str):
+        """Yield (key, {field: value}) for each bibliography entry in `text`."""
+        starts = list(ENTRY_RE.finditer(text))
+        for i, m in enumerate(starts):
+            if m.group(1).lower() in BIB_NON_ENTRY_TYPES:
+                continue
+            end = starts[i + 1].start() if i + 1 < len(starts) else len(text)
+            fields = {}
+            for f in FIELD_RE.finditer(text, m.end(), end):
+                fields.setdefault(f.group(1).lower(), f.group(2).strip())
+            yield m.group(2), fields
+
+    def _register(self, key: str, fields: dict) -> None:
+        self.entries += 1
+        if key:
+            self.keys.add(key)
+        if fields.get("file"):
+            self.files.add(fields["file"])
+        if normalize_doi(fields.get("doi")):
+            self.dois.add(normalize_doi(fields["doi"]))
+        if normalize_isbn(fields.get("isbn")):
+            self.isbns.add(normalize_isbn(fields["isbn"]))
+
+    def add_text(self, text: str) -> None:
+        """Index every entry found in existing BibTeX `text`."""
+        for key, fields in self.parse_entries(text):
+            self._register(key, fields)
+
+    def has_file(self, filepath) -> bool:
+        return str(filepath) in self.files
+
+    def is_duplicate(self, fields: dict) -> bool:
+        """Return True if an entry with these fields is already indexed."""
+        if fields.get("file") and fields["file"] in self.files:
+            return True
+        doi = normalize_doi(fields.get("doi"))
+        if doi and doi in self.dois:
+            return True
+        isbn = normalize_isbn(fields.get("isbn"))
+        return bool(isbn) and isbn in self.isbns
+
+    def unique_key(self, key: str) -> str:
+        """Return `key`, or `key` plus the first free suffix (a, b, ...)."""
+        if key not in self.keys:
+            return key
+        for suffix in _suffixes():
+            if key + suffix not in self.keys:
+                return key + suffix
+
+    def add(self, bib_entry: str):
+        """Queue a new entry unless it duplicates one already indexed.
+
+        Returns the (possibly suffixed) key the entry was queued under, or
+        None if it was a duplicate.
+        """
+        parsed = next(self.parse_entries(bib_entry), None)
+        if parsed is None:
+            return None
+        key, fields = parsed
+        if self.is_duplicate(fields):
+            return None
+        new_key = self.unique_key(key)
+        if new_key != key:
+            bib_entry = bib_entry.replace("{" + key + ",", "{" + new_key + ",", 1)
+        self._register(new_key, fields)
+        self.pending.append(bib_entry)
+        return new_key
+
+    def flush(self, bib_path: Path) -> int:
+        """Append all queued entries to `bib_path` in one write; return count.
+
+        The entry count kept next to the file for `summary` is set from the
+        index, provided the file is still the one it was loaded from;
+        otherwise the count is dropped and rebuilt by the next summary.
+        """
+        if not self.pending:
+            return 0
+        before = None
+        if file_signature(bib_path) == self.source:
+            before = {"entries": self.entries - len(self.pending)}
+        bib_path.parent.mkdir(parents=True, exist_ok=True)
+        with profiling.stage("bib.write") as st:
+            text = "".join(self.pending)
+            with open(bib_path, "a", encoding="utf-8") as f:
+                f.write(text)
+            st.add_bytes(len(text))
+        written = len(self.pending)
+        self.pending.clear()
+        appended_bib_stats(bib_path, before, written)
+        self.source = file_signature(bib_path)
+        return written
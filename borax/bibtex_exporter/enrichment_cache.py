@@ -0,0 +1,95 @@
+"""Persistent cache of DOI / ISBN enrichment lookups.
+
+Results are stored in an SQLite database (by default
+`<library>/.borax/enrichment.sqlite`) keyed by lookup kind and normalized
+identifier. Successful lookups expire after `ttl_seconds`; "not found"
+answers are cached as empty results with a shorter `negative_ttl_seconds`
+so that a DOI CrossRef does not know is not queried on every export.
+Transient failures (timeouts, 5xx) are never cached.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DAY_SECONDS = 86400
+DEFAULT_TTL_DAYS = 90
+NEGATIVE_TTL_DAYS = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+
+class EnrichmentCache:
+    """SQLite-backed cache of enrichment results, safe to share across threads."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        ttl_seconds: float = DEFAULT_TTL_DAYS * DAY_SECONDS,
+        negative_ttl_seconds: float = NEGATIVE_TTL_DAYS * DAY_SECONDS,
+    ):
+        self.path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = min(negative_ttl_seconds, ttl_seconds)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, kind: str, key: str, now: Optional[float] = None):
+        """Return the cached result (possibly `{}` for "not found").
+
+        Returns None on a miss or when the entry has expired.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM lookups WHERE kind = ? AND key = ?",
+                (kind, key),
+            ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        ttl = self.ttl_seconds if data else self.negative_ttl_seconds
+        if (now if now is not None else time.time()) - row[1] > ttl:
+            return None
+        return data
+
+    def put(self, kind: str, key: str, data: dict, now: Optional[float] = None) -> None:
+        """Store a lookup result; an empty dict records "not found"."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (kind, key, data, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    kind,
+                    key,
+                    json.dumps(data, ensure_ascii=False),
+                    now if now is not None else time.time(),
+                ),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+
+    def clear(self) -> int:
+        """Remove every cached lookup; return how many were removed."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM lookups").rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,191 @@
+"""Pooled, rate-limited HTTP client for metadata enrichment.
+
+`HttpClient` wraps one `requests.Session` whose connection pool is shared by
+every enrichment thread, so lookups reuse keep-alive connections instead of
+opening a new one per request. Each host gets a `TokenBucket`; a 429/503
+with `Retry-After` pauses the whole bucket, and failed requests are retried
+a bounded number of times with jittered exponential backoff.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlsplit
+
+from borax.core import profiling
+
+# Requests per second allowed per host. CrossRef's public pool allows 5/s
+# (10/s in the polite pool, i.e. with a mailto in the User-Agent).
+HOST_RATES = {
+    "api.crossref.org": 5.0,
+    "openlibrary.org": 3.0,
+}
+POLITE_HOST_RATES = {"api.crossref.org": 10.0}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Longest Retry-After honoured; larger values end the retries instead
+MAX_RETRY_AFTER = 120.0
+POOL_SIZE = 16
+USER_AGENT = "borax"
+
+
+def load_requests():
+    """Import `requests` on first use; return None if it is unavailable.
+
+    `requests` pulls in urllib3, charset detection and certifi, so it is
+    only imported by commands that actually go to the network.
+    """
+    try:
+        import requests  # type: ignore
+    except Exception:  # ImportError or environments restricting imports
+        return None
+    return requests
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second."""
+
+    def __init__(
+        self, rate: float, burst: Optional[float] = None, clock=None, sleep=None
+    ):
+        self.rate = rate
+        self.capacity = max(1.0, burst if burst is not None else rate)
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or time.sleep
+        self._tokens = self.capacity
+        self._updated = self._clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        now = self._clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                delay = self._wait_time()
+            if delay <= 0:
+                return
+            self._sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._tokens = 0.0
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (seconds or HTTP date); None if absent."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class HttpClient:
+    """Shared session with per-host rate limiting and bounded retries."""
+
+    def __init__(
+        self,
+        host_rates: Optional[dict] = None,
+        mailto: str = "",
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        pool_size: int = POOL_SIZE,
+    ):
+        requests = load_requests()
+        if requests is None:
+            raise RuntimeError("requests is not installed")
+        self._errors = requests.RequestException
+        rates = dict(HOST_RATES)
+        if mailto:
+            rates.update(POLITE_HOST_RATES)
+        rates.update(host_rates or {})
+        self.host_rates = rates
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        agent = f"{USER_AGENT} (mailto:{mailto})" if mailto else USER_AGENT
+        self.session.headers["User-Agent"] = agent
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str):
+        """Return the host's token bucket, or None if it is not rate limited."""
+        rate = self.host_rates.get(host)
+        if not rate:
+            return None
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(rate)
+            return self._buckets[host]
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    @profiling.profiled("http")
+    def get(self, url: str, **kwargs):
+        """GET `url`, retrying connection errors and retryable statuses.
+
+        Returns the last response (which may still carry an error status);
+        re-raises the last connection error once retries are exhausted.
+        """
+        bucket = self._bucket(urlsplit(url).hostname or "")
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                response = self.session.get(url, **kwargs)
+            except self._errors:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt == self.max_retries:
+                return response
+            delay = retry_after_seconds(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self._backoff(attempt)
+            elif delay > MAX_RETRY_AFTER:
+                return response
+            if bucket is not None:
+                bucket.pause(delay)
+            else:
+                time.sleep(delay)
+        return response
+
+    def close(self) -> None:
+        self.session.close()
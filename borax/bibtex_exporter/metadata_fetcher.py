@@ -1,29 +1,70 @@
 #!/usr/bin/env python3
 """Metadata fetchers (DOI / ISBN) for Borax.
 
-This module tries to import `requests` but degrades gracefully if it is not
-available, returning empty enrichments instead of crashing. Dependencies are
+This module imports `requests` on first use (see `load_requests`) and
+degrades gracefully if it is not available, returning empty enrichments
+instead of crashing. Dependencies are
 declared in `pyproject.toml` for Poetry users.
+
+Both fetchers accept an optional `EnrichmentCache`; identifiers are
+normalized before lookup so that `doi:10.1000/X` and `10.1000/x` share one
+cache entry. Requests go through an `HttpClient` (pooled session, per-host
+rate limits, retries); a shared default client is created on first use.
 """
 
-try:
-    import requests  # type: ignore
-except Exception:  # ImportError or environments restricting imports
-    requests = None  # type: ignore
+import threading
+from typing import Optional
 
+from .bib_index import normalize_doi, normalize_isbn
+from .http_client import HttpClient, load_requests
 
-def fetch_from_doi(doi: str) -> dict:
-    """Fetch metadata from CrossRef for a DOI. Returns dict or empty."""
-    if not doi:
-        return {}
-    if requests is None:
-        # requests not installed — skip enrichment gracefully
+CROSSREF_URL = "https://api.crossref.org/works/"
+OPENLIBRARY_URL = "https://openlibrary.org/api/books"
+REQUEST_TIMEOUT = 10
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Return the process-wide `HttpClient`, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def _cached_lookup(kind: str, key: str, lookup, cache=None, refresh=False) -> dict:
+    """Return `lookup(key)` through `cache`.
+
+    `lookup` returns a dict (empty for "not found") or None for a transient
+    failure, which is not cached. `refresh` skips the cache read but still
+    stores the fresh result.
+    """
+    if cache is not None and not refresh:
+        hit = cache.get(kind, key)
+        if hit is not None:
+            return hit
+    result = lookup(key)
+    if result is None:
         return {}
-    url = f"https://api.crossref.org/works/{doi}"
+    if cache is not None:
+        cache.put(kind, key, result)
+    return result
+
+
+def _lookup_doi(doi: str, client: HttpClient):
+    """Query CrossRef; return metadata, {} if unknown, None on failure."""
+    url = f"{CROSSREF_URL}{doi}"
     try:
-        r = requests.get(url, headers={"Accept": "application/json"}, timeout=10)
-        if r.status_code != 200:
+        r = client.get(
+            url, headers={"Accept": "application/json"}, timeout=REQUEST_TIMEOUT
+        )
+        if r.status_code == 404:
             return {}
+        if r.status_code != 200:
+            return None
         data = r.json().get("message", {})
         authors = []
         for a in data.get("author", []):
@@ -45,24 +86,21 @@ def fetch_from_doi(doi: str) -> dict:
             "doi": doi,
         }
     except Exception:
-        return {}
+        return None
 
 
-def fetch_from_isbn(isbn: str) -> dict:
-    """Fetch metadata from OpenLibrary for an ISBN. Returns dict or empty."""
-    if not isbn:
-        return {}
-    if requests is None:
-        # requests not installed — skip enrichment gracefully
-        return {}
-    url = (
-        f"https://openlibrary.org/api/books?bibkeys=ISBN:{isbn}&format=json&jscmd=data"
-    )
+def _lookup_isbn(isbn: str, client: HttpClient):
+    """Query OpenLibrary; return metadata, {} if unknown, None on failure."""
+    url = f"{OPENLIBRARY_URL}?bibkeys=ISBN:{isbn}&format=json&jscmd=data"
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
+        r = client.get(url, timeout=REQUEST_TIMEOUT)
+        if r.status_code == 404:
             return {}
+        if r.status_code != 200:
+            return None
         data = r.json().get(f"ISBN:{isbn}", {})
+        if not data:
+            return {}
         authors = ", ".join([a.get("name", "") for a in data.get("authors", [])])
         publisher = ", ".join([p.get("name", "") for p in data.get("publishers", [])])
         return {
@@ -74,5 +112,36 @@ def fetch_from_isbn(isbn: str) -> dict:
             "isbn": isbn,
         }
     except Exception:
+        return None
+
+
+def fetch_from_doi(
+    doi: str, cache=None, refresh: bool = False, client: Optional[HttpClient] = None
+) -> dict:
+    """Fetch metadata from CrossRef for a DOI. Returns dict or empty."""
+    doi = normalize_doi(doi)
+    if not doi:
         return {}
+    if load_requests() is None:
+        # requests not installed — skip enrichment gracefully
+        return {}
+    client = client or default_client()
+    return _cached_lookup(
+        "doi", doi, lambda key: _lookup_doi(key, client), cache, refresh
+    )
+
 
+def fetch_from_isbn(
+    isbn: str, cache=None, refresh: bool = False, client: Optional[HttpClient] = None
+) -> dict:
+    """Fetch metadata from OpenLibrary for an ISBN. Returns dict or empty."""
+    isbn = normalize_isbn(isbn)
+    if not isbn:
+        return {}
+    if load_requests() is None:
+        # requests not installed — skip enrichment gracefully
+        return {}
+    client = client or default_client()
+    return _cached_lookup(
+        "isbn", isbn, lambda key: _lookup_isbn(key, client), cache, refresh
+    )
@@ -3,15 +3,62 @@
 
 This mirrors the CLI in top-level `main.py` so Poetry can expose
 an installed `borax-cli` command without reorganizing files.
+
+Subcommands import the packages they need inside their `cmd_*` function, so
+cheap commands like `summary` do not pay for tagging, BibTeX export or the
+HTTP stack at startup.
 """
 
 import argparse
-from borax.core.library_config import load_library_config
-from borax.core.init_library import run_init
-from borax import tagging, bibtex_exporter, history_tracker
+import sys
+from typing import Optional
+from borax.core.library_config import (
+    is_library_root,
+    load_library_config,
+    resolve_library_paths,
+)
+
+# Mirrors DEFAULT_BATCH_SIZE without importing it at startup
+DEFAULT_BATCH_SIZE = 200
+# Most used topics listed by `history`
+TOP_TOPICS = 10
+# Commands that accept several library arguments
+BATCH_COMMANDS = {"tag", "process"}
+
+
+def _text_cache(config):
+    """Return the library's text cache, or None if it is disabled."""
+    from borax.core.text_cache import TextCache
+
+    if config.text_cache_max_bytes <= 0:
+        return None
+    return TextCache(config.text_cache_path, config.text_cache_max_bytes)
+
+
+def _enrichment_cache(config):
+    """Return the library's enrichment cache, or None if it is disabled."""
+    from borax.bibtex_exporter.enrichment_cache import DAY_SECONDS, EnrichmentCache
+
+    if config.enrichment_ttl_days <= 0:
+        return None
+    return EnrichmentCache(
+        config.enrichment_cache_path,
+        ttl_seconds=config.enrichment_ttl_days * DAY_SECONDS,
+    )
+
+
+def _http_client(config):
+    """Return a pooled HTTP client for enrichment, or None without requests."""
+    from borax.bibtex_exporter import http_client
+
+    if http_client.load_requests() is None:
+        return None
+    return http_client.HttpClient(mailto=config.enrichment_mailto)
 
 
 def cmd_summary(library_path: str):
+    from borax.core import history_tracker
+
     config = load_library_config(library_path)
     summary = history_tracker.library_summary(
         config.root, config.history_path, config.bib_path
@@ -26,10 +73,19 @@ def cmd_summary(library_path: str):
     print("\nUse `borax-cli scan <library>` to view details.\n")
 
 
-def cmd_scan(library_path: str):
+def cmd_scan(library_path: str, verify: bool = False):
+    from borax import tagging
+    from borax.core.walker import library_walk
+
     config = load_library_config(library_path)
     stats = tagging.scan_library(
-        config.root, config.history_path, config.vocab, verbose=True
+        config.root,
+        config.history_path,
+        config.vocab,
+        verbose=True,
+        verify=verify,
+        walk=library_walk(config),
+        checksum_algorithm=config.checksum_algorithm,
     )
     if stats["unprocessed"]:
         print("Unprocessed files:")
@@ -42,7 +98,12 @@ def cmd_tag(
     override: bool = False,
     dry_run: bool = False,
     tag_mode: str = "append",
+    verify: bool = False,
+    jobs: int = 1,
 ):
+    from borax import tagging
+    from borax.core.walker import library_walk
+
     config = load_library_config(library_path)
     print(f"Tagging library: {config.name} at {config.root}")
     tagging.tag_library(
@@ -52,18 +113,289 @@ def cmd_tag(
         override=override,
         dry_run=dry_run,
         tag_mode=tag_mode,
+        verify=verify,
+        jobs=jobs,
+        text_cache=_text_cache(config),
+        walk=library_walk(config),
+        checksum_algorithm=config.checksum_algorithm,
     )
 
 
-def cmd_bibtex(library_path: str):
+def cmd_tag_many(
+    library_paths: list,
+    override: bool = False,
+    dry_run: bool = False,
+    tag_mode: str = "append",
+    verify: bool = False,
+    jobs: int = 1,
+):
+    """Tag several libraries in one process with one shared worker pool."""
+    from borax import tagging
+    from borax.core.vocab_cache import VocabPool
+    from borax.core.walker import library_walk
+
+    vocab_pool = VocabPool()
+
+    def libraries():
+        for path in library_paths:
+            config = load_library_config(path, vocab_pool=vocab_pool)
+            tagger = tagging.LibraryTagger(
+                config.root,
+                config.history_path,
+                config.vocab,
+                override=override,
+                dry_run=dry_run,
+                tag_mode=tag_mode,
+                verify=verify,
+                text_cache=_text_cache(config),
+                checksum_algorithm=config.checksum_algorithm,
+                name=config.name,
+            )
+            yield tagger, library_walk(config)
+
+    print(f"Tagging {len(library_paths)} libraries with {jobs} shared worker(s)")
+    tagging.tag_libraries(libraries(), jobs=jobs)
+
+
+def cmd_bibtex(
+    library_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    refresh_enrichment: bool = False,
+    jobs: int = 1,
+):
+    from borax import bibtex_exporter
+    from borax.core.walker import library_walk
+
     config = load_library_config(library_path)
     print(f"Exporting BibTeX for library: {config.name}")
-    added = bibtex_exporter.export_all_to_bib(config.root, config.bib_path)
+    cache = _enrichment_cache(config)
+    client = _http_client(config)
+    try:
+        added = bibtex_exporter.export_all_to_bib(
+            config.root,
+            config.bib_path,
+            batch_size=batch_size,
+            cache=cache,
+            refresh=refresh_enrichment,
+            jobs=jobs,
+            client=client,
+            walk=library_walk(config),
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+        if client is not None:
+            client.close()
     print(f"{added} entries added to {config.bib_path}")
 
 
-def cmd_history(library_path: str):
+def cmd_process(
+    library_path: str,
+    override: bool = False,
+    dry_run: bool = False,
+    tag_mode: str = "append",
+    verify: bool = False,
+    jobs: int = 1,
+    refresh_enrichment: bool = False,
+):
+    from borax import processing
+    from borax.core.walker import library_walk
+
+    config = load_library_config(library_path)
+    print(f"Processing library: {config.name} at {config.root}")
+    cache = _enrichment_cache(config)
+    client = _http_client(config)
+    try:
+        stats = processing.process_library(
+            config.root,
+            config.history_path,
+            config.bib_path,
+            config.vocab,
+            override=override,
+            dry_run=dry_run,
+            tag_mode=tag_mode,
+            verify=verify,
+            jobs=jobs,
+            text_cache=_text_cache(config),
+            enrichment_cache=cache,
+            refresh=refresh_enrichment,
+            client=client,
+            walk=library_walk(config),
+            checksum_algorithm=config.checksum_algorithm,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+        if client is not None:
+            client.close()
+    print(
+        f"\n✅ Processing complete: {stats['tagged']} tagged, "
+        f"{stats['moved']} moved, {stats['skipped']} unchanged, "
+        f"{stats['bib_added']} entries added to {config.bib_path}"
+    )
+
+
+def cmd_process_many(
+    library_paths: list,
+    override: bool = False,
+    dry_run: bool = False,
+    tag_mode: str = "append",
+    verify: bool = False,
+    jobs: int = 1,
+    refresh_enrichment: bool = False,
+):
+    """Process several libraries in one process with one shared worker pool.
+
+    Libraries with the same `enrichment_mailto` share one HTTP client (and
+    its rate limits); each keeps its own enrichment cache.
+    """
+    from borax import processing
+    from borax.core.vocab_cache import VocabPool
+    from borax.core.walker import library_walk
+
+    vocab_pool = VocabPool()
+    caches = []
+    clients = {}
+
+    def libraries():
+        for path in library_paths:
+            config = load_library_config(path, vocab_pool=vocab_pool)
+            cache = _enrichment_cache(config)
+            if cache is not None:
+                caches.append(cache)
+            if config.enrichment_mailto not in clients:
+                clients[config.enrichment_mailto] = _http_client(config)
+            processor = processing.LibraryProcessor(
+                config.root,
+                config.history_path,
+                config.bib_path,
+                config.vocab,
+                override=override,
+                dry_run=dry_run,
+                tag_mode=tag_mode,
+                verify=verify,
+                jobs=jobs,
+                text_cache=_text_cache(config),
+                enrichment_cache=cache,
+                refresh=refresh_enrichment,
+                client=clients[config.enrichment_mailto],
+                checksum_algorithm=config.checksum_algorithm,
+                name=config.name,
+            )
+            yield processor, library_walk(config)
+
+    print(f"Processing {len(library_paths)} libraries with {jobs} shared worker(s)")
+    try:
+        totals = processing.process_libraries(libraries(), jobs=jobs)
+    finally:
+        for cache in caches:
+            cache.close()
+        for client in clients.values():
+            if client is not None:
+                client.close()
+    print(
+        f"\n✅ Processing complete: {totals['libraries']} libraries, "
+        f"{totals['tagged']} tagged, {totals['moved']} moved, "
+        f"{totals['skipped']} unchanged, {totals['bib_added']} entries added"
+    )
+
+
+def cmd_watch(
+    library_path: str,
+    tag_mode: str = "append",
+    jobs: int = 1,
+    settle: Optional[float] = None,
+    poll_interval: Optional[float] = None,
+):
+    from borax.core.fs_watch import DEFAULT_SETTLE_SECONDS
+    from borax.processing import LibraryProcessor
+    from borax.processing.watch import watch_library
+
+    config = load_library_config(library_path)
+    print(f"Watching library: {config.name} at {config.root}")
+    cache = _enrichment_cache(config)
+    client = _http_client(config)
+    text_cache = _text_cache(config)
+    processor = None
+    try:
+        processor = LibraryProcessor(
+            config.root,
+            config.history_path,
+            config.bib_path,
+            config.vocab,
+            tag_mode=tag_mode,
+            jobs=jobs,
+            text_cache=text_cache,
+            enrichment_cache=cache,
+            client=client,
+            checksum_algorithm=config.checksum_algorithm,
+        )
+        totals = watch_library(
+            config,
+            processor,
+            settle=DEFAULT_SETTLE_SECONDS if settle is None else settle,
+            poll_interval=poll_interval,
+        )
+    finally:
+        if processor is not None:
+            processor.close()
+        if text_cache is not None:
+            text_cache.prune()
+        if cache is not None:
+            cache.close()
+        if client is not None:
+            client.close()
+    print(
+        f"✅ Watch finished: {totals['tagged']} tagged, "
+        f"{totals['bib_added']} entries added in {totals['batches']} batches"
+    )
+
+
+def cmd_enrich(
+    library_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    refresh_enrichment: bool = False,
+    jobs: int = 1,
+):
+    from borax import bibtex_exporter
+    from borax.core.walker import library_walk
+
+    config = load_library_config(library_path)
+    print(f"Enriching metadata for library: {config.name}")
+    cache = _enrichment_cache(config)
+    client = _http_client(config)
+    try:
+        stats = bibtex_exporter.enrich_library(
+            config.root,
+            batch_size=batch_size,
+            cache=cache,
+            refresh=refresh_enrichment,
+            jobs=jobs,
+            client=client,
+            walk=library_walk(config),
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+        if client is not None:
+            client.close()
+    print(
+        f"{stats['enriched']} of {stats['identified']} files with a DOI/ISBN "
+        f"enriched ({stats['files']} PDFs scanned)"
+    )
+
+
+def cmd_history(library_path: str, action: Optional[str] = None, dry_run: bool = False):
+    from borax.core import history_tracker
+
     config = load_library_config(library_path)
+    if action == "repair":
+        vanished = history_tracker.prune_history(config.history_path, dry_run=dry_run)
+        for path in vanished:
+            print(f"  - {path}")
+        verb = "Would remove" if dry_run else "Removed"
+        print(f"{verb} {len(vanished)} records of missing files")
+        return
     summary = history_tracker.library_summary(
         config.root, config.history_path, config.bib_path
     )
@@ -71,6 +403,147 @@ def cmd_history(library_path: str):
     print(f"Processed files: {summary['processed']}")
     print(f"Topics:          {summary['topics']}")
     print(f"BibTeX entries:  {summary['bib_entries']}")
+    top = sorted(summary["tag_counts"].items(), key=lambda kv: (-kv[1], kv[0]))
+    if top:
+        print("Top topics:")
+        for tag, count in top[:TOP_TOPICS]:
+            print(f"  {tag}: {count}")
+
+
+def cmd_cache(library_path: str, action: str):
+    from borax.core.text_cache import TextCache
+
+    config = load_library_config(library_path)
+    cache = TextCache(config.text_cache_path, max(config.text_cache_max_bytes, 0))
+    if action == "prune":
+        removed, freed = cache.prune()
+        print(f"Pruned {removed} cached texts ({freed / 1048576:.1f} MiB freed)")
+    elif action == "clear":
+        removed, freed = cache.prune(max_bytes=0)
+        print(f"Removed {removed} cached texts ({freed / 1048576:.1f} MiB freed)")
+    else:
+        print(f"Text cache: {config.text_cache_path}")
+        print(f"Size:       {cache.size() / 1048576:.1f} MiB")
+        print(f"Budget:     {config.text_cache_max_bytes / 1048576:.1f} MiB")
+        cache = _enrichment_cache(config)
+        if cache is not None:
+            print(f"Enrichment: {len(cache)} cached lookups")
+            cache.close()
+
+
+def _split_action(args, actions):
+    """Handle `<command> <action> <library>` forms like `cache prune LIB`.
+
+    Returns (action, library); action is None for plain `<command> <library>`.
+    """
+    if args.library in actions and args.extra:
+        return args.library, args.extra[0]
+    return None, args.library
+
+
+def _batch_libraries(args):
+    """Return the library roots of a multi-library `tag`/`process` call.
+
+    Returns None for the usual single library root. Otherwise the library
+    arguments (several roots, globs or a `borax-libraries.toml`) are
+    expanded with `resolve_library_paths`.
+    """
+    specs = [args.library, *args.extra]
+    if len(specs) == 1 and is_library_root(args.library):
+        return None
+    return resolve_library_paths(specs)
+
+
+def _report_profile(profiler, args) -> None:
+    """Print the stage table (`--profile`) and/or append NDJSON metrics."""
+    if args.profile:
+        print(f"\n=== Profile: {args.command} ===", file=sys.stderr)
+        print(profiler.format_table(), file=sys.stderr)
+    if args.profile_json:
+        profiler.write_ndjson(args.profile_json, command=args.command)
+
+
+def _run_command(args, action, parser):
+    """Dispatch the parsed command line to its `cmd_*` function."""
+    if args.command == "summary":
+        cmd_summary(args.library)
+    elif args.command == "scan":
+        cmd_scan(args.library, verify=args.verify)
+    elif args.command == "tag":
+        mode = "overwrite" if args.overwrite_tags else "append"
+        libraries = _batch_libraries(args)
+        if libraries is not None:
+            cmd_tag_many(
+                libraries,
+                override=args.override,
+                dry_run=args.dry_run,
+                tag_mode=mode,
+                verify=args.verify,
+                jobs=args.jobs,
+            )
+            return
+        cmd_tag(
+            args.library,
+            override=args.override,
+            dry_run=args.dry_run,
+            tag_mode=mode,
+            verify=args.verify,
+            jobs=args.jobs,
+        )
+    elif args.command == "bibtex":
+        cmd_bibtex(
+            args.library,
+            batch_size=args.batch_size,
+            refresh_enrichment=args.refresh_enrichment,
+            jobs=args.jobs,
+        )
+    elif args.command == "process":
+        libraries = _batch_libraries(args)
+        if libraries is not None:
+            cmd_process_many(
+                libraries,
+                override=args.override,
+                dry_run=args.dry_run,
+                tag_mode="overwrite" if args.overwrite_tags else "append",
+                verify=args.verify,
+                jobs=args.jobs,
+                refresh_enrichment=args.refresh_enrichment,
+            )
+            return
+        cmd_process(
+            args.library,
+            override=args.override,
+            dry_run=args.dry_run,
+            tag_mode="overwrite" if args.overwrite_tags else "append",
+            verify=args.verify,
+            jobs=args.jobs,
+            refresh_enrichment=args.refresh_enrichment,
+        )
+    elif args.command == "watch":
+        cmd_watch(
+            args.library,
+            tag_mode="overwrite" if args.overwrite_tags else "append",
+            jobs=args.jobs,
+            settle=args.settle,
+            poll_interval=args.poll,
+        )
+    elif args.command == "enrich":
+        cmd_enrich(
+            args.library,
+            batch_size=args.batch_size,
+            refresh_enrichment=args.refresh_enrichment,
+            jobs=args.jobs,
+        )
+    elif args.command == "history":
+        cmd_history(args.library, action, dry_run=args.dry_run)
+    elif args.command == "init":
+        from borax.core.init_library import run_init
+
+        run_init(args.library)
+    elif args.command == "cache":
+        cmd_cache(args.library, action)
+    else:
+        parser.print_help()
 
 
 def main():
@@ -81,11 +554,20 @@ def main():
         "command",
         nargs="?",
         default="help",
-        help="summary | scan | tag | bibtex | history | init",
+        help=(
+            "summary | scan | tag | bibtex | process | watch | enrich | history | "
+            "init | cache [prune|clear] | history [repair]"
+        ),
     )
     parser.add_argument(
-        "library", nargs="?", help="Path to library root or target dir for init"
+        "library",
+        nargs="?",
+        help=(
+            "Path to library root or target dir for init; tag and process also "
+            "take several roots, globs or a borax-libraries.toml"
+        ),
     )
+    parser.add_argument("extra", nargs="*", help=argparse.SUPPRESS)
     parser.add_argument(
         "--override", action="store_true", help="Ignore history and reprocess all PDFs"
     )
@@ -94,6 +576,55 @@ def main():
         action="store_true",
         help="Preview tagging changes without modifying files",
     )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Re-hash every PDF instead of trusting size/mtime/inode from history",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Files to tag, or DOI/ISBN lookups to run, concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        metavar="N",
+        help="PDFs per ExifTool metadata read during BibTeX export",
+    )
+    parser.add_argument(
+        "--refresh-enrichment",
+        action="store_true",
+        help="Ignore cached DOI/ISBN lookups and query the services again",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="watch: wait until a PDF is unchanged this long before processing",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="watch: poll for changes at this interval instead of using inotify",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage timings, call counts and bytes to stderr",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="Append per-stage metrics to PATH as NDJSON (implies profiling)",
+    )
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
         "--overwrite-tags",
@@ -107,31 +638,49 @@ def main():
     )
     args = parser.parse_args()
 
+    action = None
+    extra = args.extra
+    if args.command == "cache":
+        action, args.library = _split_action(args, {"prune", "clear"})
+    elif args.command == "history":
+        action, args.library = _split_action(args, {"repair"})
+    if args.command in BATCH_COMMANDS:
+        extra = []
+    elif action is not None:
+        extra = extra[1:]
+    if extra:
+        parser.error(f"unrecognized arguments for {args.command}: {' '.join(extra)}")
+
     if (
-        args.command in {"summary", "scan", "tag", "bibtex", "history", "init"}
+        args.command
+        in {
+            "summary",
+            "scan",
+            "tag",
+            "bibtex",
+            "process",
+            "watch",
+            "enrich",
+            "history",
+            "init",
+            "cache",
+        }
         and not args.library
     ):
         print("Error: library path is required for this command.")
         parser.print_help()
         return
 
-    if args.command == "summary":
-        cmd_summary(args.library)
-    elif args.command == "scan":
-        cmd_scan(args.library)
-    elif args.command == "tag":
-        mode = "overwrite" if args.overwrite_tags else "append"
-        cmd_tag(
-            args.library, override=args.override, dry_run=args.dry_run, tag_mode=mode
-        )
-    elif args.command == "bibtex":
-        cmd_bibtex(args.library)
-    elif args.command == "history":
-        cmd_history(args.library)
-    elif args.command == "init":
-        run_init(args.library)
-    else:
-        parser.print_help()
+    profiler = None
+    if args.profile or args.profile_json:
+        from borax.core import profiling
+
+        profiler = profiling.enable()
+    try:
+        _run_command(args, action, parser)
+    finally:
+        if profiler is not None:
+            _report_profile(profiler, args)
 
 
 if __name__ == "__main__":
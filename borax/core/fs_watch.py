@@ -0,0 +1,320 @@
+"""Filesystem change sources for `watch`.
+
+`InotifyWatcher` uses Linux inotify through `ctypes` (no extra
+dependency): every directory under the root gets a watch, new or moved-in
+directories are watched (and their PDFs reported) as they appear, and a
+queue overflow asks the caller to rescan. `PollingWatcher` is the portable
+fallback; it stats the library's PDFs every `interval` seconds and reports
+those whose size or mtime changed. `open_watcher` picks the best available.
+
+Both expose `read(timeout)`, returning the PDF paths that saw activity
+since the last call, and a `rescan` flag. Writers are still busy when the
+first events arrive, so callers pass paths through a `Debouncer` before
+handing them to the pipeline.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from .walker import _ignored, _list_dir
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 1 << 16
+DEFAULT_POLL_INTERVAL = 30.0
+DEFAULT_SETTLE_SECONDS = 2.0
+
+
+class WatchError(OSError):
+    """Raised when a change source cannot be set up."""
+
+
+def _rel(root: Path, path: Path) -> str:
+    rel = os.path.relpath(path, root)
+    return "" if rel == "." else Path(rel).as_posix()
+
+
+class _Filter:
+    """Library-relative ignore rules shared by both watchers."""
+
+    def __init__(self, root: Path, ignore=(), state_dir=".borax"):
+        self.root = Path(root)
+        self.ignore = list(ignore or ())
+        self.skip = Path(state_dir).as_posix() if state_dir else None
+
+    def skip_dir(self, path: Path) -> bool:
+        """True if `path` or one of its parents is outside or ignored."""
+        rel = _rel(self.root, path)
+        if not rel:
+            return False
+        if rel.startswith(".."):
+            return True
+        parts = rel.split("/")
+        for i, name in enumerate(parts):
+            sub = "/".join(parts[: i + 1])
+            if sub == self.skip or _ignored(sub, name, self.ignore):
+                return True
+        return False
+
+    def _file_ignored(self, path: Path) -> bool:
+        return _ignored(_rel(self.root, path), path.name, self.ignore)
+
+    def wants_file(self, path: Path) -> bool:
+        if not path.name.lower().endswith(".pdf"):
+            return False
+        return not self.skip_dir(path.parent) and not self._file_ignored(path)
+
+    def walk(self, top: Path):
+        """Yield (dirpath, pdf names) under `top`, like `walk_pdfs`."""
+        stack = [Path(top)]
+        while stack:
+            dirpath = stack.pop()
+            if self.skip_dir(dirpath):
+                continue
+            try:
+                subdirs, pdfs = _list_dir(dirpath)
+            except OSError:
+                continue
+            yield dirpath, [n for n in pdfs if not self._file_ignored(dirpath / n)]
+            stack.extend(dirpath / name for name in reversed(subdirs))
+
+
+class InotifyWatcher:
+    """Recursive inotify watch of a library root (Linux only)."""
+
+    def __init__(self, root: Path, ignore=(), state_dir=".borax"):
+        if not sys.platform.startswith("linux"):
+            raise WatchError(errno.ENOSYS, "inotify is only available on Linux")
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            self._libc = ctypes.CDLL(name, use_errno=True)
+        except OSError as e:
+            raise WatchError(errno.ENOSYS, f"inotify unavailable: {e}") from e
+        if not hasattr(self._libc, "inotify_init1"):
+            raise WatchError(errno.ENOSYS, f"inotify unavailable in {name}")
+        self.filter = _Filter(root, ignore, state_dir)
+        self.root = self.filter.root
+        self.rescan = False
+        self._dirs = {}  # wd -> directory path
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise WatchError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        try:
+            self._watch_tree(self.root)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return  # vanished or unreadable meanwhile
+            raise WatchError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        self._dirs[wd] = path
+
+    def _watch_tree(self, top: Path) -> list:
+        """Watch `top` and its subdirectories; return the PDFs found there."""
+        found = []
+        for dirpath, names in self.filter.walk(top):
+            self._add_watch(Path(dirpath))
+            found.extend(Path(dirpath) / n for n in names)
+        return found
+
+    def _unwatch_tree(self, top: Path) -> None:
+        prefix = str(top) + os.sep
+        for wd, path in list(self._dirs.items()):
+            if path == top or str(path).startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def _events(self, data: bytes):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+    def read(self, timeout: float) -> list:
+        """Wait up to `timeout` seconds; return PDFs that saw activity."""
+        changed = []
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        while ready:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            for wd, mask, name in self._events(data):
+                if mask & IN_Q_OVERFLOW:
+                    self.rescan = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                parent = self._dirs.get(wd)
+                if parent is None or not name:
+                    continue
+                path = parent / name
+                if mask & IN_ISDIR:
+                    if mask & IN_MOVED_FROM:
+                        self._unwatch_tree(path)
+                    elif mask & (IN_CREATE | IN_MOVED_TO):
+                        changed.extend(self._watch_tree(path))
+                elif mask & (
+                    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+                ) and self.filter.wants_file(path):
+                    changed.append(path)
+            ready, _, _ = select.select([self._fd], [], [], 0)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._dirs.clear()
+
+
+class PollingWatcher:
+    """Portable fallback: compare PDF size/mtime every `interval` seconds."""
+
+    def __init__(self, root: Path, ignore=(), state_dir=".borax", interval=None):
+        self.filter = _Filter(root, ignore, state_dir)
+        self.root = self.filter.root
+        self.interval = DEFAULT_POLL_INTERVAL if interval is None else interval
+        self.rescan = False
+        self._seen = self._snapshot()
+        self._next = time.monotonic() + self.interval
+
+    def _snapshot(self) -> dict:
+        seen = {}
+        for dirpath, names in self.filter.walk(self.root):
+            for name in names:
+                path = Path(dirpath) / name
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen[path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        return seen
+
+    def read(self, timeout: float) -> list:
+        """Sleep until the next poll (at most `timeout`); return changed PDFs."""
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        time.sleep(max(wait, 0))
+        self._next = time.monotonic() + self.interval
+        current = self._snapshot()
+        changed = [p for p, sig in current.items() if self._seen.get(p) != sig]
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        self._seen = {}
+
+
+def open_watcher(root: Path, ignore=(), state_dir=".borax", poll_interval=None):
+    """Return an `InotifyWatcher` if possible, else a `PollingWatcher`.
+
+    Passing `poll_interval` forces polling at that interval.
+    """
+    if poll_interval is None:
+        try:
+            return InotifyWatcher(root, ignore=ignore, state_dir=state_dir)
+        except WatchError:
+            pass
+    return PollingWatcher(
+        root, ignore=ignore, state_dir=state_dir, interval=poll_interval
+    )
+
+
+class Debouncer:
+    """Hold changed paths until they have been quiet for `settle` seconds.
+
+    A path becomes ready once no event arrived for it during `settle` and
+    its size and mtime still match what they were at its last event, so
+    files that are still being downloaded or copied are not processed
+    half-written. Vanished paths are dropped.
+    """
+
+    def __init__(self, settle: float = DEFAULT_SETTLE_SECONDS, clock=time.monotonic):
+        self.settle = settle
+        self.clock = clock
+        self._pending = {}  # path -> (last event time, stat signature)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def _signature(path: Path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def touch(self, paths) -> None:
+        """Record activity on `paths` (duplicates are stat'ed once)."""
+        now = self.clock()
+        for path in dict.fromkeys(paths):
+            self._pending[Path(path)] = (now, self._signature(path))
+
+    def next_deadline(self):
+        """Seconds until the earliest pending path may be ready, or None."""
+        if not self._pending:
+            return None
+        first = min(t for t, _ in self._pending.values())
+        return max(first + self.settle - self.clock(), 0.0)
+
+    def ready(self) -> list:
+        """Pop and return the paths that have settled, sorted."""
+        now = self.clock()
+        done = []
+        for path, (last, sig) in list(self._pending.items()):
+            if now - last < self.settle:
+                continue
+            current = self._signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != sig:
+                # Changed without an event (e.g. network filesystems)
+                self._pending[path] = (now, current)
+            else:
+                del self._pending[path]
+                done.append(path)
+        return sorted(done)
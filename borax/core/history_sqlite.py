@@ -0,0 +1,202 @@
+"""SQLite-backed tag history for Borax.
+
+`SQLiteHistory` behaves like the dict returned by `load_history` for JSON
+histories, but looks records up by primary key instead of holding the whole
+history in memory, and commits every upsert in its own transaction so
+progress is durable as soon as a file is recorded. Per-tag file counts are
+kept in a `tag_counts` table, updated in the same transaction as each
+record, so summaries never scan the `files` table. Checksums and their
+algorithm are indexed columns, so moved files are found by content without
+loading every record (see `ChecksumIndex`).
+"""
+
+import json
+import sqlite3
+from collections import Counter
+from collections.abc import MutableMapping
+from pathlib import Path
+
+# History file suffixes that select the SQLite backend
+SQLITE_SUFFIXES = {".sqlite", ".sqlite3", ".db"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    original_checksum TEXT,
+    modified_checksum TEXT,
+    record TEXT NOT NULL,
+    checksum_algorithm TEXT
+);
+CREATE INDEX IF NOT EXISTS files_original_checksum ON files(original_checksum);
+CREATE INDEX IF NOT EXISTS files_modified_checksum ON files(modified_checksum);
+CREATE TABLE IF NOT EXISTS tag_counts (
+    tag TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+# Created after `checksum_algorithm` was added to databases that predate it
+ALGORITHM_INDEX = """
+CREATE INDEX IF NOT EXISTS files_checksum_algorithm ON files(checksum_algorithm);
+"""
+COLUMNS = "path, original_checksum, modified_checksum, record, checksum_algorithm"
+# `PRAGMA user_version` of databases whose derived data is up to date;
+# older databases get it rebuilt once when opened
+SCHEMA_VERSION = 2
+
+
+class SQLiteHistory(MutableMapping):
+    """Mapping of file path -> history record stored in an SQLite database.
+
+    Records are returned as fresh dicts; callers must assign a record back
+    (``history[path] = record``) for changes to be persisted.
+    """
+
+    def __init__(self, db_path: Path, check_same_thread: bool = True):
+        self.path = Path(db_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=check_same_thread
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+        if "checksum_algorithm" not in columns:
+            with self._conn:
+                self._conn.execute(
+                    "ALTER TABLE files ADD COLUMN checksum_algorithm TEXT"
+                )
+        self._conn.executescript(ALGORITHM_INDEX)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self.rebuild_stats()
+
+    @staticmethod
+    def _row(path: str, record: dict) -> tuple:
+        return (
+            path,
+            record.get("original_checksum"),
+            record.get("modified_checksum"),
+            json.dumps(record, ensure_ascii=False),
+            record.get("checksum_algorithm"),
+        )
+
+    def _tags(self, path: str) -> set:
+        row = self._conn.execute(
+            "SELECT record FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return set(json.loads(row[0]).get("tags") or ()) if row else set()
+
+    def _count_tags(self, old: set, new: set) -> None:
+        """Move the tag counts of one record from tags `old` to `new`."""
+        delta = Counter(new)
+        delta.subtract(old)
+        changes = [(tag, n) for tag, n in delta.items() if n]
+        if not changes:
+            return
+        self._conn.executemany(
+            "INSERT INTO tag_counts VALUES (?, ?) "
+            "ON CONFLICT(tag) DO UPDATE SET count = count + excluded.count",
+            changes,
+        )
+        if any(n < 0 for _, n in changes):
+            self._conn.execute("DELETE FROM tag_counts WHERE count <= 0")
+
+    def __getitem__(self, path: str) -> dict:
+        row = self._conn.execute(
+            "SELECT record FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return json.loads(row[0])
+
+    def __setitem__(self, path: str, record: dict) -> None:
+        with self._conn:
+            self._count_tags(self._tags(path), set(record.get("tags") or ()))
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO files ({COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                self._row(path, record),
+            )
+
+    def __delitem__(self, path: str) -> None:
+        with self._conn:
+            self._count_tags(self._tags(path), set())
+            cur = self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        if cur.rowcount == 0:
+            raise KeyError(path)
+
+    def __iter__(self):
+        for (path,) in self._conn.execute("SELECT path FROM files"):
+            yield path
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def __contains__(self, path) -> bool:
+        return (
+            self._conn.execute("SELECT 1 FROM files WHERE path = ?", (path,)).fetchone()
+            is not None
+        )
+
+    def items(self):
+        for path, record in self._conn.execute("SELECT path, record FROM files"):
+            yield path, json.loads(record)
+
+    def values(self):
+        for (record,) in self._conn.execute("SELECT record FROM files"):
+            yield json.loads(record)
+
+    def update_many(self, records: dict) -> None:
+        """Upsert many records in a single transaction."""
+        with self._conn:
+            for path, record in records.items():
+                self._count_tags(self._tags(path), set(record.get("tags") or ()))
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO files ({COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                (self._row(p, r) for p, r in records.items()),
+            )
+
+    def checksum_algorithms(self) -> set:
+        """Return the `checksum_algorithm` values in use (None for legacy rows)."""
+        return {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT DISTINCT checksum_algorithm FROM files"
+            )
+        }
+
+    def find_checksum(self, checksum: str) -> list:
+        """Return [(path, record)] of records with `checksum`, oldest first."""
+        rows = self._conn.execute(
+            "SELECT path, record FROM files "
+            "WHERE original_checksum = ? OR modified_checksum = ? ORDER BY rowid",
+            (checksum, checksum),
+        )
+        return [(path, json.loads(record)) for path, record in rows]
+
+    def stats(self) -> dict:
+        """Return `{"processed": n, "tags": {tag: count}}` from the database."""
+        return {
+            "processed": len(self),
+            "tags": dict(self._conn.execute("SELECT tag, count FROM tag_counts")),
+        }
+
+    def rebuild_stats(self) -> None:
+        """Recompute `tag_counts` and the algorithm column (for older databases)."""
+        tags = Counter()
+        algorithms = []
+        for path, record in self.items():
+            tags.update(set(record.get("tags") or ()))
+            algorithms.append((record.get("checksum_algorithm"), path))
+        with self._conn:
+            self._conn.execute("DELETE FROM tag_counts")
+            self._conn.executemany("INSERT INTO tag_counts VALUES (?, ?)", tags.items())
+            self._conn.executemany(
+                "UPDATE files SET checksum_algorithm = ? WHERE path = ?", algorithms
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
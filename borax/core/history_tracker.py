@@ -1,77 +1,615 @@
 #!/usr/bin/env python3
-"""Per-library history tracking for Borax."""
+"""Per-library history tracking for Borax.
+
+Histories are stored as JSON (`tag_history.json`) or, for large libraries,
+in SQLite (`*.sqlite`/`*.db`); the backend is chosen by the file suffix and
+both are handled through the same functions below.
+
+JSON histories are rewritten atomically (temp file + rename). During long
+runs, completed records are also appended to `<history>.journal`, which is
+replayed by `load_history` so an interrupted run resumes where it stopped.
+Every save also refreshes `<history>.stats`, the processed and per-tag
+counts `library_summary` reads instead of loading the history.
+"""
 
 import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
-from .utils import file_checksum
+from typing import Optional
+from . import profiling
+from .history_sqlite import SQLITE_SUFFIXES, SQLiteHistory
+from .library_stats import bib_stats, history_counters, read_stats, write_stats
+from .utils import (
+    DEFAULT_CHECKSUM,
+    checksum_available,
+    file_checksum,
+    quick_fingerprint,
+)
 
+# Stat fields stored next to the checksums; when all of them still match the
+# file on disk, the (expensive) full-content checksum is skipped.
+STAT_FIELDS = ("size", "mtime_ns", "inode")
+# Files modified this close to the moment their stat was recorded are "racy":
+# a later write within the same timestamp tick would leave mtime unchanged,
+# so the fast path is not trusted for them until they are re-hashed.
+STAT_RACY_WINDOW_NS = 2_000_000_000
+# A journaled run rewrites the full history after this many records (or a
+# quarter of the history size, if larger, so rewrites of big histories stay
+# amortized) or seconds, whichever comes first, then starts a fresh journal.
+CHECKPOINT_EVERY = 500
+CHECKPOINT_SECONDS = 300.0
 
-def load_history(history_path: Path) -> dict:
-    """Load history JSON from the given path, or return an empty dict."""
+
+def is_sqlite_history(history_path: Path) -> bool:
+    """Return True if `history_path` selects the SQLite backend."""
+    return Path(history_path).suffix.lower() in SQLITE_SUFFIXES
+
+
+def _load_json_history(history_path: Path) -> dict:
     if history_path.exists():
         with open(history_path, "r", encoding="utf-8") as f:
             return json.load(f)
     return {}
 
 
+def migrate_json_history(json_path: Path, sqlite_path: Path) -> int:
+    """Copy a JSON history into an SQLite history; return records copied."""
+    records = _load_json_history(json_path)
+    store = SQLiteHistory(sqlite_path)
+    try:
+        store.update_many(records)
+    finally:
+        store.close()
+    return len(records)
+
+
+def journal_path(history_path: Path) -> Path:
+    """Return the journal file used alongside a JSON history."""
+    return history_path.with_name(history_path.name + ".journal")
+
+
+def _replay_journal(history_path: Path, history: dict) -> int:
+    """Apply journaled records to `history`; return how many were applied.
+
+    A torn final line (from a crash mid-write) is ignored; a null record
+    removes the path.
+    """
+    path = journal_path(history_path)
+    if not path.exists():
+        return 0
+    applied = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry["record"] is None:
+                history.pop(entry["path"], None)
+            else:
+                history[entry["path"]] = entry["record"]
+            applied += 1
+    return applied
+
+
+@profiling.profiled("history.load")
+def load_history(history_path: Path) -> dict:
+    """Load the history at the given path, or return an empty history.
+
+    JSON histories are returned as a dict, with any records left in the
+    journal by an interrupted run replayed on top. SQLite histories are
+    returned as an `SQLiteHistory` mapping; when the database does not exist
+    yet but a JSON history with the same stem does, it is migrated once.
+    """
+    if is_sqlite_history(history_path):
+        legacy = history_path.with_suffix(".json")
+        if not history_path.exists() and legacy.exists():
+            migrate_json_history(legacy, history_path)
+        return SQLiteHistory(history_path)
+    history = _load_json_history(history_path)
+    _replay_journal(history_path, history)
+    return history
+
+
+@profiling.profiled("history.save")
 def save_history(history_path: Path, history: dict) -> None:
-    """Persist the history dict to the given path, creating parent dirs."""
+    """Persist the history to the given path, creating parent dirs."""
+    if isinstance(history, SQLiteHistory):
+        history.commit()
+        return
+    if is_sqlite_history(history_path):
+        store = SQLiteHistory(history_path)
+        try:
+            store.update_many(history)
+        finally:
+            store.close()
+        return
     history_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(history_path, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=2, ensure_ascii=False)
+    fd, tmp = tempfile.mkstemp(
+        dir=history_path.parent, prefix=history_path.name, suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+            profiling.add_bytes(f.tell())
+        os.replace(tmp, history_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    write_stats(history_path, history_counters(history.values()))
 
 
-def already_processed(filepath: Path, history: dict) -> bool:
-    """Return True if the file's checksum matches a stored value."""
-    record = history.get(str(filepath))
+class HistoryJournal:
+    """Append-only log of completed history records with periodic checkpoints.
+
+    `record(path)` appends the current record for `path` as one JSON line
+    and flushes it. Every `checkpoint_every` records (scaled up for large
+    histories) or `checkpoint_seconds` the full history is saved atomically
+    and the journal is truncated;
+    `close` does a final checkpoint and removes the journal. SQLite histories
+    commit each record on assignment, so for them only checkpoints apply.
+    The journal file stays open between records; use the journal as a
+    context manager, or call `close`, to release it.
+    """
+
+    def __init__(
+        self,
+        history_path: Path,
+        history: dict,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+        checkpoint_seconds: float = CHECKPOINT_SECONDS,
+    ):
+        self.history_path = history_path
+        self.history = history
+        self.checkpoint_every = max(checkpoint_every, len(history) // 4)
+        self.checkpoint_seconds = checkpoint_seconds
+        self.path = journal_path(history_path)
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+        self._file = None
+        self._files = ExitStack()
+        if not isinstance(history, SQLiteHistory):
+            history_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self._files.enter_context(self._open())
+
+    def _open(self):
+        return open(self.path, "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @profiling.profiled("history.journal")
+    def record(self, filepath) -> None:
+        """Journal the current history record of `filepath` (or its removal)."""
+        if self._file is not None:
+            key = str(filepath)
+            entry = {"path": key, "record": self.history.get(key)}
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+        self._pending += 1
+        if (
+            self._pending >= self.checkpoint_every
+            or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds
+        ):
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Save the full history atomically and start an empty journal."""
+        save_history(self.history_path, self.history)
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.flush()
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+    def close(self) -> None:
+        """Checkpoint and remove the journal file."""
+        self.checkpoint()
+        if self._file is not None:
+            self._files.close()
+            self._file = None
+            self.path.unlink(missing_ok=True)
+
+
+def stat_signature(filepath: Path) -> dict:
+    """Return the stat fields used for the change-detection fast path."""
+    st = os.stat(filepath)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "inode": st.st_ino,
+        "stat_checked_ns": time.time_ns(),
+    }
+
+
+def _fingerprint_differs(filepath: Path, record: dict, signature: dict) -> bool:
+    """Return True if the record's quick fingerprint proves the file changed.
+
+    Records without a fingerprint never prove anything. A size change is
+    detected from the stored fingerprint without reading the file.
+    """
+    stored = record.get("quick_fingerprint")
+    if not stored:
+        return False
+    if stored.split(":", 1)[0] != str(signature["size"]):
+        return True
+    try:
+        return quick_fingerprint(filepath) != stored
+    except OSError:
+        return True
+
+
+def _stat_matches(record: dict, signature: dict) -> bool:
+    """Return True if the stored stat fields match and are not racy."""
+    if not all(record.get(f) == signature[f] for f in STAT_FIELDS):
+        return False
+    checked = record.get("stat_checked_ns", 0)
+    return record["mtime_ns"] + STAT_RACY_WINDOW_NS <= checked
+
+
+def record_checksum_algorithm(record: dict) -> str:
+    """Return the algorithm of `record`'s checksums (SHA-256 before it was stored)."""
+    return record.get("checksum_algorithm") or DEFAULT_CHECKSUM
+
+
+def _upgrade_checksums(
+    filepath: Path, record: dict, current: str, algorithm: str
+) -> None:
+    """Re-key `record`'s checksums to `algorithm` after `current` matched.
+
+    The file is hashed again with the new algorithm and stored in whichever
+    field matched; the other checksum describes content that is gone and
+    cannot be recomputed, so it is dropped.
+    """
+    upgraded = file_checksum(filepath, algorithm)
+    for name in ("original_checksum", "modified_checksum"):
+        if record.get(name) == current:
+            record[name] = upgraded
+        else:
+            record.pop(name, None)
+    record["checksum_algorithm"] = algorithm
+
+
+@profiling.profiled("history.check")
+def record_is_current(
+    filepath: Path, record: dict, verify: bool = False, algorithm: Optional[str] = None
+) -> bool:
+    """Return True if the file is unchanged since `record` was written.
+
+    Size, mtime and inode are compared first; when they all match the stored
+    values (and the mtime is not racy) the file is considered unchanged
+    without reading it. Otherwise the stored quick fingerprint (size plus
+    the first, middle and last 64 KiB) is compared, so changed files are
+    recognized without hashing them in full. Only when it matches (e.g. a
+    copied or restored file with a new mtime), or when `verify` is set, is
+    the full checksum compared against the stored original/modified
+    checksums; on a match the stat fields and fingerprint in `record` are
+    refreshed so the next run can take the fast path again.
+
+    Checksums are computed with the algorithm named in the record (SHA-256
+    for records written before it was stored). When that differs from the
+    library's `algorithm`, a matching record is upgraded to it in place, so
+    histories migrate lazily as files are re-hashed.
+    """
     if not record:
         return False
-    current = file_checksum(filepath)
-    return current == record.get("original_checksum") or current == record.get(
+    try:
+        signature = stat_signature(filepath)
+    except OSError:
+        return False
+    if not verify and _stat_matches(record, signature):
+        return True
+    if not verify and _fingerprint_differs(filepath, record, signature):
+        return False
+    stored = record_checksum_algorithm(record)
+    if not checksum_available(stored):
+        return False
+    current = file_checksum(filepath, stored)
+    matched = current == record.get("original_checksum") or current == record.get(
         "modified_checksum"
     )
+    if matched:
+        record.update(signature)
+        record["quick_fingerprint"] = quick_fingerprint(filepath)
+        if algorithm and algorithm != stored:
+            _upgrade_checksums(filepath, record, current, algorithm)
+    return matched
+
+
+def already_processed(
+    filepath: Path, history: dict, verify: bool = False, algorithm: Optional[str] = None
+) -> bool:
+    """Return True if the file's stat or checksum matches its history record."""
+    record = history.get(str(filepath))
+    checked = record.get("stat_checked_ns") if record else None
+    current = record_is_current(filepath, record, verify=verify, algorithm=algorithm)
+    if current and record.get("stat_checked_ns") != checked:
+        # Persist refreshed stat fields (needed for non-dict histories)
+        history[str(filepath)] = record
+    return current
+
 
+def record_original(
+    filepath: Path,
+    history: dict,
+    tags=None,
+    checksum=None,
+    algorithm: str = DEFAULT_CHECKSUM,
+) -> dict:
+    """Record the original checksum and initial tags for a file.
 
-def record_original(filepath: Path, history: dict, tags=None) -> dict:
-    """Record the original checksum and initial tags for a file."""
-    original = file_checksum(filepath)
-    history.setdefault(str(filepath), {})
-    history[str(filepath)].update(
+    `checksum` may be passed when the caller has already hashed the file
+    with `algorithm`.
+    """
+    original = checksum or file_checksum(filepath, algorithm)
+    record = dict(history.get(str(filepath)) or {})
+    if record_checksum_algorithm(record) != algorithm:
+        record.pop("modified_checksum", None)
+    record.update(
         {
             "original_checksum": original,
+            "checksum_algorithm": algorithm,
             "tags": tags or [],
             "first_seen": datetime.now().isoformat(timespec="seconds"),
+            "quick_fingerprint": quick_fingerprint(filepath),
+            **stat_signature(filepath),
         }
     )
+    history[str(filepath)] = record
     return history
 
 
-def update_modified_checksum(filepath: Path, history: dict, tags=None) -> dict:
-    """Update modified checksum and tags for a file."""
-    modified = file_checksum(filepath)
-    history.setdefault(str(filepath), {})
-    history[str(filepath)].update(
+def update_modified_checksum(
+    filepath: Path,
+    history: dict,
+    tags=None,
+    checksum=None,
+    algorithm: str = DEFAULT_CHECKSUM,
+) -> dict:
+    """Update modified checksum, stat fields and tags for a file.
+
+    `checksum` may be passed when the caller has already hashed the file
+    with `algorithm`.
+    """
+    modified = checksum or file_checksum(filepath, algorithm)
+    record = dict(history.get(str(filepath)) or {})
+    if record_checksum_algorithm(record) != algorithm:
+        record.pop("original_checksum", None)
+    record.update(
         {
             "modified_checksum": modified,
-            "tags": tags or history[str(filepath)].get("tags", []),
+            "checksum_algorithm": algorithm,
+            "tags": tags or record.get("tags", []),
             "last_modified": datetime.now().isoformat(timespec="seconds"),
+            "quick_fingerprint": quick_fingerprint(filepath),
+            **stat_signature(filepath),
         }
     )
+    history[str(filepath)] = record
     return history
 
 
-def library_summary(root: Path, history_path: Path, bib_path: Path) -> dict:
-    """Return a summary of the library based on history and BibTeX contents."""
+def move_record(
+    old_path,
+    filepath: Path,
+    history: dict,
+    tags=None,
+    checksum=None,
+    algorithm: str = DEFAULT_CHECKSUM,
+) -> dict:
+    """Re-key the history record of a moved (or copied) file to `filepath`.
+
+    The record at `old_path` is removed when that file no longer exists and
+    kept otherwise (a copy). `checksum` is the file's current checksum; it
+    becomes the modified checksum when the keywords were rewritten after
+    the move, or when the old record was hashed with another algorithm.
+    """
+    old_key = str(old_path)
+    record = dict(history.get(old_key) or {})
+    if not os.path.exists(old_key):
+        history.pop(old_key, None)
+    if checksum and record_checksum_algorithm(record) != algorithm:
+        # Matched by an older algorithm: its checksums cannot be compared
+        # with `checksum`, which describes the (tagged) content now on disk
+        record.pop("original_checksum", None)
+        record["modified_checksum"] = checksum
+    elif checksum and checksum not in (
+        record.get("original_checksum"),
+        record.get("modified_checksum"),
+    ):
+        record["modified_checksum"] = checksum
+        record["last_modified"] = datetime.now().isoformat(timespec="seconds")
+    record.update(
+        {
+            "checksum_algorithm": algorithm,
+            "tags": tags or record.get("tags", []),
+            "moved_from": old_key,
+            "quick_fingerprint": quick_fingerprint(filepath),
+            **stat_signature(filepath),
+        }
+    )
+    history[str(filepath)] = record
+    return history
+
+
+class ChecksumIndex:
+    """Reverse index of a history: content checksum -> (path, tags, tagged).
+
+    Maps each record's original and modified checksums to its path, so a
+    PDF at a path the history does not know can be recognized as a moved or
+    copied file that was already processed. Checksums are keyed by the
+    algorithm they were computed with, and `find` also hashes the candidate
+    with every older algorithm still present in the history, so files whose
+    records have not been upgraded yet are recognized as well. `tagged` is
+    False for an original checksum, whose content predates the keyword
+    write.
+
+    For JSON histories `build` reads every record once into memory; SQLite
+    histories are queried through their checksum indexes on a connection of
+    the index's own. `build` must run on the thread that owns the history;
+    afterwards `lookup`/`find` may be called from worker threads while the
+    owner keeps the index current with `add`.
+    """
+
+    def __init__(self):
+        self._entries = None
+        self._store = None
+        self.algorithms = set()
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._entries is not None or self._store is not None
+
+    @staticmethod
+    def _insert(entries: dict, path: str, record: dict) -> None:
+        algorithm = record_checksum_algorithm(record)
+        tags = list(record.get("tags") or [])
+        for name in ("original_checksum", "modified_checksum"):
+            checksum = record.get(name)
+            if checksum:
+                entries[algorithm, checksum] = (
+                    path,
+                    tags,
+                    name == "modified_checksum",
+                )
+
+    def build(self, history) -> "ChecksumIndex":
+        """Index all records of `history`."""
+        if isinstance(history, SQLiteHistory):
+            store = SQLiteHistory(history.path, check_same_thread=False)
+            algorithms = {
+                algorithm or DEFAULT_CHECKSUM
+                for algorithm in store.checksum_algorithms()
+            }
+            with self._lock:
+                self._store, self.algorithms = store, algorithms
+            return self
+        entries = {}
+        for path, record in history.items():
+            self._insert(entries, path, record)
+        with self._lock:
+            self._entries = entries
+            self.algorithms = {algorithm for algorithm, _ in entries}
+        return self
+
+    def add(self, filepath, record: dict) -> None:
+        """Index (or re-point) the checksums of `record` at `filepath`."""
+        with self._lock:
+            if self._entries is not None:
+                self._insert(self._entries, str(filepath), record)
+                self.algorithms.add(record_checksum_algorithm(record))
+
+    def lookup(self, checksum: str, algorithm: str = DEFAULT_CHECKSUM):
+        """Return the (path, tags, tagged) last recorded for `checksum`, or None."""
+        with self._lock:
+            if self._store is not None:
+                return self._query(checksum, algorithm)
+            if not self._entries:
+                return None
+            return self._entries.get((algorithm, checksum))
+
+    def _query(self, checksum: str, algorithm: str):
+        found = None
+        for path, record in self._store.find_checksum(checksum):
+            if record_checksum_algorithm(record) == algorithm:
+                tagged = record.get("modified_checksum") == checksum
+                found = (path, list(record.get("tags") or []), tagged)
+        return found
+
+    def find(self, filepath, checksum: str, algorithm: str = DEFAULT_CHECKSUM):
+        """Look up `filepath`, whose `algorithm` checksum is `checksum`.
+
+        When no record matches, the file is hashed with each other algorithm
+        the history still uses (records upgrade lazily, see
+        `record_is_current`), so this costs one extra hash per such
+        algorithm for files that really are new.
+        """
+        found = self.lookup(checksum, algorithm)
+        if found is not None:
+            return found
+        for other in sorted(self.algorithms - {algorithm}):
+            if checksum_available(other):
+                found = self.lookup(file_checksum(filepath, other), other)
+                if found is not None:
+                    return found
+        return None
+
+    def close(self) -> None:
+        """Close the connection opened for an SQLite history."""
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+
+def prune_history(history_path: Path, dry_run: bool = False) -> list:
+    """Remove records of files that no longer exist; return their paths.
+
+    With `dry_run`, the vanished paths are only reported. A journal left by
+    an interrupted run is folded into the saved history and removed.
+    """
     history = load_history(history_path)
-    processed = len(history)
-    topics = set()
-    for v in history.values():
-        for t in v.get("tags", []):
-            topics.add(t)
-    bib_entries = 0
-    if bib_path.exists():
-        with open(bib_path, "r", encoding="utf-8") as f:
-            bib_entries = f.read().count("@")
-    return {"processed": processed, "topics": len(topics), "bib_entries": bib_entries}
+    try:
+        vanished = sorted(path for path in history if not os.path.exists(path))
+        if dry_run:
+            return vanished
+        for path in vanished:
+            del history[path]
+        save_history(history_path, history)
+        journal_path(history_path).unlink(missing_ok=True)
+    finally:
+        if isinstance(history, SQLiteHistory):
+            history.close()
+    return vanished
+
+
+def history_stats(history_path: Path) -> dict:
+    """Return `{"processed": n, "tags": {tag: count}}` for a history.
+
+    SQLite histories keep these counts in the database. For JSON histories
+    the `.stats` sidecar written by `save_history` is used while it matches
+    the history file and no journal holds newer records; otherwise the
+    history is loaded once and the sidecar rewritten.
+    """
+    if is_sqlite_history(history_path):
+        history = load_history(history_path)
+        try:
+            return history.stats()
+        finally:
+            history.close()
+    journal = journal_path(history_path)
+    journaled = journal.exists() and journal.stat().st_size > 0
+    if not journaled:
+        stats = read_stats(history_path)
+        if stats is not None:
+            return stats
+    stats = history_counters(load_history(history_path).values())
+    if not journaled:
+        write_stats(history_path, stats)
+    return stats
+
+
+def library_summary(root: Path, history_path: Path, bib_path: Path) -> dict:
+    """Return a summary of the library from its precomputed counters.
 
+    `tag_counts` maps each tag to the number of files carrying it.
+    """
+    history = history_stats(history_path)
+    return {
+        "processed": history["processed"],
+        "topics": len(history["tags"]),
+        "tag_counts": history["tags"],
+        "bib_entries": bib_stats(bib_path)["entries"],
+    }
@@ -5,12 +5,23 @@ Supports library manifests in TOML (preferred) or JSON for backward
 compatibility, and library vocabularies in YAML (preferred) or JSON.
 
 Default vocabulary is loaded from `borax/core/data/default_vocab.yaml`.
+
+Batch commands accept several libraries at once; `resolve_library_paths`
+expands their arguments (roots, globs and `borax-libraries.toml` lists).
 """
 
+import glob
 import json
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .history_sqlite import SQLITE_SUFFIXES
+from .utils import CHECKSUM_ALGORITHMS, DEFAULT_CHECKSUM, checksum_available
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .vocab_cache import Vocab, VocabPool
 
 # Prefer stdlib tomllib when available (Python >= 3.11), else fallback to tomli
 try:  # pragma: no cover
@@ -18,14 +29,60 @@ try:  # pragma: no cover
 except Exception:  # pragma: no cover
     import tomli as tomllib  # type: ignore
 
-try:  # pragma: no cover
-    import yaml  # type: ignore
-except Exception:  # pragma: no cover
-    yaml = None
-
 MODULE_DIR = Path(__file__).resolve().parent
 # Default vocab resides under core/data; YAML is the canonical format.
 DEFAULT_VOCAB_PATH_YAML = MODULE_DIR / "data" / "default_vocab.yaml"
+# Per-library directory for caches and indexes, relative to the library root
+DEFAULT_STATE_DIR = ".borax"
+DEFAULT_TEXT_CACHE_MAX_MB = 1024
+DEFAULT_ENRICHMENT_TTL_DAYS = 90
+# Library manifests, in order of preference
+MANIFEST_NAMES = ("borax-library.toml", "borax-library.json")
+# Top-level config listing several libraries (`libraries = [...]`)
+LIBRARY_SET_NAME = "borax-libraries.toml"
+
+
+class _Lazy:
+    """Dataclass field default whose value is computed on first access.
+
+    Declared as `field(default=_Lazy(load))`, the field stays an ordinary
+    init argument: a value passed in is stored as is, while leaving it out
+    (the descriptor itself arrives as the default) or passing None defers
+    to `load(instance)` the first time the attribute is read.
+    """
+
+    def __init__(self, load: Callable[["LibraryConfig"], object]):
+        self.load = load
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.attr = f"_{name}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj.__dict__.get(self.attr)
+        if value is None:
+            value = obj.__dict__[self.attr] = self.load(obj)
+        return value
+
+    def __set__(self, obj, value) -> None:
+        obj.__dict__[self.attr] = None if value is self else value
+
+
+def _load_vocab(config: "LibraryConfig") -> "Vocab":
+    return config.vocab_loader()
+
+
+def _vocab_path(config: "LibraryConfig") -> Path:
+    meta = getattr(config.vocab, "meta", None)
+    if meta is None:
+        # A plain dict passed as `vocab=`
+        custom = config.custom_vocab_path.exists()
+    else:
+        custom = meta.get("custom")
+    if custom:
+        return config.custom_vocab_path
+    return DEFAULT_VOCAB_PATH_YAML
 
 
 @dataclass
@@ -36,19 +93,78 @@ class LibraryConfig:
         root: Absolute path to the library root.
         name: Library display name.
         description: Optional description from the manifest.
-        vocab: Merged vocabulary (default + custom).
-        vocab_path: Path to the custom vocab if present, else default vocab path.
-        history_path: Path to the `tag_history.json` file.
+        vocab: Merged vocabulary (default + custom), a `Vocab` cached in
+            the user's cache directory (see `vocab_cache`). Unless passed
+            as `vocab=`, it is loaded through `vocab_loader` on first
+            access, so commands that never use it (`summary`, `history`)
+            skip it entirely.
+        vocab_path: Path to the custom vocab if present, else default vocab
+            path (derived from `vocab` unless passed in).
+        history_path: Path to the history file (`tag_history.json`, or
+            `tag_history.sqlite` with the SQLite backend).
         bib_path: Path to the library BibTeX file.
+        custom_vocab_path: Library vocab file named by the manifest (may not
+            exist).
+        history_backend: "json" (default) or "sqlite".
+        checksum_algorithm: Content hash used for change detection
+            ("sha256" by default; see `CHECKSUM_ALGORITHMS`).
+        state_dir: Directory for Borax caches and indexes (`.borax`).
+        text_cache_path: Directory of the extracted-text cache.
+        text_cache_max_bytes: Size budget of the text cache (0 disables it).
+        enrichment_cache_path: SQLite cache of DOI / ISBN lookups.
+        enrichment_ttl_days: Days a cached lookup stays fresh (0 disables
+            the cache).
+        enrichment_mailto: Contact address sent to CrossRef (polite pool).
+        ignore: Glob patterns of files/directories the walker skips.
+        dir_index_path: Persisted directory listing index of the walker.
+        vocab_loader: Callable returning the merged `Vocab` (may be None
+            when `vocab` is given).
+
+    Only `root`, `name` and `description` are required; the other settings
+    default to those of a manifest that does not set them.
     """
 
     root: Path
     name: str
     description: str
-    vocab: dict
-    vocab_path: Path
-    history_path: Path
-    bib_path: Path
+    vocab: Optional[dict] = field(default=_Lazy(_load_vocab), repr=False, compare=False)
+    vocab_path: Optional[Path] = field(
+        default=_Lazy(_vocab_path), repr=False, compare=False
+    )
+    history_path: Optional[Path] = None
+    bib_path: Optional[Path] = None
+    custom_vocab_path: Optional[Path] = None
+    history_backend: str = "json"
+    checksum_algorithm: str = DEFAULT_CHECKSUM
+    state_dir: Optional[Path] = None
+    text_cache_path: Optional[Path] = None
+    text_cache_max_bytes: int = DEFAULT_TEXT_CACHE_MAX_MB * 1024 * 1024
+    enrichment_cache_path: Optional[Path] = None
+    enrichment_ttl_days: float = DEFAULT_ENRICHMENT_TTL_DAYS
+    enrichment_mailto: str = ""
+    ignore: list = field(default_factory=list)
+    dir_index_path: Optional[Path] = None
+    vocab_loader: Optional[Callable[[], "Vocab"]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        # Paths left out by the caller default to the layout of
+        # `load_library_config`
+        if self.history_path is None:
+            self.history_path = self.root / "tag_history.json"
+        if self.bib_path is None:
+            self.bib_path = self.root / "library.bib"
+        if self.custom_vocab_path is None:
+            self.custom_vocab_path = self.root / "vocab.yaml"
+        if self.state_dir is None:
+            self.state_dir = self.root / DEFAULT_STATE_DIR
+        if self.text_cache_path is None:
+            self.text_cache_path = self.state_dir / "text-cache"
+        if self.enrichment_cache_path is None:
+            self.enrichment_cache_path = self.state_dir / "enrichment.sqlite"
+        if self.dir_index_path is None:
+            self.dir_index_path = self.state_dir / "dir-index.json"
 
 
 def load_json(path: Path) -> dict:
@@ -102,23 +218,111 @@ def load_toml(path: Path) -> dict:
 
 
 def load_yaml(path: Path) -> dict:
-    """Load a YAML file, returning an empty dict if missing or PyYAML absent."""
+    """Load a YAML file, returning an empty dict if missing or PyYAML absent.
+
+    PyYAML is imported on first use; it is only needed when the vocab cache
+    has to be rebuilt.
+    """
     if not path.exists():
         return {}
-    if yaml is None:
+    try:
+        import yaml  # type: ignore
+    except Exception:  # pragma: no cover
         return {}
     with open(path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f)
     return data or {}
 
 
-def load_library_config(library_root: str) -> LibraryConfig:
+def is_library_root(path: Path) -> bool:
+    """Return True if `path` holds a library manifest."""
+    return any((Path(path) / name).is_file() for name in MANIFEST_NAMES)
+
+
+def _missing_manifest(root: Path) -> FileNotFoundError:
+    return FileNotFoundError(
+        f"No borax-library.toml or borax-library.json found in {root}"
+    )
+
+
+def resolve_library_paths(specs) -> list:
+    """Expand library arguments into library roots, in order, deduplicated.
+
+    Each spec is a library root, a glob (matches without a manifest are
+    skipped), or a `borax-libraries.toml` (or a directory holding one and no
+    manifest) whose `libraries` list holds further specs, relative to it.
+    Raises FileNotFoundError for a spec that names no library.
+    """
+    roots = []
+    seen_sets = set()
+
+    def expand(spec: str, base: Path) -> None:
+        path = base / Path(spec).expanduser()
+        if any(c in spec for c in "*?["):
+            found = [
+                Path(match)
+                for match in sorted(glob.glob(str(path)))
+                if is_library_root(Path(match))
+            ]
+            if not found:
+                raise FileNotFoundError(f"No Borax libraries match {spec}")
+            for root in found:
+                add(root)
+            return
+        if path.is_dir() and not is_library_root(path):
+            if not (path / LIBRARY_SET_NAME).is_file():
+                raise _missing_manifest(path.resolve())
+            path = path / LIBRARY_SET_NAME
+        if path.is_file():
+            if path.suffix.lower() != ".toml":
+                raise _missing_manifest(path.resolve())
+            listing = path.resolve()
+            if listing in seen_sets:
+                return
+            seen_sets.add(listing)
+            entries = load_toml(listing).get("libraries", [])
+            if isinstance(entries, str):
+                entries = [entries]
+            for entry in entries:
+                expand(str(entry), listing.parent)
+            return
+        if not path.exists():
+            raise _missing_manifest(path.resolve())
+        add(path)
+
+    def add(root: Path) -> None:
+        root = root.resolve()
+        if root not in roots:
+            roots.append(root)
+
+    for spec in specs:
+        expand(str(spec), Path(os.getcwd()))
+    return roots
+
+
+def load_library_config(
+    library_root: str, vocab_pool: Optional["VocabPool"] = None
+) -> LibraryConfig:
     """Load and resolve a library's configuration and vocabulary.
 
     - Reads `borax-library.toml` (preferred) or legacy JSON manifest.
     - Loads default vocab from `borax/core/data/default_vocab.yaml`.
     - Loads custom vocab from the library if present (YAML or JSON).
-    - Merges vocabularies using `merge_vocab`.
+    - Merges vocabularies using `merge_vocab`, reusing the compiled vocab
+      cache in the user's cache directory (`vocab_cache_path`) while the
+      source files are unchanged.
+      This happens lazily, on first access to `LibraryConfig.vocab`.
+    - Selects the history backend (`history_backend = "sqlite"` switches
+      the history file to `<stem>.sqlite`) and the checksum algorithm
+      (`checksum`; "xxh3" and "blake3" need optional packages).
+    - Resolves the state directory (`state_dir`, default `.borax`) and the
+      text cache budget (`text_cache_max_mb`) and enrichment cache lifetime
+      (`enrichment_ttl_days`), and the CrossRef contact address
+      (`enrichment_mailto`).
+    - Reads the walker's `ignore` globs (a list of strings).
+
+    Configs loaded with the same `vocab_pool` (batch runs) parse the default
+    vocab once and share vocabularies whose sources have the same contents.
     """
     root = Path(library_root).expanduser().resolve()
     manifest_toml = root / "borax-library.toml"
@@ -128,9 +332,7 @@ def load_library_config(library_root: str) -> LibraryConfig:
     elif manifest_json.exists():
         manifest = load_json(manifest_json)
     else:
-        raise FileNotFoundError(
-            f"No borax-library.toml or borax-library.json found in {root}"
-        )
+        raise _missing_manifest(root)
 
     name = manifest.get("name", root.name)
     description = manifest.get("description", "")
@@ -144,27 +346,84 @@ def load_library_config(library_root: str) -> LibraryConfig:
             vocab_rel = "vocab.yml"
         else:
             vocab_rel = "vocab.json"
+    history_backend = str(manifest.get("history_backend", "json")).lower()
+    if history_backend not in {"json", "sqlite"}:
+        raise ValueError(
+            f"Unknown history_backend {history_backend!r} in {root}; "
+            "expected 'json' or 'sqlite'"
+        )
+    checksum_algorithm = str(manifest.get("checksum", DEFAULT_CHECKSUM)).lower()
+    if checksum_algorithm not in CHECKSUM_ALGORITHMS:
+        raise ValueError(
+            f"Unknown checksum {checksum_algorithm!r} in {root}; expected one of "
+            + ", ".join(repr(name) for name in CHECKSUM_ALGORITHMS)
+        )
+    if not checksum_available(checksum_algorithm):
+        raise ValueError(
+            f"checksum {checksum_algorithm!r} in {root} needs the optional "
+            f"{'xxhash' if checksum_algorithm == 'xxh3' else checksum_algorithm} "
+            "package"
+        )
     history_rel = manifest.get("history", "tag_history.json")
+    if (
+        history_backend == "sqlite"
+        and Path(history_rel).suffix.lower() not in SQLITE_SUFFIXES
+    ):
+        # e.g. tag_history.json -> tag_history.sqlite (migrated on first load)
+        history_rel = str(Path(history_rel).with_suffix(".sqlite"))
     bib_rel = manifest.get("bib", "library.bib")
+    state_dir = root / manifest.get("state_dir", DEFAULT_STATE_DIR)
+    text_cache_mb = manifest.get("text_cache_max_mb", DEFAULT_TEXT_CACHE_MAX_MB)
+    ignore = manifest.get("ignore", [])
+    if isinstance(ignore, str):
+        ignore = [ignore]
+    enrichment_ttl_days = manifest.get(
+        "enrichment_ttl_days", DEFAULT_ENRICHMENT_TTL_DAYS
+    )
 
-    # Load default vocab from core/data (YAML)
-    default_vocab = load_yaml(DEFAULT_VOCAB_PATH_YAML)
-
-    # Load custom vocab from library
     custom_vocab_path = root / vocab_rel
-    if custom_vocab_path.suffix.lower() in {".yaml", ".yml"}:
-        custom_vocab = load_yaml(custom_vocab_path)
-    else:
-        custom_vocab = load_json(custom_vocab_path)
-    merged_vocab = merge_vocab(default_vocab, custom_vocab)
+
+    def build_vocab():
+        # Load default vocab from core/data (YAML)
+        if vocab_pool is not None:
+            default_vocab = vocab_pool.load(DEFAULT_VOCAB_PATH_YAML, load_yaml)
+        else:
+            default_vocab = load_yaml(DEFAULT_VOCAB_PATH_YAML)
+
+        # Load custom vocab from library
+        if custom_vocab_path.suffix.lower() in {".yaml", ".yml"}:
+            custom_vocab = load_yaml(custom_vocab_path)
+        else:
+            custom_vocab = load_json(custom_vocab_path)
+        merged = merge_vocab(default_vocab, custom_vocab)
+        return merged, {"custom": bool(custom_vocab)}
+
+    def vocab_loader():
+        from .vocab_cache import cached_vocab, vocab_cache_path
+
+        return cached_vocab(
+            [DEFAULT_VOCAB_PATH_YAML, custom_vocab_path],
+            vocab_cache_path(root),
+            build_vocab,
+            pool=vocab_pool,
+        )
 
     return LibraryConfig(
         root=root,
         name=name,
         description=description,
-        vocab=merged_vocab,
-        vocab_path=custom_vocab_path if custom_vocab else DEFAULT_VOCAB_PATH_YAML,
+        custom_vocab_path=custom_vocab_path,
         history_path=root / history_rel,
         bib_path=root / bib_rel,
+        history_backend=history_backend,
+        checksum_algorithm=checksum_algorithm,
+        state_dir=state_dir,
+        text_cache_path=state_dir / "text-cache",
+        text_cache_max_bytes=int(text_cache_mb * 1024 * 1024),
+        enrichment_cache_path=state_dir / "enrichment.sqlite",
+        enrichment_ttl_days=float(enrichment_ttl_days),
+        enrichment_mailto=str(manifest.get("enrichment_mailto", "")),
+        ignore=[str(pattern) for pattern in ignore],
+        dir_index_path=state_dir / "dir-index.json",
+        vocab_loader=vocab_loader,
     )
-
@@ -0,0 +1,138 @@
+"""Precomputed summary counters for Borax libraries.
+
+`summary` and `history` report how many files were processed, how often each
+tag is used and how many BibTeX entries exist. Instead of re-reading the
+whole history and bib file for that, the writers keep the counters in small
+`<file>.stats` sidecars next to the files they describe: `save_history`
+rewrites the history's counters and `BibIndex.flush` bumps the entry count
+by what it appended. SQLite histories keep their per-tag counts in a table
+of the database itself.
+
+Each sidecar records the size and mtime of the file it was computed from;
+`read_stats` only returns counters whose file still matches, so histories
+or bib files edited outside Borax fall back to a scan, which rewrites the
+sidecar.
+"""
+
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+# Braces and `@type{` / `@type(` entry openers of a BibTeX file
+BIB_TOKEN_RE = re.compile(r"[{}]|@[ \t]*(\w+)[ \t]*([{(])")
+# Entry types that are not bibliography records
+BIB_NON_ENTRY_TYPES = {"comment", "string", "preamble"}
+
+
+def stats_path(path: Path) -> Path:
+    """Return the sidecar holding the counters of `path`."""
+    path = Path(path)
+    return path.with_name(path.name + ".stats")
+
+
+def file_signature(path: Path) -> Optional[dict]:
+    """Return the size and mtime of `path`, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def read_stats(path: Path) -> Optional[dict]:
+    """Return the counters stored for `path`, or None if missing or stale."""
+    source = file_signature(path)
+    if source is None:
+        return None
+    try:
+        with open(stats_path(path), "r", encoding="utf-8") as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(stats, dict) or stats.pop("source", None) != source:
+        return None
+    return stats
+
+
+def write_stats(path: Path, counters: dict) -> None:
+    """Atomically store `counters` for the current contents of `path`."""
+    source = file_signature(path)
+    if source is None:
+        return
+    sidecar = stats_path(path)
+    fd, tmp = tempfile.mkstemp(dir=sidecar.parent, prefix=sidecar.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"source": source, **counters}, f, ensure_ascii=False)
+        os.replace(tmp, sidecar)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def discard_stats(path: Path) -> None:
+    """Remove the counters of `path` so the next reader rescans it."""
+    stats_path(path).unlink(missing_ok=True)
+
+
+def history_counters(records) -> dict:
+    """Count records and per-tag usage over history `records` (the values)."""
+    tags = Counter()
+    processed = 0
+    for record in records:
+        processed += 1
+        tags.update(set(record.get("tags") or ()))
+    return {"processed": processed, "tags": dict(tags)}
+
+
+def count_bib_entries(text: str) -> int:
+    """Count bibliography entries in BibTeX `text`.
+
+    Only `@type{` openers outside of braces count, so an `@` inside a field
+    value (an e-mail address, a title) is not mistaken for an entry;
+    `@comment`, `@string` and `@preamble` are not entries either.
+    """
+    depth = 0
+    entries = 0
+    for m in BIB_TOKEN_RE.finditer(text):
+        token = m.group(0)
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth = max(depth - 1, 0)
+        else:
+            if depth == 0 and m.group(1).lower() not in BIB_NON_ENTRY_TYPES:
+                entries += 1
+            if m.group(2) == "{":
+                depth += 1
+    return entries
+
+
+def bib_stats(bib_path: Path) -> dict:
+    """Return `{"entries": n}` for `bib_path`, rescanning only if stale."""
+    stats = read_stats(bib_path)
+    if stats is not None:
+        return stats
+    if not bib_path.exists():
+        return {"entries": 0}
+    with open(bib_path, "r", encoding="utf-8") as f:
+        stats = {"entries": count_bib_entries(f.read())}
+    write_stats(bib_path, stats)
+    return stats
+
+
+def appended_bib_stats(bib_path: Path, before: Optional[dict], written: int) -> None:
+    """Update the sidecar of `bib_path` after `written` entries were appended.
+
+    `before` is what `read_stats` returned before the append (None when
+    there were no valid counters); without it the sidecar is dropped and
+    the next summary rescans the file once.
+    """
+    if before is None:
+        discard_stats(bib_path)
+    else:
+        write_stats(bib_path, {"entries": before["entries"] + written})
@@ -0,0 +1,61 @@
+"""Worker-pool helpers shared by the Borax per-file pipelines.
+
+`tag` and `process` run their per-file work on a thread pool while a single
+coordinator applies results to the history in walk order; these helpers
+hold that ordering logic.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def ordered_map(fn, items, jobs: int):
+    """Yield `fn(*item)` for each item in input order using `jobs` threads.
+
+    At most a few tasks per worker are in flight, so arbitrarily large walks
+    do not queue every file up front. If the consumer stops early (an error,
+    Ctrl-C, or closing the generator), queued tasks are cancelled and only
+    those already running are waited for, so no work happens whose result
+    would never be recorded. Consumers should close the generator
+    (`contextlib.closing`) so this happens before they clean up.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield fn(*item)
+        return
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, *item))
+            if len(pending) >= jobs * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # `shutdown(cancel_futures=True)` needs Python 3.9
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def shared_map(fn, libraries, jobs: int):
+    """Run the tasks of several libraries through one `ordered_map` pool.
+
+    `libraries` yields (runner, walk) pairs and is consumed lazily, so a
+    library is only set up once its tasks are reached. Yields
+    (runner, None) when a runner's results begin, then (runner, result) for
+    each of its `runner.tasks(walk)`, all in input order. Workers move on to
+    the next library while the coordinator still applies the previous one.
+    """
+
+    def items():
+        for runner, walk in libraries:
+            yield runner, None
+            for task in runner.tasks(walk):
+                yield runner, task
+
+    def call(runner, task):
+        return runner, None if task is None else fn(*task)
+
+    return ordered_map(call, items(), jobs)
@@ -0,0 +1,238 @@
+"""Per-stage timing instrumentation for Borax.
+
+Instrumented code marks its stages with `stage(name)` (a context manager),
+the `profiled(name)` decorator, or wraps a lazy producer with
+`timed_iter(name, iterable)`; `add_bytes(n)` credits bytes read or written
+to the innermost running stage. While no `Profiler` is enabled these return
+immediately (a shared no-op context, a direct call, the unchanged
+iterable), so the instrumentation costs about one global lookup.
+
+When enabled (`borax-cli ... --profile`), each stage accumulates calls,
+bytes, total wall time and self time. Stages nest per thread: time spent in
+an inner stage (e.g. `pdftotext` chunks consumed while keywords are scored)
+is subtracted from the outer stage's self time. With `--jobs N` times are
+summed over worker threads and can exceed the run's wall time.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+_profiler = None
+
+
+class _NullStage:
+    """Stand-in returned by `stage()` while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_bytes(self, n: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """One timed execution of a stage on the current thread."""
+
+    __slots__ = ("bytes", "calls", "child", "name", "profiler", "start")
+
+    def __init__(self, profiler, name: str, calls: int = 1):
+        self.profiler = profiler
+        self.name = name
+        self.calls = calls
+        self.bytes = 0
+        self.child = 0.0
+
+    def __enter__(self):
+        self.profiler._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.profiler._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        self.profiler.record(
+            self.name, elapsed, elapsed - self.child, self.bytes, self.calls
+        )
+        return False
+
+    def add_bytes(self, n: int) -> None:
+        self.bytes += n
+
+
+class Profiler:
+    """Thread-safe per-stage totals for one CLI run."""
+
+    def __init__(self):
+        self.stats = {}
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(
+        self, name: str, seconds: float, self_seconds=None, nbytes: int = 0, calls=1
+    ) -> None:
+        """Add one measurement to stage `name`."""
+        with self._lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = self.stats[name] = {
+                    "calls": 0,
+                    "seconds": 0.0,
+                    "self_seconds": 0.0,
+                    "bytes": 0,
+                }
+            s["calls"] += calls
+            s["seconds"] += seconds
+            s["self_seconds"] += seconds if self_seconds is None else self_seconds
+            s["bytes"] += nbytes
+
+    @property
+    def wall_seconds(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def rows(self) -> list:
+        """Return per-stage dicts sorted by descending self time."""
+        with self._lock:
+            rows = [dict(stage=name, **s) for name, s in self.stats.items()]
+        return sorted(rows, key=lambda r: r["self_seconds"], reverse=True)
+
+    def format_table(self) -> str:
+        """Render the stage totals as a plain-text table."""
+        wall = self.wall_seconds
+        lines = [
+            (
+                f"{'stage':<18} {'calls':>8} {'total s':>9} {'self s':>9} "
+                f"{'self %':>7} {'MB':>9} {'MB/s':>8}"
+            )
+        ]
+        for r in self.rows():
+            mb = r["bytes"] / 1e6
+            rate = mb / r["seconds"] if r["seconds"] and r["bytes"] else 0.0
+            share = 100.0 * r["self_seconds"] / wall if wall else 0.0
+            lines.append(
+                f"{r['stage']:<18} {r['calls']:>8} {r['seconds']:>9.3f} "
+                f"{r['self_seconds']:>9.3f} {share:>6.1f}% {mb:>9.2f} {rate:>8.1f}"
+            )
+        lines.append(f"{'wall':<18} {'':>8} {wall:>9.3f}")
+        return "\n".join(lines)
+
+    def write_ndjson(self, path, command: str = "", argv=None) -> None:
+        """Append one `run` line and one `stage` line per stage to `path`."""
+        run = {
+            "type": "run",
+            "command": command,
+            "argv": list(sys.argv[1:] if argv is None else argv),
+            "started": self.started,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "pid": os.getpid(),
+        }
+        lines = [json.dumps(run)]
+        for r in self.rows():
+            r["seconds"] = round(r["seconds"], 6)
+            r["self_seconds"] = round(r["self_seconds"], 6)
+            lines.append(json.dumps({"type": "stage", "command": command, **r}))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def enable() -> Profiler:
+    """Start collecting stage timings process-wide and return the profiler."""
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable() -> None:
+    global _profiler
+    _profiler = None
+
+
+def active():
+    """Return the enabled `Profiler`, or None."""
+    return _profiler
+
+
+def stage(name: str):
+    """Context manager timing one call of stage `name`.
+
+    The returned object's `add_bytes(n)` adds to the stage's byte count.
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name)
+
+
+def add_bytes(n: int) -> None:
+    """Add `n` bytes to the innermost running stage on this thread."""
+    profiler = _profiler
+    if profiler is None:
+        return
+    stack = profiler._stack()
+    if stack:
+        stack[-1].bytes += n
+
+
+def profiled(name: str):
+    """Decorator timing every call of the function as stage `name`."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with _Stage(profiler, name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def timed_iter(name: str, iterable):
+    """Time each step of a lazy producer as stage `name` (one call in total).
+
+    Each item's `len()` is counted as bytes. The producer's return value is
+    passed through, so the result can still be used with ``yield from``.
+    """
+    profiler = _profiler
+    if profiler is None:
+        return iterable
+    return _timed_iter(profiler, name, iter(iterable))
+
+
+def _timed_iter(profiler, name, it):
+    calls = 1
+    while True:
+        with _Stage(profiler, name, calls=calls) as st:
+            calls = 0
+            try:
+                item = next(it)
+            except StopIteration as stop:
+                return stop.value
+            st.add_bytes(len(item))
+        yield item
@@ -0,0 +1,155 @@
+"""Content-addressed cache of extracted PDF text for Borax.
+
+Entries are gzip-compressed text files named after the PDF's content
+checksum (`<root>/<ab>/<checksum>.txt.gz`), so the cache stays valid until
+the PDF bytes change. Reads refresh an entry's mtime and `prune` evicts the
+least recently used entries until the cache fits its size budget. An entry
+that turns out to be truncated or corrupt (e.g. after a crash or a full
+disk) is removed as soon as reading it fails.
+"""
+
+import gzip
+import os
+import tempfile
+import zlib
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Characters read per chunk when streaming cached text back
+READ_CHUNK_CHARS = 1 << 16
+
+
+class TextCacheError(OSError):
+    """Raised while streaming an unreadable entry; the entry has been removed."""
+
+
+class TextCacheWriter:
+    """Streams one cache entry to a temp file; `commit` publishes it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        self._tmp = Path(tmp)
+        self._files = ExitStack()
+        self._file = self._files.enter_context(self._open(fd))
+
+    @staticmethod
+    def _open(fd: int):
+        return gzip.open(os.fdopen(fd, "wb"), "wt", encoding="utf-8")
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+
+    def commit(self) -> None:
+        """Finish the entry and atomically move it into place."""
+        self._files.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        """Discard the partially written entry."""
+        self._files.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+class TextCache:
+    """On-disk, size-bounded text cache keyed by content checksum."""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.txt.gz"
+
+    def read(self, key: str) -> Optional[Iterator[str]]:
+        """Return an iterator over the cached text chunks, or None on a miss.
+
+        Corruption may only show part-way through an entry, so the iterator
+        raises `TextCacheError` (after removing the entry) if reading fails;
+        callers treat that as a miss for the text not yet received.
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return self._iter_chunks(path)
+
+    @staticmethod
+    def _iter_chunks(path: Path) -> Iterator[str]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                while True:
+                    chunk = f.read(READ_CHUNK_CHARS)
+                    if not chunk:
+                        break
+                    yield chunk
+        except (OSError, EOFError, zlib.error, UnicodeDecodeError) as e:
+            path.unlink(missing_ok=True)
+            raise TextCacheError(f"unreadable text cache entry {path.name}: {e}") from e
+
+    def writer(self, key: str) -> TextCacheWriter:
+        """Return a writer that will store text under `key` on commit."""
+        return TextCacheWriter(self._path(key))
+
+    def alias(self, new_key: str, key: str) -> None:
+        """Make the entry for `key` also available under `new_key`.
+
+        Used after tagging rewrites a PDF's XMP: the text is unchanged, but
+        the file's checksum is not. Hard links are used where possible.
+        """
+        src, dst = self._path(key), self._path(new_key)
+        if new_key == key or not src.exists() or dst.exists():
+            return
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(src, dst)
+        except OSError:
+            tmp = dst.with_suffix(".tmp")
+            tmp.write_bytes(src.read_bytes())
+            os.replace(tmp, dst)
+
+    def _entries(self):
+        """Return [(mtime_ns, size, inode, path)] for all cache entries."""
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob("*/*.txt.gz"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, st.st_ino, path))
+        return entries
+
+    def size(self) -> int:
+        """Return the total size of cached entries in bytes."""
+        return sum({ino: size for _, size, ino, _ in self._entries()}.values())
+
+    def prune(self, max_bytes: Optional[int] = None) -> tuple:
+        """Evict least recently used entries until the cache fits `max_bytes`.
+
+        Returns (entries_removed, bytes_freed). Hard-linked aliases share
+        storage, so their space is freed once the last link is removed.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        links = Counter(ino for _, _, ino, _ in entries)
+        total = sum({ino: size for _, size, ino, _ in entries}.values())
+        removed = freed = 0
+        for _, size, ino, path in entries:
+            if total <= budget:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            removed += 1
+            links[ino] -= 1
+            if links[ino] == 0:
+                total -= size
+                freed += size
+        return removed, freed
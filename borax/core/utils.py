@@ -1,18 +1,294 @@
 #!/usr/bin/env python3
 """Utility helpers for Borax (Book Organizer and Research Article arXiver)."""
 
+import atexit
 import hashlib
+import os
 import subprocess
 import json
+import threading
+from contextlib import contextmanager
 
+from . import profiling
 
-def file_checksum(path):
-    """Compute SHA-256 checksum of a file."""
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+
+# Checksum algorithms selectable with the manifest's `checksum` key.
+# "xxh3" (128-bit) and "blake3" need the optional `xxhash` / `blake3`
+# packages; "sha256" and "blake2b" (32-byte digest) are always available.
+CHECKSUM_ALGORITHMS = ("sha256", "blake2b", "xxh3", "blake3")
+DEFAULT_CHECKSUM = "sha256"
+# Bytes read per call while hashing; large reads keep per-call overhead
+# negligible on big PDFs
+CHECKSUM_READ_SIZE = 1 << 20
+
+
+def checksum_hasher(algorithm: str = DEFAULT_CHECKSUM):
+    """Return a new hash object for `algorithm`.
+
+    Raises ValueError for unknown names and ImportError when the optional
+    package providing the algorithm is not installed.
+    """
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    if algorithm == "xxh3":
+        import xxhash
+
+        return xxhash.xxh3_128()
+    if algorithm == "blake3":
+        import blake3
+
+        return blake3.blake3()
+    raise ValueError(f"Unknown checksum algorithm {algorithm!r}")
+
+
+def checksum_available(algorithm: str) -> bool:
+    """Return True if `algorithm` is known and can be used here."""
+    try:
+        checksum_hasher(algorithm)
+    except (ValueError, ImportError):
+        return False
+    return True
+
+
+def file_checksum(path, algorithm: str = DEFAULT_CHECKSUM):
+    """Compute the `algorithm` (default SHA-256) checksum of a file."""
+    with profiling.stage("hash") as st:
+        h = checksum_hasher(algorithm)
+        buf = bytearray(CHECKSUM_READ_SIZE)
+        view = memoryview(buf)
+        size = 0
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+                size += n
+        st.add_bytes(size)
+        return h.hexdigest()
+
+
+# Bytes sampled at the start, middle and end of a file by `quick_fingerprint`
+QUICK_FINGERPRINT_BLOCK = 64 * 1024
+
+
+def quick_fingerprint(path) -> str:
+    """Return ``"<size>:<digest>"`` of a file's first, middle and last 64 KiB.
+
+    Reads at most 192 KiB whatever the file size (small files are hashed
+    whole), so it is a cheap first test for "has this file changed?". Equal
+    fingerprints do not prove equal content; unequal ones prove a change.
+    """
+    block = QUICK_FINGERPRINT_BLOCK
+    with profiling.stage("fingerprint") as st, open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        h = hashlib.blake2b(digest_size=16)
+        if size <= 3 * block:
+            h.update(f.read())
+        else:
+            for offset in (0, (size - block) // 2, size - block):
+                f.seek(offset)
+                h.update(f.read(block))
+        st.add_bytes(min(size, 3 * block))
+        return f"{size}:{h.hexdigest()}"
+
+
+class ExifToolError(RuntimeError):
+    """Raised when a persistent ExifTool session cannot serve a request."""
+
+
+class ExifToolSession:
+    """A long-lived `exiftool -stay_open True -@ -` process.
+
+    Arguments are written to the process one per line, followed by a numbered
+    `-executeN` marker; the response is everything ExifTool prints to stdout
+    up to the matching `{readyN}` line. A session serves one request at a
+    time.
+    """
+
+    def __init__(self, executable: str = "exiftool"):
+        self.executable = executable
+        self._proc = None
+        self._seq = 0
+
+    def start(self) -> None:
+        """Spawn the ExifTool process; raises ExifToolError on failure."""
+        try:
+            with profiling.stage("exiftool.start"):
+                self._proc = subprocess.Popen(
+                    [self.executable, "-stay_open", "True", "-@", "-"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+        except OSError as e:
+            raise ExifToolError(f"cannot start {self.executable}: {e}") from e
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def execute(self, *args) -> str:
+        """Run one ExifTool command in the session and return its stdout."""
+        if not self.alive:
+            raise ExifToolError("exiftool session is not running")
+        if any("\n" in a for a in args):
+            raise ExifToolError("arguments containing newlines cannot be framed")
+        self._seq += 1
+        ready = f"{{ready{self._seq}}}".encode()
+        payload = "\n".join(args) + f"\n-execute{self._seq}\n"
+        try:
+            self._proc.stdin.write(payload.encode("utf-8"))
+            self._proc.stdin.flush()
+            lines = []
+            while True:
+                line = self._proc.stdout.readline()
+                if not line:
+                    raise ExifToolError("exiftool session exited unexpectedly")
+                if line.rstrip(b"\r\n") == ready:
+                    break
+                lines.append(line)
+        except OSError as e:
+            raise ExifToolError(f"exiftool session I/O failed: {e}") from e
+        return b"".join(lines).decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        """Ask ExifTool to exit and reap the process."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
+                proc.stdin.write(b"-stay_open\nFalse\n")
+                proc.stdin.flush()
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+        finally:
+            if proc.stdout:
+                proc.stdout.close()
+
+
+class _SessionPool:
+    """Idle ExifTool sessions shared by all callers in this process.
+
+    Each concurrent caller borrows its own session, so the number of ExifTool
+    processes never exceeds the peak number of simultaneous requests. If a
+    session cannot be started, or sessions keep failing, the pool disables
+    itself and callers fall back to one-shot `exiftool` invocations.
+    """
+
+    MAX_FAILURES = 3
+
+    def __init__(self):
+        self._idle = []
+        self._lock = threading.Lock()
+        self._failures = 0
+        self.disabled = os.environ.get("BORAX_EXIFTOOL_STAY_OPEN", "1") == "0"
+
+    def acquire(self):
+        with self._lock:
+            if self.disabled:
+                return None
+            while self._idle:
+                session = self._idle.pop()
+                if session.alive:
+                    return session
+        session = ExifToolSession()
+        try:
+            session.start()
+        except ExifToolError:
+            self.disabled = True
+            return None
+        return session
+
+    def report_failure(self, session) -> None:
+        """Discard a failed session; disable the pool after repeated failures."""
+        session.close()
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.MAX_FAILURES:
+                self.disabled = True
+
+    def release(self, session) -> None:
+        if not session.alive:
+            session.close()
+            return
+        with self._lock:
+            self._idle.append(session)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+
+_SESSIONS = _SessionPool()
+atexit.register(_SESSIONS.close_all)
+
+
+@contextmanager
+def exiftool_session():
+    """Borrow a persistent ExifTool session, or None if unavailable."""
+    session = _SESSIONS.acquire()
+    try:
+        yield session
+    finally:
+        if session is not None:
+            _SESSIONS.release(session)
+
+
+def close_exiftool_sessions() -> None:
+    """Terminate all idle persistent ExifTool sessions."""
+    _SESSIONS.close_all()
+
+
+def _session_can_frame(args) -> bool:
+    """Return True if `args` can be sent to a `-stay_open` session.
+
+    Session arguments are written one per line as UTF-8, so arguments with
+    a newline, or with characters UTF-8 cannot encode (file names with
+    undecodable bytes), need a one-shot `exiftool` process instead.
+    """
+    for arg in args:
+        if "\n" in arg:
+            return False
+        try:
+            arg.encode("utf-8")
+        except UnicodeEncodeError:
+            return False
+    return True
+
+
+def run_exiftool(*args, check: bool = True):
+    """Run ExifTool with `args` and return its stdout, or None on failure.
+
+    Uses a persistent session when possible and falls back to a one-shot
+    `exiftool` process if the session is unavailable or fails mid-request.
+    Arguments a session cannot carry go straight to the one-shot process
+    without counting against the session pool.
+    With `check=False` the one-shot output is returned even when ExifTool
+    exits non-zero (e.g. one file of a batch could not be read).
+    """
+    if _session_can_frame(args):
+        with exiftool_session() as session:
+            if session is not None:
+                try:
+                    return session.execute(*args)
+                except (ExifToolError, UnicodeEncodeError):
+                    _SESSIONS.report_failure(session)
+    try:
+        res = subprocess.run(["exiftool", *args], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if check and res.returncode != 0:
+        return None
+    return res.stdout
 
 
 def exiftool_read_json(path, *fields):
@@ -20,20 +296,44 @@ def exiftool_read_json(path, *fields):
 
     Returns an empty dict if exiftool is not available or on any error.
     """
-    cmd = ["exiftool", "-json"] + list(fields) + [path]
-    try:
-        res = subprocess.run(cmd, capture_output=True, text=True)
-    except FileNotFoundError:
-        return {}
-    if res.returncode != 0:
+    with profiling.stage("exiftool.read"):
+        out = run_exiftool("-json", *fields, str(path))
+    if not out:
         return {}
     try:
-        data = json.loads(res.stdout)
+        data = json.loads(out)
         return data[0] if data else {}
     except Exception:
         return {}
 
 
+def exiftool_read_json_many(paths, *fields):
+    """Read the requested fields for many files with a single ExifTool call.
+
+    Returns a dict mapping each input path (as a string) to its metadata,
+    matched back via ExifTool's `SourceFile`. Files ExifTool could not read
+    map to an empty dict; if the batch output is unusable as a whole, each
+    file is read individually so one bad file cannot hide the others.
+    """
+    paths = [str(p) for p in paths]
+    if not paths:
+        return {}
+    results = {p: {} for p in paths}
+    by_norm = {os.path.normpath(p): p for p in paths}
+    with profiling.stage("exiftool.read"):
+        out = run_exiftool("-json", *fields, *paths, check=False)
+    try:
+        data = json.loads(out) if out else []
+        for rec in data:
+            src = by_norm.get(os.path.normpath(rec.get("SourceFile", "")))
+            if src is not None:
+                results[src] = rec
+    except (ValueError, TypeError, AttributeError):
+        for p in paths:
+            results[p] = exiftool_read_json(p, *fields)
+    return results
+
+
 def exiftool_write_keywords(path, keywords, preserve_time=True):
     """Write keywords to XMP using `XMP-pdf:Keywords`.
 
@@ -52,18 +352,18 @@ def exiftool_write_keywords(path, keywords, preserve_time=True):
         seen.add(k)
         items.append(k)
 
-    cmd = ["exiftool"]
+    args = []
 
     # Build a single XMP-pdf:Keywords assignment using semicolon delimiter
     if items:
         joined = "; ".join(items)
-        cmd.append(f"-XMP-pdf:Keywords={joined}")
+        args.append(f"-XMP-pdf:Keywords={joined}")
     else:
         # Clear field explicitly
-        cmd.append("-XMP-pdf:Keywords=")
+        args.append("-XMP-pdf:Keywords=")
 
     if preserve_time:
-        cmd.append("-preserve")
-    cmd += ["-overwrite_original", path]
-    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
+        args.append("-preserve")
+    args += ["-overwrite_original", str(path)]
+    with profiling.stage("exiftool.write"):
+        run_exiftool(*args)
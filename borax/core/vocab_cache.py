@@ -0,0 +1,266 @@
+"""Compiled vocabulary cache for Borax.
+
+Parsing large YAML vocabularies and merging them dominates CLI startup, so
+the merged vocabulary is pickled together with derived artifacts (the
+flattened term sets and compiled matchers built by `borax.tagging`). The
+cache is keyed by the path, `st_mtime_ns`, size and SHA-256 of every source
+file and is rebuilt automatically when any of them changes or a source
+appears/disappears.
+
+Unpickling runs code, so the cache never lives in the library tree, which
+may be shared or synced: it is kept per user under
+`$XDG_CACHE_HOME/borax/<hash of the library path>/vocab.pickle` and is only
+loaded from a directory owned by the current user that nobody else can
+write to.
+
+Artifacts are stored as separate pickles and only unpickled on first use,
+so commands that need the plain vocabulary do not import the modules that
+define the compiled structures.
+
+Batch runs over several libraries pass a `VocabPool`: the default vocab is
+parsed once, and libraries whose vocab sources have the same contents
+share one merged vocab and its compiled artifacts.
+"""
+
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+VOCAB_CACHE_VERSION = 1
+# What loading a stale, truncated or foreign pickle can raise
+UNPICKLE_ERRORS = (
+    OSError,
+    EOFError,
+    pickle.UnpicklingError,
+    AttributeError,
+    ImportError,
+    IndexError,
+    KeyError,
+    TypeError,
+    ValueError,
+)
+
+
+def user_cache_dir() -> Path:
+    """Return the per-user Borax cache directory."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base and os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA")
+    return (Path(base) if base else Path.home() / ".cache") / "borax"
+
+
+def vocab_cache_path(library_root: Path) -> Path:
+    """Return the user-private vocab cache file for `library_root`."""
+    root = str(Path(library_root).resolve())
+    digest = hashlib.sha256(root.encode("utf-8")).hexdigest()[:16]
+    return user_cache_dir() / digest / "vocab.pickle"
+
+
+def _is_private(st) -> bool:
+    """True if `st` belongs to the current user and only they can write it."""
+    if not hasattr(os, "getuid"):
+        # No POSIX ownership; the per-user profile directory is private
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _private_dir(path: Path) -> bool:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and _is_private(st)
+
+
+def _load_private(cache_path: Path):
+    """Unpickle `cache_path` only if it and its directory are user-private."""
+    if not _private_dir(cache_path.parent):
+        return None
+    with open(cache_path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or not _is_private(st):
+            return None
+        return pickle.load(f)
+
+
+def source_key(paths) -> list:
+    """Return [(path, mtime_ns, size, sha256)] for the vocab source files.
+
+    Missing files are recorded with None values so that creating them later
+    invalidates the cache.
+    """
+    key = []
+    for path in paths:
+        path = Path(path)
+        try:
+            st = path.stat()
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            key.append((str(path), st.st_mtime_ns, st.st_size, digest))
+        except OSError:
+            key.append((str(path), None, None, None))
+    return key
+
+
+def content_key(key) -> tuple:
+    """Return the part of a `source_key` that depends only on file contents."""
+    return tuple((size, digest) for _path, _mtime, size, digest in key)
+
+
+class Vocab(dict):
+    """Merged vocabulary with compiled artifacts cached alongside it.
+
+    Behaves as the plain merged vocab dict. `meta` holds facts recorded
+    while building it (e.g. whether a custom vocab contributed). Artifacts
+    are derived from the vocab contents, so a `Vocab` must not be mutated
+    after artifacts were stored.
+    """
+
+    def __init__(self, data=(), meta=None, cache_path=None, key=None, artifacts=None):
+        super().__init__(data)
+        self.meta = dict(meta or {})
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.key = key
+        self._blobs = dict(artifacts or {})
+        self._artifacts = {}
+
+    def artifact(self, name: str):
+        """Return a stored artifact, or None if absent or unreadable."""
+        if name in self._artifacts:
+            return self._artifacts[name]
+        blob = self._blobs.get(name)
+        if blob is None:
+            return None
+        try:
+            obj = pickle.loads(blob)
+        except UNPICKLE_ERRORS:
+            # e.g. written by an incompatible version of the defining module
+            del self._blobs[name]
+            return None
+        self._artifacts[name] = obj
+        return obj
+
+    def set_artifact(self, name: str, obj) -> None:
+        """Store an artifact in memory and in the on-disk cache."""
+        self._artifacts[name] = obj
+        try:
+            self._blobs[name] = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return
+        self.save()
+
+    def sibling(self, cache_path, key) -> "Vocab":
+        """Return a copy for another library with the same vocab contents.
+
+        The copy shares this vocab's artifacts (compiled ones included) but
+        is saved to its own `cache_path`.
+        """
+        other = Vocab(self, meta=self.meta, cache_path=cache_path, key=key)
+        other._blobs = self._blobs
+        other._artifacts = self._artifacts
+        return other
+
+    def save(self) -> None:
+        """Write the cache atomically; failures (read-only dirs) are ignored."""
+        if self.cache_path is None:
+            return
+        payload = {
+            "version": VOCAB_CACHE_VERSION,
+            "key": self.key,
+            "vocab": dict(self),
+            "meta": self.meta,
+            "artifacts": self._blobs,
+        }
+        try:
+            self.cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if not _private_dir(self.cache_path.parent):
+                return
+            fd, tmp = tempfile.mkstemp(
+                dir=self.cache_path.parent,
+                prefix=self.cache_path.name,
+                suffix=".tmp",
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.cache_path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            pass
+
+
+class VocabPool:
+    """Parsed and merged vocabularies shared by the libraries of one run."""
+
+    def __init__(self):
+        self.vocabs = {}  # content_key -> Vocab
+        self.sources = {}  # (path, mtime_ns, size) -> parsed file
+
+    def load(self, path: Path, loader):
+        """Return `loader(path)`, parsed once while the file is unchanged."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return loader(path)
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        if key not in self.sources:
+            self.sources[key] = loader(path)
+        return self.sources[key]
+
+
+def _cache_is_newer(cache_path, key) -> bool:
+    """True if `cache_path` was written after every source last changed."""
+    try:
+        written = os.stat(cache_path).st_mtime_ns
+    except (OSError, TypeError):
+        return False
+    return all(mtime is None or mtime <= written for _, mtime, _, _ in key)
+
+
+def cached_vocab(sources, cache_path, build, pool: Optional[VocabPool] = None) -> Vocab:
+    """Return the vocab for `sources`, from `cache_path` when still valid.
+
+    `build()` parses and merges the sources and returns (vocab, meta); it is
+    only called on a cache miss, after which the cache is rewritten.
+
+    With a `pool`, a vocab already loaded for sources with the same contents
+    is reused without reading `cache_path`; the cache file is only rewritten
+    if it is older than one of the sources.
+    """
+    key = source_key(sources)
+    shared = pool.vocabs.get(content_key(key)) if pool is not None else None
+    if shared is not None:
+        result = shared.sibling(cache_path, key)
+        if cache_path is not None and not _cache_is_newer(cache_path, key):
+            result.save()
+        return result
+    result = None
+    if cache_path is not None:
+        try:
+            data = _load_private(Path(cache_path))
+            if (
+                data
+                and data.get("version") == VOCAB_CACHE_VERSION
+                and data.get("key") == key
+            ):
+                result = Vocab(
+                    data["vocab"],
+                    meta=data.get("meta"),
+                    cache_path=cache_path,
+                    key=key,
+                    artifacts=data.get("artifacts"),
+                )
+        except UNPICKLE_ERRORS:
+            result = None
+    if result is None:
+        vocab, meta = build()
+        result = Vocab(vocab, meta=meta, cache_path=cache_path, key=key)
+        result.save()
+    if pool is not None:
+        pool.vocabs[content_key(key)] = result
+    return result
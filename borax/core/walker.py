@@ -0,0 +1,167 @@
+"""Library walker shared by scan, tag, process and BibTeX export.
+
+`walk_pdfs` is an `os.scandir`-based replacement for `os.walk` that yields
+`(dirpath, pdf_names)` lazily, top-down and in sorted order. Directories
+and files matching the manifest's `ignore` globs are skipped, as is the
+library state directory.
+
+With an index path, the names found in each directory are persisted
+together with the directory's `st_mtime_ns`. A directory's mtime changes
+whenever an entry is added, removed or renamed in it, so on later walks a
+directory whose mtime still matches is answered from the index with a
+single `stat` instead of being listed. Changes to the files themselves
+(content rewrites) do not affect the listing and are left to the history's
+stat checks.
+"""
+
+import json
+import os
+import tempfile
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Optional
+
+INDEX_VERSION = 1
+# A listing taken within this window of the directory's mtime is not
+# trusted: another entry could be added in the same timestamp tick
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class DirectoryIndex:
+    """Persisted directory listings keyed by path relative to the root."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.dirs = {}
+        self.visited = set()
+        self.changed = False
+        if self.path and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == INDEX_VERSION:
+                self.dirs = data.get("dirs", {})
+
+    def lookup(self, rel: str, mtime_ns: int):
+        """Return (subdirs, pdfs) cached for `rel` if still valid, else None."""
+        self.visited.add(rel)
+        entry = self.dirs.get(rel)
+        if not entry or entry.get("mtime_ns") != mtime_ns:
+            return None
+        if entry.get("checked_ns", 0) - mtime_ns < RACY_WINDOW_NS:
+            return None
+        return entry["dirs"], entry["pdfs"]
+
+    def store(self, rel: str, mtime_ns: int, subdirs, pdfs) -> None:
+        self.dirs[rel] = {
+            "mtime_ns": mtime_ns,
+            "checked_ns": time.time_ns(),
+            "dirs": subdirs,
+            "pdfs": pdfs,
+        }
+        self.changed = True
+
+    def save(self, complete: bool) -> None:
+        """Write the index atomically; drop vanished dirs after a full walk."""
+        if self.path is None:
+            return
+        if complete:
+            stale = set(self.dirs) - self.visited
+            for rel in stale:
+                del self.dirs[rel]
+            self.changed = self.changed or bool(stale)
+        if not self.changed:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(
+            dir=self.path.parent, prefix=self.path.name, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "dirs": self.dirs}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.changed = False
+
+
+def _list_dir(dirpath: str):
+    """Return (subdirs, pdfs) of one directory, sorted, via `os.scandir`."""
+    subdirs, pdfs = [], []
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    # Like os.walk(followlinks=False): don't descend into links
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                elif entry.name.lower().endswith(".pdf"):
+                    pdfs.append(entry.name)
+            except OSError:
+                continue
+    return sorted(subdirs), sorted(pdfs)
+
+
+def _ignored(rel: str, name: str, ignore) -> bool:
+    return any(fnmatch(rel, pat) or fnmatch(name, pat) for pat in ignore)
+
+
+def walk_pdfs(
+    root: Path, ignore=(), index_path: Optional[Path] = None, state_dir=".borax"
+):
+    """Yield (dirpath, pdf_names) for every directory under `root`.
+
+    `ignore` globs are matched against each entry's path relative to `root`
+    (POSIX separators) and against its bare name; ignored directories are
+    not descended into. `state_dir` (a name or path relative to `root`) is
+    always skipped. With `index_path`, unchanged directories are answered
+    from the persisted `DirectoryIndex`, which is saved when the walk ends.
+    """
+    root = Path(root)
+    ignore = list(ignore or ())
+    skip = Path(state_dir).as_posix() if state_dir else None
+    index = DirectoryIndex(index_path)
+    complete = False
+    stack = [""]
+    try:
+        while stack:
+            rel = stack.pop()
+            dirpath = root / rel if rel else root
+            try:
+                mtime_ns = os.stat(dirpath).st_mtime_ns
+                listing = index.lookup(rel, mtime_ns)
+                if listing is None:
+                    listing = _list_dir(dirpath)
+                    index.store(rel, mtime_ns, *listing)
+            except OSError:
+                continue
+            subdirs, pdfs = listing
+            pdfs = [
+                name
+                for name in pdfs
+                if not _ignored(f"{rel}/{name}" if rel else name, name, ignore)
+            ]
+            yield dirpath, pdfs
+            children = []
+            for name in subdirs:
+                child = f"{rel}/{name}" if rel else name
+                if child == skip or _ignored(child, name, ignore):
+                    continue
+                children.append(child)
+            stack.extend(reversed(children))
+        complete = True
+    finally:
+        index.save(complete)
+
+
+def library_walk(config):
+    """Return the `walk_pdfs` generator configured for a `LibraryConfig`."""
+    return walk_pdfs(
+        config.root,
+        ignore=config.ignore,
+        index_path=config.dir_index_path,
+        state_dir=os.path.relpath(config.state_dir, config.root),
+    )
@@ -0,0 +1,491 @@
+"""One-pass library processing for Borax (tagging + BibTeX).
+
+`process_library` walks the library once and, per PDF, hashes it once,
+extracts its text once, and reads the keyword and bibliographic ExifTool
+fields in a single call. The same results feed the tag write, DOI/ISBN
+detection in the text, enrichment and the BibTeX entry, instead of `tag`
+and `bibtex` each repeating that work.
+"""
+
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from borax.bibtex_exporter import (
+    EXIF_FIELDS,
+    BibIndex,
+    enrich_metadata,
+    identifiers_from_text,
+    make_bibtex_entry,
+)
+from borax.core.history_tracker import (
+    ChecksumIndex,
+    HistoryJournal,
+    load_history,
+    move_record,
+    record_is_current,
+    record_original,
+    update_modified_checksum,
+)
+from borax.core.pipeline import ordered_map, shared_map
+from borax.core.text_cache import TextCache
+from borax.core.utils import DEFAULT_CHECKSUM, exiftool_read_json, file_checksum
+from borax.core.walker import walk_pdfs
+from borax.tagging import (
+    cached_pdf_text,
+    find_moved,
+    folder_tags,
+    get_macos_tags,
+    load_vocab_flat,
+    score_keywords_in_chunks,
+    tag_with_exiftool,
+    validate_finder_tags,
+    vocab_folder_matcher,
+)
+from borax.tagging.folder_matcher import FolderMatcher
+
+# Keyword field read alongside EXIF_FIELDS for append-mode tagging
+KEYWORD_FIELD = "-XMP-pdf:Keywords"
+# Leading characters of the text searched for a DOI / ISBN
+IDENTIFIER_CHARS = 20000
+# Number of new BibTeX entries buffered before they are appended
+BIB_FLUSH_EVERY = 500
+
+
+@dataclass
+class _ProcessRun:
+    """Read-only settings shared by all workers of one processing run."""
+
+    doc_types: set
+    levels: set
+    keywords: set
+    override: bool = False
+    dry_run: bool = False
+    tag_mode: str = "append"
+    verify: bool = False
+    enrich: bool = True
+    text_cache: Optional[TextCache] = None
+    enrichment_cache: object = None
+    refresh: bool = False
+    client: object = None
+    checksum_algorithm: str = DEFAULT_CHECKSUM
+    root: Optional[Path] = None
+    folder_matcher: Optional[FolderMatcher] = None
+    checksums: Optional[ChecksumIndex] = None
+    bib_index: Optional[BibIndex] = None
+
+
+@dataclass
+class _ProcessResult:
+    """Outcome of the per-file pipeline, applied by the coordinator."""
+
+    filepath: Path
+    discipline_tags: list
+    tag_skipped: bool = False
+    record: Optional[dict] = None
+    record_refreshed: bool = False
+    original_checksum: str = ""
+    modified_checksum: str = ""
+    moved_from: str = ""
+    tags: list = field(default_factory=list)
+    bib_entry: str = ""
+    messages: list = field(default_factory=list)
+
+
+def _head_collector(chunks, limit: int, head: list):
+    """Pass `chunks` through, keeping their first `limit` characters in `head`."""
+    size = 0
+    for chunk in chunks:
+        if size < limit:
+            head.append(chunk[: limit - size])
+            size += len(head[-1])
+        yield chunk
+
+
+def _process_file(
+    run: _ProcessRun, filepath: Path, discipline_tags, record, needs_bib: bool
+) -> _ProcessResult:
+    """Tag one PDF and build its BibTeX entry from shared intermediate results.
+
+    `record` is a private copy of the file's history entry (or None);
+    `needs_bib` is False when the bib already lists the file. Nothing shared
+    is modified here.
+    """
+    result = _ProcessResult(filepath=filepath, discipline_tags=discipline_tags)
+    checked = record.get("stat_checked_ns") if record else None
+    if not run.override and record_is_current(
+        filepath, record, verify=run.verify, algorithm=run.checksum_algorithm
+    ):
+        result.tag_skipped = True
+        result.record = record
+        result.record_refreshed = record.get("stat_checked_ns") != checked
+        if not needs_bib:
+            return result
+
+    if result.tag_skipped:
+        checksum = record.get("modified_checksum") or record.get("original_checksum")
+    else:
+        checksum = file_checksum(filepath, run.checksum_algorithm)
+        result.original_checksum = checksum
+        if find_moved(run, result, record):
+            # A bib entry listing the old path still describes the file
+            needs_bib = needs_bib and not run.bib_index.has_file(result.moved_from)
+            if not needs_bib:
+                return result
+    meta = exiftool_read_json(str(filepath), *EXIF_FIELDS, KEYWORD_FIELD) or {}
+
+    head = []
+    if not result.tag_skipped and not result.moved_from:
+        finder_tags = get_macos_tags(filepath)
+        doc_tags, level_tags = validate_finder_tags(
+            finder_tags, run.doc_types, run.levels, log=result.messages.append
+        )
+        text = cached_pdf_text(filepath, checksum, run.text_cache)
+        keyword_scores = score_keywords_in_chunks(
+            _head_collector(text, IDENTIFIER_CHARS, head), run.keywords
+        )
+        keyword_tags = [kw for kw, sc in keyword_scores]
+        all_tags = list(
+            dict.fromkeys(discipline_tags + doc_tags + level_tags + keyword_tags)
+        )
+        final_tags = tag_with_exiftool(
+            filepath,
+            all_tags,
+            dry_run=run.dry_run,
+            mode=run.tag_mode,
+            log=result.messages.append,
+            meta=meta,
+        )
+        result.tags = (
+            final_tags if isinstance(final_tags, list) and final_tags else all_tags
+        )
+        if run.dry_run:
+            result.modified_checksum = checksum
+        else:
+            result.modified_checksum = file_checksum(filepath, run.checksum_algorithm)
+            if run.text_cache is not None:
+                run.text_cache.alias(result.modified_checksum, checksum)
+
+    if needs_bib:
+        if not head:
+            # Tagging was skipped: only the identifier area is needed
+            text = cached_pdf_text(filepath, checksum, run.text_cache)
+            for _ in _head_collector(text, IDENTIFIER_CHARS, head):
+                if sum(len(h) for h in head) >= IDENTIFIER_CHARS:
+                    break
+        for key, value in identifiers_from_text("".join(head)).items():
+            meta.setdefault(key, value)
+        if run.enrich and not run.dry_run:
+            meta = enrich_metadata(
+                meta, cache=run.enrichment_cache, refresh=run.refresh, client=run.client
+            )
+        _, result.bib_entry = make_bibtex_entry(filepath, meta)
+    return result
+
+
+class LibraryProcessor:
+    """Tagging and BibTeX state kept in memory across processing passes.
+
+    Holds the flattened vocab, folder matcher, history (with its journal)
+    and `BibIndex`, so repeated `run` calls (e.g. from `watch`) only pay for
+    the files they are given. Call `close` to checkpoint the history.
+    `process_libraries` drives several processors through `tasks` and
+    `apply` instead of `run`.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        history_path: Path,
+        bib_path: Path,
+        vocab: dict,
+        override: bool = False,
+        dry_run: bool = False,
+        tag_mode: str = "append",
+        verify: bool = False,
+        jobs: int = 1,
+        text_cache: Optional[TextCache] = None,
+        enrich: bool = True,
+        enrichment_cache=None,
+        refresh: bool = False,
+        client=None,
+        checksum_algorithm: str = DEFAULT_CHECKSUM,
+        name: Optional[str] = None,
+    ):
+        self.root = Path(root)
+        self.name = name or self.root.name
+        self.bib_path = bib_path
+        self.text_cache = text_cache
+        self.dry_run = dry_run
+        self.jobs = jobs
+        discipline_terms, doc_types, levels, keywords = load_vocab_flat(vocab)
+        self.folder_matcher = vocab_folder_matcher(vocab, discipline_terms)
+        self.history = load_history(history_path)
+        self.index = BibIndex.load(bib_path)
+        self.settings = _ProcessRun(
+            doc_types=doc_types,
+            levels=levels,
+            keywords=keywords,
+            override=override,
+            dry_run=dry_run,
+            tag_mode=tag_mode,
+            verify=verify,
+            enrich=enrich,
+            text_cache=text_cache,
+            enrichment_cache=enrichment_cache,
+            refresh=refresh,
+            client=client,
+            checksum_algorithm=checksum_algorithm,
+            root=self.root,
+            folder_matcher=self.folder_matcher,
+            checksums=ChecksumIndex(),
+            bib_index=self.index,
+        )
+        self.journal = None if dry_run else HistoryJournal(history_path, self.history)
+
+    def tasks(self, walk):
+        """Yield the `_process_file` work items for `walk`."""
+        root, history, index = self.root, self.history, self.index
+        checksums = self.settings.checksums
+        for dirpath, files in walk if walk is not None else walk_pdfs(root):
+            discipline_tags = folder_tags(root, dirpath, self.folder_matcher)
+            for fname in files:
+                filepath = Path(dirpath) / fname
+                record = history.get(str(filepath))
+                if (
+                    record is None
+                    and not self.settings.override
+                    and not checksums.built
+                ):
+                    # First unknown path: index checksums to spot moved files
+                    checksums.build(history)
+                yield (
+                    self.settings,
+                    filepath,
+                    discipline_tags,
+                    dict(record) if record else None,
+                    not index.has_file(filepath),
+                )
+
+    def apply(self, result: _ProcessResult, stats: dict) -> None:
+        """Record one finished result, print it and count it in `stats`.
+
+        Dry runs leave the history and the bib file untouched.
+        """
+        index = self.index
+        filepath = result.filepath
+        if result.tag_skipped:
+            stats["skipped"] += 1
+        elif result.moved_from:
+            stats["moved"] += 1
+        else:
+            stats["tagged"] += 1
+        if not self.dry_run:
+            self._record(result)
+        for message in result.messages:
+            print(message)
+        if result.tag_skipped and not result.bib_entry:
+            print(f"⏭️ Skipping already-processed file: {filepath.name}")
+            return
+        if result.moved_from:
+            print(f"🔀 {filepath.name} (moved from {result.moved_from})")
+        else:
+            print(f"📄 {filepath.name}")
+        if not result.tag_skipped:
+            print(f"   → {', '.join(result.tags)}")
+        if result.bib_entry:
+            key = None if self.dry_run else index.add(result.bib_entry)
+            if key:
+                stats["bib_added"] += 1
+                print(f"   📚 {key}")
+                if len(index.pending) >= BIB_FLUSH_EVERY:
+                    index.flush(self.bib_path)
+            elif self.dry_run:
+                print("   📚 (dry run) would add BibTeX entry")
+
+    def _record(self, result: _ProcessResult) -> None:
+        history, journal = self.history, self.journal
+        checksums = self.settings.checksums
+        algorithm = self.settings.checksum_algorithm
+        filepath = result.filepath
+        if result.tag_skipped:
+            if result.record_refreshed:
+                history[str(filepath)] = result.record
+                if journal is not None:
+                    journal.record(filepath)
+        elif result.moved_from:
+            move_record(
+                result.moved_from,
+                filepath,
+                history,
+                tags=result.tags,
+                checksum=result.modified_checksum,
+                algorithm=algorithm,
+            )
+            if journal is not None:
+                journal.record(result.moved_from)
+                journal.record(filepath)
+            checksums.add(filepath, history[str(filepath)])
+        else:
+            record_original(
+                filepath,
+                history,
+                tags=result.discipline_tags,
+                checksum=result.original_checksum,
+                algorithm=algorithm,
+            )
+            update_modified_checksum(
+                filepath,
+                history,
+                tags=result.tags,
+                checksum=result.modified_checksum,
+                algorithm=algorithm,
+            )
+            if journal is not None:
+                journal.record(filepath)
+            if checksums.built:
+                checksums.add(filepath, history[str(filepath)])
+
+    def run(self, walk) -> dict:
+        """Process the PDFs of `walk`, an iterable of (dirpath, pdf names).
+
+        Returns counts of "tagged", "moved", "skipped" and "bib_added" files.
+        New bib entries are written before returning, also on errors.
+        """
+        stats = {"tagged": 0, "moved": 0, "skipped": 0, "bib_added": 0}
+        try:
+            results = ordered_map(_process_file, self.tasks(walk), self.jobs)
+            with closing(results):
+                for result in results:
+                    self.apply(result, stats)
+        finally:
+            self.flush()
+        return stats
+
+    def flush(self) -> None:
+        """Append the queued BibTeX entries (nothing in a dry run)."""
+        if not self.dry_run:
+            self.index.flush(self.bib_path)
+
+    def close(self) -> None:
+        """Checkpoint the history and remove its journal."""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.settings.checksums.close()
+
+
+def process_library(
+    root: Path,
+    history_path: Path,
+    bib_path: Path,
+    vocab: dict,
+    override: bool = False,
+    dry_run: bool = False,
+    tag_mode: str = "append",
+    verify: bool = False,
+    jobs: int = 1,
+    text_cache: Optional[TextCache] = None,
+    enrich: bool = True,
+    enrichment_cache=None,
+    refresh: bool = False,
+    client=None,
+    walk=None,
+    checksum_algorithm: str = DEFAULT_CHECKSUM,
+) -> dict:
+    """Tag every PDF and add missing BibTeX entries in a single pass.
+
+    Per-file work runs on `jobs` threads (see `_process_file`); a
+    `LibraryProcessor` alone applies results to the history (journaled as
+    in `tag_library`) and the `BibIndex`, printing them in walk order.
+    Files whose history is current and that the bib already lists are
+    skipped without being read. With `dry_run`, nothing is written.
+    `walk` is the (dirpath, pdf names) iterable to use, by default
+    `walk_pdfs(root)`. Files are hashed with `checksum_algorithm`.
+
+    Returns counts of "tagged", "moved", "skipped" and "bib_added" files.
+    """
+    processor = LibraryProcessor(
+        root,
+        history_path,
+        bib_path,
+        vocab,
+        override=override,
+        dry_run=dry_run,
+        tag_mode=tag_mode,
+        verify=verify,
+        jobs=jobs,
+        text_cache=text_cache,
+        enrich=enrich,
+        enrichment_cache=enrichment_cache,
+        refresh=refresh,
+        client=client,
+        checksum_algorithm=checksum_algorithm,
+    )
+    try:
+        # Also on errors/Ctrl-C: keep what was completed so a rerun resumes
+        stats = processor.run(walk if walk is not None else walk_pdfs(root))
+    finally:
+        processor.close()
+    if text_cache is not None:
+        text_cache.prune()
+    return stats
+
+
+def process_libraries(libraries, jobs: int = 1) -> dict:
+    """Process several libraries through one shared pool of `jobs` workers.
+
+    `libraries` yields (`LibraryProcessor`, walk) pairs and is consumed
+    lazily, like `tag_libraries`; each library keeps its own history, bib
+    file and caches. When a library's last result has been applied its bib
+    entries are flushed, its history checkpointed and its text cache
+    pruned, and its counts are printed.
+
+    Returns the summed counts of "tagged", "moved", "skipped" and
+    "bib_added" files, and the number of "libraries".
+    """
+    totals = {"tagged": 0, "moved": 0, "skipped": 0, "bib_added": 0, "libraries": 0}
+    opened = []
+    counts = {}
+
+    def tracked():
+        for processor, walk in libraries:
+            opened.append(processor)
+            counts[processor] = {"tagged": 0, "moved": 0, "skipped": 0, "bib_added": 0}
+            yield processor, walk
+
+    def finish(processor):
+        stats = counts.pop(processor)
+        processor.flush()
+        processor.close()
+        if processor.text_cache is not None:
+            processor.text_cache.prune()
+        for key, value in stats.items():
+            totals[key] += value
+        totals["libraries"] += 1
+        print(
+            f"✅ {processor.name}: {stats['tagged']} tagged, {stats['moved']} moved, "
+            f"{stats['skipped']} unchanged, {stats['bib_added']} entries added "
+            f"to {processor.bib_path}"
+        )
+
+    try:
+        with closing(shared_map(_process_file, tracked(), jobs)) as results:
+            for processor, result in results:
+                if result is not None:
+                    processor.apply(result, counts[processor])
+                    continue
+                for done in opened[: opened.index(processor)]:
+                    if done in counts:
+                        finish(done)
+                print(f"\nProcessing library: {processor.name} at {processor.root}")
+        for processor in opened:
+            if processor in counts:
+                finish(processor)
+    finally:
+        # Also on errors/Ctrl-C: keep what was completed so a rerun resumes
+        for processor in opened:
+            processor.flush()
+            processor.close()
+    return totals
@@ -0,0 +1,121 @@
+"""Long-running `watch` mode: process PDFs as they appear or change.
+
+`watch_library` keeps one `LibraryProcessor` (vocab, matchers, history and
+bib index in memory) and the persistent ExifTool sessions warm for the
+lifetime of the process. After one catch-up pass over the library it only
+feeds the PDFs reported by the filesystem watcher, once the `Debouncer`
+considers them fully written, through the one-pass tag + BibTeX pipeline.
+Writing a file's keywords fires events of its own; a PDF whose size, mtime
+and inode still equal what the history recorded for it is dropped before
+it is queued, so processed files are not picked up and hashed again.
+"""
+
+import os
+import threading
+from itertools import groupby
+from pathlib import Path
+from typing import Optional
+
+from borax.core.fs_watch import (
+    DEFAULT_SETTLE_SECONDS,
+    Debouncer,
+    InotifyWatcher,
+    PollingWatcher,
+    WatchError,
+    open_watcher,
+)
+from borax.core.history_tracker import STAT_FIELDS, stat_signature
+from borax.core.walker import library_walk
+
+from . import LibraryProcessor
+
+# Longest a single wait for events may block, so stop requests are honoured
+MAX_WAIT_SECONDS = 1.0
+
+
+def _batch_walk(paths):
+    """Group PDF paths into the (dirpath, names) form `run` expects."""
+    paths = sorted(Path(p) for p in paths)
+    for dirpath, group in groupby(paths, key=lambda p: p.parent):
+        yield dirpath, [p.name for p in group]
+
+
+def _recorded(history, path) -> bool:
+    """True if `path` is exactly as the history last recorded it."""
+    record = history.get(str(path))
+    if not record:
+        return False
+    try:
+        signature = stat_signature(path)
+    except OSError:
+        return False
+    return all(record.get(f) == signature[f] for f in STAT_FIELDS)
+
+
+def watch_library(
+    config,
+    processor: LibraryProcessor,
+    settle: float = DEFAULT_SETTLE_SECONDS,
+    poll_interval: Optional[float] = None,
+    stop: Optional[threading.Event] = None,
+    on_batch=None,
+) -> dict:
+    """Process `config`'s library now and then whenever PDFs change.
+
+    Runs until `stop` is set (or KeyboardInterrupt). Uses inotify when
+    available, else polling every `poll_interval` seconds (passing
+    `poll_interval` forces polling). A watcher that runs out of inotify
+    watches mid-run is replaced by polling. `on_batch(stats)` is called
+    after each processed batch. Returns the summed stats.
+    """
+    stop = stop or threading.Event()
+    totals = {"tagged": 0, "moved": 0, "skipped": 0, "bib_added": 0, "batches": 0}
+
+    def run(walk):
+        stats = processor.run(walk)
+        for key, value in stats.items():
+            totals[key] += value
+        totals["batches"] += 1
+        if on_batch is not None:
+            on_batch(stats)
+
+    state_dir = os.path.relpath(config.state_dir, config.root)
+    # Subscribe before the catch-up pass so nothing written during it is lost
+    watcher = open_watcher(
+        config.root,
+        ignore=config.ignore,
+        state_dir=state_dir,
+        poll_interval=poll_interval,
+    )
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    debouncer = Debouncer(settle)
+    try:
+        run(library_walk(config))
+        print(f"👀 Watching {config.root} ({kind}); press Ctrl-C to stop.")
+        while not stop.is_set():
+            deadline = debouncer.next_deadline()
+            timeout = MAX_WAIT_SECONDS if deadline is None else deadline
+            try:
+                changed = watcher.read(min(timeout, MAX_WAIT_SECONDS))
+            except WatchError as e:
+                print(f"⚠️ {e}; falling back to polling")
+                watcher.close()
+                watcher = PollingWatcher(
+                    config.root, ignore=config.ignore, state_dir=state_dir
+                )
+                watcher.rescan = True
+                changed = []
+            debouncer.touch(changed)
+            if watcher.rescan:
+                watcher.rescan = False
+                run(library_walk(config))
+            ready = [
+                p for p in debouncer.ready() if not _recorded(processor.history, p)
+            ]
+            if ready:
+                run(_batch_walk(ready))
+    except KeyboardInterrupt:
+        print("\n⏹️ Stopping watch.")
+    finally:
+        watcher.close()
+    return totals
@@ -1,27 +1,58 @@
 #!/usr/bin/env python3
 """Tagging engine for Borax (discipline-agnostic)."""
 
-import os
+import codecs
 import subprocess
-from difflib import get_close_matches
+from contextlib import closing
+from dataclasses import dataclass, field
 from pathlib import Path
-
-from borax.core.utils import exiftool_write_keywords, exiftool_read_json
+from typing import Optional
+
+from borax.core import profiling
+from borax.core.pipeline import ordered_map, shared_map
+from borax.core.text_cache import TextCache, TextCacheError
+from borax.core.vocab_cache import Vocab
+from borax.core.utils import (
+    DEFAULT_CHECKSUM,
+    exiftool_read_json,
+    exiftool_write_keywords,
+    file_checksum,
+)
+from borax.core.walker import walk_pdfs
+from .folder_matcher import FolderMatcher
+from .keyword_matcher import KeywordMatcher, KeywordSet
 from borax.core.history_tracker import (
+    ChecksumIndex,
+    HistoryJournal,
     load_history,
-    save_history,
     already_processed,
+    move_record,
+    record_is_current,
     record_original,
+    save_history,
     update_modified_checksum,
 )
 
 MIN_OCCURRENCES = 1
 TITLE_WEIGHT = 2.0
 MIN_SCORE = 2.0
+# Leading characters of the text that count as the title/first-page area
+TITLE_CHARS = 2000
+# Bytes of `pdftotext` output read per chunk while streaming
+TEXT_CHUNK_BYTES = 1 << 16
 
 
 def load_vocab_flat(vocab: dict):
-    """Flatten hierarchical vocab into term sets for matching/scoring."""
+    """Flatten hierarchical vocab into term sets for matching/scoring.
+
+    The returned keyword set carries a compiled `KeywordMatcher` so texts
+    can be scored against the whole vocabulary in one pass. For a cached
+    `Vocab` (from `load_library_config`) the result is stored with the vocab
+    cache and reused by later runs.
+    """
+    cached = vocab.artifact("flat") if isinstance(vocab, Vocab) else None
+    if cached is not None:
+        return cached
     discipline_terms = set()
     for disc, data in vocab.get("Disciplines", {}).items():
         discipline_terms.add(disc)
@@ -31,13 +62,31 @@ def load_vocab_flat(vocab: dict):
                 discipline_terms.add(s)
     doc_types = set(vocab.get("Document_Types", []))
     levels = set(vocab.get("Levels", []))
-    keywords = set()
+    keywords = KeywordSet()
     for group, kw_list in vocab.get("Keywords", {}).items():
         for kw in kw_list:
             keywords.add(kw.lower())
-    return discipline_terms, doc_types, levels, keywords
+    flat = (discipline_terms, doc_types, levels, keywords.compile())
+    if isinstance(vocab, Vocab):
+        vocab.set_artifact("flat", flat)
+    return flat
 
 
+def vocab_folder_matcher(vocab: dict, discipline_terms) -> FolderMatcher:
+    """Return the `FolderMatcher` for the vocab's discipline terms.
+
+    Cached with a `Vocab` like `load_vocab_flat`; the memo starts empty.
+    """
+    cached = vocab.artifact("folder_matcher") if isinstance(vocab, Vocab) else None
+    if cached is not None:
+        return cached
+    matcher = FolderMatcher(discipline_terms)
+    if isinstance(vocab, Vocab):
+        vocab.set_artifact("folder_matcher", matcher)
+    return matcher
+
+
+@profiling.profiled("mdls")
 def get_macos_tags(filepath: Path):
     """Return Finder tags for a file on macOS, or empty list elsewhere."""
     try:
@@ -57,17 +106,35 @@ def get_macos_tags(filepath: Path):
 
 
 def match_vocab_terms(folder_parts, vocab_terms):
-    """Fuzzy-match folder path parts to known vocabulary terms."""
+    """Fuzzy-match folder path parts to known vocabulary terms.
+
+    `vocab_terms` may be a `FolderMatcher`, which indexes the terms and
+    memoizes results across calls; a plain iterable is matched through a
+    throwaway one. Results equal `get_close_matches(..., n=1, cutoff=0.75)`.
+    """
+    if not isinstance(vocab_terms, FolderMatcher):
+        vocab_terms = FolderMatcher(vocab_terms)
     matched = []
     for part in folder_parts:
-        normalized = part.replace("_", " ").title()
-        match = get_close_matches(normalized, vocab_terms, n=1, cutoff=0.75)
+        match = vocab_terms.match(part)
         if match:
-            matched.append(match[0])
+            matched.append(match)
     return matched
 
 
-def validate_finder_tags(finder_tags, valid_doc_types, valid_levels):
+def folder_tags(root: Path, dirpath, folder_matcher) -> list:
+    """Discipline tags matched from the folders between `root` and `dirpath`.
+
+    Directories outside `root` have no folder tags.
+    """
+    try:
+        folder_parts = Path(dirpath).relative_to(root).parts
+    except ValueError:
+        folder_parts = ()
+    return match_vocab_terms(folder_parts, folder_matcher)
+
+
+def validate_finder_tags(finder_tags, valid_doc_types, valid_levels, log=print):
     """Split Finder tags into document type and level; warn on unknowns."""
     doc_tags = [t for t in finder_tags if t in valid_doc_types]
     level_tags = [t for t in finder_tags if t in valid_levels]
@@ -75,39 +142,105 @@ def validate_finder_tags(finder_tags, valid_doc_types, valid_levels):
         t for t in finder_tags if t not in valid_doc_types and t not in valid_levels
     ]
     if invalid:
-        print(f"⚠️ Ignored unrecognized Finder tags: {', '.join(invalid)}")
+        log(f"⚠️ Ignored unrecognized Finder tags: {', '.join(invalid)}")
     return doc_tags, level_tags
 
 
-def extract_text_from_pdf(filepath: Path) -> str:
-    """Extract text using `pdftotext`; returns lowercase text or empty string."""
+def iter_pdf_text(filepath: Path, chunk_size: int = TEXT_CHUNK_BYTES):
+    """Yield lowercase text chunks streamed from `pdftotext` stdout.
+
+    Nothing is written next to the PDF and at most one chunk is held at a
+    time. The generator's return value (visible via ``yield from``) is True
+    if `pdftotext` exited successfully.
+    """
+    return profiling.timed_iter("pdftotext", _iter_pdf_text(filepath, chunk_size))
+
+
+def _iter_pdf_text(filepath: Path, chunk_size: int):
     try:
-        temp_txt = str(filepath) + ".txt"
-        subprocess.run(
-            ["pdftotext", "-layout", str(filepath), temp_txt],
-            stdout=subprocess.DEVNULL,
+        proc = subprocess.Popen(
+            ["pdftotext", "-layout", str(filepath), "-"],
+            stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
         )
-        with open(temp_txt, "r", errors="ignore") as f:
-            text = f.read().lower()
-        os.remove(temp_txt)
-        return text
-    except Exception:
-        return ""
+    except OSError:
+        return False
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    try:
+        while True:
+            raw = proc.stdout.read(chunk_size)
+            if not raw:
+                break
+            text = decoder.decode(raw)
+            if text:
+                yield text.lower()
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail.lower()
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+    return proc.wait() == 0
+
+
+def cached_pdf_text(filepath: Path, checksum: str, cache: Optional[TextCache]):
+    """Yield the PDF's lowercase text, preferring the text cache.
+
+    On a cache miss the text is streamed from `pdftotext` and written to the
+    cache at the same time; the entry is only kept if `pdftotext` succeeded.
+    A cache entry that fails part-way through is replaced the same way,
+    yielding only the text after what was already read from it.
+    """
+    if cache is None:
+        yield from iter_pdf_text(filepath)
+        return
+    cached = cache.read(checksum)
+    skip = 0
+    if cached is not None:
+        try:
+            for chunk in profiling.timed_iter("text_cache.read", cached):
+                skip += len(chunk)
+                yield chunk
+            return
+        except TextCacheError:
+            pass
+    writer = cache.writer(checksum)
+    ok = False
+    source = iter_pdf_text(filepath)
+    try:
+        while True:
+            try:
+                chunk = next(source)
+            except StopIteration as stop:
+                ok = bool(stop.value)
+                break
+            writer.write(chunk)
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            yield chunk[skip:]
+            skip = 0
+    finally:
+        if ok:
+            writer.commit()
+        else:
+            writer.abort()
 
 
-def score_keywords_in_text(text: str, keyword_list):
-    """Score keywords by frequency with a title/first-page boost.
+def extract_text_from_pdf(filepath: Path) -> str:
+    """Extract text using `pdftotext`; returns lowercase text or empty string."""
+    try:
+        return "".join(iter_pdf_text(filepath))
+    except Exception:
+        return ""
 
-    Returns a sorted list of (keyword, score) with keywords in lowercase
-    (matching input), ordered by descending score.
-    """
-    import re
 
+def _rank_keywords(counts: dict, title_text: str, keyword_list):
+    """Turn keyword counts into (keyword, score) pairs, best first."""
     matches = []
-    title_text = text[:2000]
     for kw in keyword_list:
-        count = len(re.findall(rf"\b{re.escape(kw)}\b", text))
+        count = counts.get(kw, 0)
         score = 0
         if count >= MIN_OCCURRENCES:
             score += count
@@ -118,21 +251,67 @@ def score_keywords_in_text(text: str, keyword_list):
     return sorted(matches, key=lambda x: x[1], reverse=True)
 
 
+def _keyword_matcher(keyword_list):
+    """Return (keywords, matcher), reusing the one compiled for the vocab."""
+    matcher = getattr(keyword_list, "matcher", None)
+    if matcher is None or len(matcher) != len(keyword_list):
+        keyword_list = list(keyword_list)
+        matcher = KeywordMatcher(keyword_list)
+    return keyword_list, matcher
+
+
+@profiling.profiled("score")
+def score_keywords_in_text(text: str, keyword_list):
+    """Score keywords by frequency with a title/first-page boost.
+
+    Returns a sorted list of (keyword, score) with keywords in lowercase
+    (matching input), ordered by descending score. All keywords are counted
+    in a single pass using the matcher compiled by `load_vocab_flat`, or one
+    built on the fly for plain iterables.
+    """
+    keyword_list, matcher = _keyword_matcher(keyword_list)
+    return _rank_keywords(matcher.count(text), text[:TITLE_CHARS], keyword_list)
+
+
+@profiling.profiled("score")
+def score_keywords_in_chunks(chunks, keyword_list):
+    """Like `score_keywords_in_text`, for text delivered as an iterable of chunks.
+
+    Memory use is bounded by the chunk size rather than the document size.
+    """
+    keyword_list, matcher = _keyword_matcher(keyword_list)
+    counter = matcher.counter(head_size=TITLE_CHARS)
+    for chunk in chunks:
+        counter.feed(chunk)
+    return _rank_keywords(counter.close(), counter.head, keyword_list)
+
+
 def tag_with_exiftool(
-    filepath: Path, tags, dry_run: bool = False, mode: str = "append"
+    filepath: Path,
+    tags,
+    dry_run: bool = False,
+    mode: str = "append",
+    log=print,
+    meta: Optional[dict] = None,
 ):
-    """Apply tags to the PDF using ExifTool, with append/overwrite modes."""
+    """Apply tags to the PDF using ExifTool, with append/overwrite modes.
+
+    In append mode the existing keywords are read from `meta` when the
+    caller already has the file's ExifTool metadata (including
+    `-XMP-pdf:Keywords`), saving a second read.
+    """
     tags = [t for t in tags if t]
     if not tags and mode == "append":
         # Nothing to add; still show preview in dry-run
         if dry_run:
-            print(f"🧪 [Dry Run] Would tag {filepath.name} with: (no change)")
+            log(f"🧪 [Dry Run] Would tag {filepath.name} with: (no change)")
         return []
     # Build the final tag list based on mode while avoiding duplicates
     final_tags = list(dict.fromkeys(tags))
     if mode == "append":
         # Read existing XMP-pdf:Keywords string and merge using semicolon delimiter
-        meta = exiftool_read_json(str(filepath), "-XMP-pdf:Keywords") or {}
+        if meta is None:
+            meta = exiftool_read_json(str(filepath), "-XMP-pdf:Keywords") or {}
         existing_str = meta.get("XMP-pdf:Keywords")
         if isinstance(existing_str, str) and existing_str.strip():
             existing_list = [s.strip() for s in existing_str.split(";") if s.strip()]
@@ -143,26 +322,49 @@ def tag_with_exiftool(
         final_tags = existing_list + to_add
     if dry_run:
         preview = ", ".join(final_tags) if final_tags else "(no change)"
-        print(f"🧪 [Dry Run] Would tag {filepath.name} with: {preview}")
+        log(f"🧪 [Dry Run] Would tag {filepath.name} with: {preview}")
         return final_tags
     # Use overwrite to set the exact final list (even in append mode, after merging)
     exiftool_write_keywords(str(filepath), final_tags, preserve_time=True)
     return final_tags
 
 
-def scan_library(root: Path, history_path: Path, vocab: dict, verbose: bool = False):
-    """Walk the library and list unprocessed PDFs based on history."""
+def scan_library(
+    root: Path,
+    history_path: Path,
+    vocab: dict,
+    verbose: bool = False,
+    verify: bool = False,
+    walk=None,
+    checksum_algorithm: str = DEFAULT_CHECKSUM,
+):
+    """Walk the library and list unprocessed PDFs based on history.
+
+    With `verify`, every file is re-hashed instead of trusting stat metadata.
+    Re-hashed records are upgraded to `checksum_algorithm` (see
+    `record_is_current`). Records whose stat fields were refreshed are saved,
+    so the next scan takes the fast path for them.
+    `walk` is the (dirpath, pdf names) iterable to use, by default
+    `walk_pdfs(root)`.
+    """
     _, _, _, _ = load_vocab_flat(vocab)
     history = load_history(history_path)
     stats = {"pdf_count": 0, "unprocessed": []}
-    for dirpath, _, files in os.walk(root):
+    refreshed = False
+    for dirpath, files in walk if walk is not None else walk_pdfs(root):
         for fname in files:
-            if not fname.lower().endswith(".pdf"):
-                continue
             stats["pdf_count"] += 1
             p = Path(dirpath) / fname
-            if not already_processed(p, history):
+            record = history.get(str(p))
+            checked = record.get("stat_checked_ns") if record else None
+            if not already_processed(
+                p, history, verify=verify, algorithm=checksum_algorithm
+            ):
                 stats["unprocessed"].append(str(p))
+            elif history[str(p)].get("stat_checked_ns") != checked:
+                refreshed = True
+    if refreshed:
+        save_history(history_path, history)
     if verbose:
         print(
             f"Found {stats['pdf_count']} PDFs; {len(stats['unprocessed'])} unprocessed."
@@ -170,6 +372,269 @@ def scan_library(root: Path, history_path: Path, vocab: dict, verbose: bool = Fa
     return stats
 
 
+@dataclass
+class _TagRun:
+    """Read-only settings shared by all workers of one tagging run."""
+
+    doc_types: set
+    levels: set
+    keywords: set
+    override: bool = False
+    dry_run: bool = False
+    tag_mode: str = "append"
+    verify: bool = False
+    text_cache: Optional[TextCache] = None
+    checksum_algorithm: str = DEFAULT_CHECKSUM
+    root: Optional[Path] = None
+    folder_matcher: Optional[FolderMatcher] = None
+    checksums: Optional[ChecksumIndex] = None
+
+
+@dataclass
+class _TagResult:
+    """Outcome of the per-file pipeline, applied to history by the coordinator."""
+
+    filepath: Path
+    discipline_tags: list
+    skipped: bool = False
+    record: Optional[dict] = None
+    record_refreshed: bool = False
+    original_checksum: str = ""
+    modified_checksum: str = ""
+    moved_from: str = ""
+    tags: list = field(default_factory=list)
+    messages: list = field(default_factory=list)
+
+
+def find_moved(run, result, record) -> bool:
+    """Re-tag `result`'s file if its checksum belongs to a known record.
+
+    Applies to files the history does not list (unless overriding). The
+    tags recorded for the other path are carried over with only the
+    folder-derived discipline tags re-derived, and the keywords are
+    rewritten only if that changes them (or the content matched is from
+    before tagging); no text is extracted. Returns True if the file was
+    recognized as moved or copied.
+    """
+    if record is not None or run.override or run.checksums is None:
+        return False
+    found = run.checksums.find(
+        result.filepath, result.original_checksum, run.checksum_algorithm
+    )
+    if found is None or found[0] == str(result.filepath):
+        return False
+    old_path, old_tags, tagged = found
+    old_folder_tags = folder_tags(run.root, Path(old_path).parent, run.folder_matcher)
+    kept = [t for t in old_tags if t not in old_folder_tags]
+    tags = list(dict.fromkeys(result.discipline_tags + kept))
+    result.moved_from = old_path
+    result.modified_checksum = result.original_checksum
+    if tagged and set(tags) == set(old_tags):
+        result.tags = list(old_tags)
+        return True
+    result.tags = tags
+    if run.dry_run:
+        result.messages.append(
+            f"🧪 [Dry Run] Would tag {result.filepath.name} with: {', '.join(tags)}"
+        )
+        return True
+    exiftool_write_keywords(str(result.filepath), tags, preserve_time=True)
+    result.modified_checksum = file_checksum(result.filepath, run.checksum_algorithm)
+    if run.text_cache is not None:
+        run.text_cache.alias(result.modified_checksum, result.original_checksum)
+    return True
+
+
+def _tag_file(run: _TagRun, filepath: Path, discipline_tags, record) -> _TagResult:
+    """Run the per-file tagging pipeline without touching shared state.
+
+    `record` is a private copy of the file's history entry (or None). Console
+    output is collected into `messages` so the coordinator can print it in
+    walk order regardless of which worker finished first.
+    """
+    result = _TagResult(filepath=filepath, discipline_tags=discipline_tags)
+    checked = record.get("stat_checked_ns") if record else None
+    if not run.override and record_is_current(
+        filepath, record, verify=run.verify, algorithm=run.checksum_algorithm
+    ):
+        result.skipped = True
+        result.record = record
+        result.record_refreshed = record.get("stat_checked_ns") != checked
+        return result
+
+    result.original_checksum = file_checksum(filepath, run.checksum_algorithm)
+    if find_moved(run, result, record):
+        return result
+
+    finder_tags = get_macos_tags(filepath)
+    doc_tags, level_tags = validate_finder_tags(
+        finder_tags, run.doc_types, run.levels, log=result.messages.append
+    )
+
+    text = cached_pdf_text(filepath, result.original_checksum, run.text_cache)
+    keyword_scores = score_keywords_in_chunks(text, run.keywords)
+    keyword_tags = [kw for kw, sc in keyword_scores]
+
+    all_tags = list(
+        dict.fromkeys(discipline_tags + doc_tags + level_tags + keyword_tags)
+    )
+    final_tags = tag_with_exiftool(
+        filepath,
+        all_tags,
+        dry_run=run.dry_run,
+        mode=run.tag_mode,
+        log=result.messages.append,
+    )
+
+    # If dry-run append might return [], preserve preview list
+    result.tags = (
+        final_tags if isinstance(final_tags, list) and final_tags else all_tags
+    )
+    if run.dry_run:
+        result.modified_checksum = result.original_checksum
+    else:
+        result.modified_checksum = file_checksum(filepath, run.checksum_algorithm)
+        if run.text_cache is not None:
+            run.text_cache.alias(result.modified_checksum, result.original_checksum)
+    return result
+
+
+class LibraryTagger:
+    """History, journal and move index of one library being tagged.
+
+    `tasks(walk)` yields the work items of `_tag_file`; `apply(result)`
+    records a finished result in the history and prints it, and must only
+    be called by the coordinator. Dry runs leave the history untouched.
+    `close` checkpoints the history and prunes the text cache.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        history_path: Path,
+        vocab: dict,
+        override: bool = False,
+        dry_run: bool = False,
+        tag_mode: str = "append",
+        verify: bool = False,
+        text_cache: Optional[TextCache] = None,
+        checksum_algorithm: str = DEFAULT_CHECKSUM,
+        name: Optional[str] = None,
+    ):
+        self.root = Path(root)
+        self.name = name or self.root.name
+        self.text_cache = text_cache
+        discipline_terms, doc_types, levels, keywords = load_vocab_flat(vocab)
+        self.folder_matcher = vocab_folder_matcher(vocab, discipline_terms)
+        self.history = load_history(history_path)
+        self.run = _TagRun(
+            doc_types=doc_types,
+            levels=levels,
+            keywords=keywords,
+            override=override,
+            dry_run=dry_run,
+            tag_mode=tag_mode,
+            verify=verify,
+            text_cache=text_cache,
+            checksum_algorithm=checksum_algorithm,
+            root=self.root,
+            folder_matcher=self.folder_matcher,
+            checksums=ChecksumIndex(),
+        )
+        self.journal = None if dry_run else HistoryJournal(history_path, self.history)
+
+    def tasks(self, walk):
+        root, history, checksums = self.root, self.history, self.run.checksums
+        for dirpath, files in walk if walk is not None else walk_pdfs(root):
+            discipline_tags = folder_tags(root, dirpath, self.folder_matcher)
+
+            for fname in files:
+                filepath = Path(dirpath) / fname
+                record = history.get(str(filepath))
+                if record is None and not self.run.override and not checksums.built:
+                    # First unknown path: index checksums to spot moved files
+                    checksums.build(history)
+                yield (
+                    self.run,
+                    filepath,
+                    discipline_tags,
+                    dict(record) if record else None,
+                )
+
+    def apply(self, result: _TagResult) -> None:
+        """Record `result` in the history (unless a dry run) and print it."""
+        if not self.run.dry_run:
+            self._record(result)
+        filepath = result.filepath
+        if result.skipped:
+            print(f"⏭️ Skipping already-tagged file: {filepath.name}")
+            return
+        for message in result.messages:
+            print(message)
+        if result.moved_from:
+            print(f"🔀 {filepath.name} (moved from {result.moved_from})")
+        else:
+            print(f"📄 {filepath.name}")
+        out = ", ".join(result.tags)
+        print(f"   → {out}")
+
+    def _record(self, result: _TagResult) -> None:
+        history, journal = self.history, self.journal
+        checksums = self.run.checksums
+        algorithm = self.run.checksum_algorithm
+        filepath = result.filepath
+        if result.skipped:
+            if result.record_refreshed:
+                history[str(filepath)] = result.record
+                if journal is not None:
+                    journal.record(filepath)
+            return
+
+        if result.moved_from:
+            move_record(
+                result.moved_from,
+                filepath,
+                history,
+                tags=result.tags,
+                checksum=result.modified_checksum,
+                algorithm=algorithm,
+            )
+            if journal is not None:
+                journal.record(result.moved_from)
+                journal.record(filepath)
+            checksums.add(filepath, history[str(filepath)])
+            return
+
+        record_original(
+            filepath,
+            history,
+            tags=result.discipline_tags,
+            checksum=result.original_checksum,
+            algorithm=algorithm,
+        )
+        update_modified_checksum(
+            filepath,
+            history,
+            tags=result.tags,
+            checksum=result.modified_checksum,
+            algorithm=algorithm,
+        )
+        if journal is not None:
+            journal.record(filepath)
+        if checksums.built:
+            checksums.add(filepath, history[str(filepath)])
+
+    def close(self) -> None:
+        """Checkpoint the history, remove its journal and prune the text cache."""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.run.checksums.close()
+        if self.text_cache is not None:
+            self.text_cache.prune()
+            self.text_cache = None
+
+
 def tag_library(
     root: Path,
     history_path: Path,
@@ -177,53 +642,85 @@ def tag_library(
     override: bool = False,
     dry_run: bool = False,
     tag_mode: str = "append",
+    verify: bool = False,
+    jobs: int = 1,
+    text_cache: Optional[TextCache] = None,
+    walk=None,
+    checksum_algorithm: str = DEFAULT_CHECKSUM,
 ):
-    """Infer and write tags for all PDFs in the library."""
-    discipline_terms, doc_types, levels, keywords = load_vocab_flat(vocab)
-    history = load_history(history_path)
+    """Infer and write tags for all PDFs in the library.
 
-    for dirpath, _, files in os.walk(root):
-        folder_parts = (
-            Path(dirpath).relative_to(root).parts if Path(dirpath) != root else []
-        )
-        discipline_tags = match_vocab_terms(folder_parts, discipline_terms)
+    The per-file pipeline (checksum, Finder tags, text extraction, scoring and
+    ExifTool read/write) runs on `jobs` worker threads. Results are applied by
+    this function alone, which owns the history and its journal, and are
+    printed in walk order so output does not depend on `jobs`.
 
-        for fname in files:
-            if not fname.lower().endswith(".pdf"):
-                continue
-            filepath = Path(dirpath) / fname
+    Unless `dry_run` is set, each completed file is journaled immediately
+    and the history is checkpointed periodically, so an interrupted run
+    resumes where it stopped.
 
-            if not override and already_processed(filepath, history):
-                print(f"⏭️ Skipping already-tagged file: {filepath.name}")
-                continue
+    With a `text_cache`, extracted text is reused for PDFs whose content was
+    seen before, and the cache is pruned to its budget at the end.
 
-            history = record_original(filepath, history, tags=discipline_tags)
+    `walk` is the (dirpath, pdf names) iterable to use, by default
+    `walk_pdfs(root)`. Files are hashed with `checksum_algorithm`; history
+    records written with another algorithm are upgraded as they are checked.
 
-            finder_tags = get_macos_tags(filepath)
-            doc_tags, level_tags = validate_finder_tags(finder_tags, doc_types, levels)
+    A PDF at a path the history does not know whose checksum matches a
+    record (a moved or copied file) takes over that record's tags with its
+    folder-derived discipline tags re-derived, without extracting text
+    (see `find_moved`); a moved file's old record is removed.
+    """
+    tagger = LibraryTagger(
+        root,
+        history_path,
+        vocab,
+        override=override,
+        dry_run=dry_run,
+        tag_mode=tag_mode,
+        verify=verify,
+        text_cache=text_cache,
+        checksum_algorithm=checksum_algorithm,
+    )
+    try:
+        with closing(ordered_map(_tag_file, tagger.tasks(walk), jobs)) as results:
+            for result in results:
+                tagger.apply(result)
+    finally:
+        # Also on errors/Ctrl-C: keep what was completed so a rerun resumes
+        tagger.close()
 
-            text = extract_text_from_pdf(filepath)
-            keyword_scores = score_keywords_in_text(text, keywords)
-            keyword_tags = [kw for kw, sc in keyword_scores]
+    print("\n✅ Tagging complete.")
 
-            all_tags = list(
-                dict.fromkeys(discipline_tags + doc_tags + level_tags + keyword_tags)
-            )
-            final_tags = tag_with_exiftool(
-                filepath, all_tags, dry_run=dry_run, mode=tag_mode
-            )
 
-            # If dry-run append might return [], preserve preview list
-            stored_tags = (
-                final_tags if isinstance(final_tags, list) and final_tags else all_tags
-            )
-            history = update_modified_checksum(filepath, history, tags=stored_tags)
-            print(f"📄 {filepath.name}")
-            out = ", ".join(stored_tags)
-            print(f"   → {out}")
+def tag_libraries(libraries, jobs: int = 1) -> int:
+    """Tag several libraries through one shared pool of `jobs` workers.
 
-    if not dry_run:
-        save_history(history_path, history)
+    `libraries` yields (`LibraryTagger`, walk) pairs and is consumed lazily,
+    so only the libraries in flight have their history loaded. Each library
+    keeps its own history, journal and text cache; results are printed
+    library by library in walk order, and a library is closed as soon as
+    the next one's results begin. Returns the number of libraries tagged.
+    """
+    opened = []
 
-    print("\n✅ Tagging complete.")
+    def tracked():
+        for tagger, walk in libraries:
+            opened.append(tagger)
+            yield tagger, walk
 
+    try:
+        with closing(shared_map(_tag_file, tracked(), jobs)) as results:
+            for tagger, result in results:
+                if result is not None:
+                    tagger.apply(result)
+                    continue
+                for done in opened[: opened.index(tagger)]:
+                    done.close()
+                print(f"\nTagging library: {tagger.name} at {tagger.root}")
+    finally:
+        for tagger in opened:
+            tagger.close()
+
+    print(f"\n✅ Tagging complete ({len(opened)} libraries).")
+    return len(opened)
@@ -0,0 +1,105 @@
+"""Indexed, memoized fuzzy matching of folder names to vocabulary terms.
+
+`FolderMatcher.match(part)` returns exactly what
+``difflib.get_close_matches(name, terms, n=1, cutoff=cutoff)`` would for the
+normalized name ``part.replace("_", " ").title()``, but only scores a handful
+of candidates per folder name:
+
+- `SequenceMatcher.ratio()` is ``2 * M / (len(a) + len(b))`` where the match
+  count ``M`` is at most the size of the two strings' character-multiset
+  intersection. Terms whose length alone rules out reaching the cutoff are
+  never considered (terms are bucketed by length).
+- Within a length bucket, a term reaching the cutoff must share at least
+  ``cutoff * (len(a) + len(b)) / 2`` characters with the folder name. Terms
+  are kept when they share ``floor(cutoff * (len(a) + len(b)) / 2 - 1e-9)``
+  or more, one below that bound, so float rounding in difflib's own ratio
+  comparison can never drop a match. The shared-character counts of all
+  terms in the bucket are accumulated from an inverted index of (length,
+  character, occurrence) postings, and only terms reaching that count are
+  scored.
+
+Both filters are lossless, so the surviving candidates go through the same
+difflib checks and tie-breaking as `get_close_matches`. A character-unigram
+index is used rather than trigrams because trigram filtering would miss
+matches (e.g. "abcd" vs "abxd" has ratio 0.75 but no shared trigram).
+Results are memoized per folder name for the lifetime of the matcher.
+"""
+
+import math
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+DEFAULT_CUTOFF = 0.75
+
+
+class FolderMatcher:
+    """Match folder-name parts against a fixed set of vocabulary terms."""
+
+    def __init__(self, terms, cutoff: float = DEFAULT_CUTOFF):
+        self.terms = list(dict.fromkeys(terms))
+        self.cutoff = cutoff
+        self._memo = {}
+        self._by_length = defaultdict(list)
+        # (length, char, k) -> indexes of terms of that length containing
+        # char at least k times
+        self._postings = defaultdict(list)
+        for i, term in enumerate(self.terms):
+            self._by_length[len(term)].append(i)
+            for ch, count in Counter(term).items():
+                for k in range(1, count + 1):
+                    self._postings[(len(term), ch, k)].append(i)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _lengths(self, n: int):
+        """Term lengths whose ratio upper bound (real_quick_ratio) can pass."""
+        for length in self._by_length:
+            total = n + length
+            if not total or 2.0 * min(n, length) / total >= self.cutoff:
+                yield length
+
+    def _candidates(self, word: str):
+        """Yield indexes of terms whose quick_ratio bound can reach the cutoff."""
+        n = len(word)
+        word_counts = Counter(word)
+        for length in self._lengths(n):
+            required = math.floor(self.cutoff * (n + length) / 2 - 1e-9)
+            if required <= 0:
+                yield from self._by_length[length]
+                continue
+            # shared[i] = size of the character-multiset intersection
+            shared = Counter()
+            for ch, count in word_counts.items():
+                for k in range(1, count + 1):
+                    postings = self._postings.get((length, ch, k))
+                    if not postings:
+                        break
+                    shared.update(postings)
+            for i, m in shared.items():
+                if m >= required:
+                    yield i
+
+    def _best(self, word: str):
+        s = SequenceMatcher()
+        s.set_seq2(word)
+        best = None
+        for i in self._candidates(word):
+            term = self.terms[i]
+            s.set_seq1(term)
+            if (
+                s.real_quick_ratio() >= self.cutoff
+                and s.quick_ratio() >= self.cutoff
+                and s.ratio() >= self.cutoff
+            ):
+                scored = (s.ratio(), term)
+                # Same tie-break as get_close_matches (heapq.nlargest)
+                if best is None or scored > best:
+                    best = scored
+        return best[1] if best else None
+
+    def match(self, part: str):
+        """Return the best term for one folder-name part, or None."""
+        if part not in self._memo:
+            self._memo[part] = self._best(part.replace("_", " ").title())
+        return self._memo[part]
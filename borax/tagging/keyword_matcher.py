@@ -0,0 +1,180 @@
+"""Single-pass multi-keyword counting for tagging.
+
+`KeywordMatcher` counts every vocabulary keyword in a text with the same
+semantics as ``len(re.findall(rf"\\b{re.escape(kw)}\\b", text))`` per
+keyword, but without scanning the text once per keyword:
+
+- Keywords made of a single word (``\\w+``) can only match whole tokens, so
+  they are counted from one tokenization of the text.
+- Multi-word keywords that start with a word character can only start where
+  a token equal to their first word starts; candidate tokens are looked up
+  in a dict during the same tokenization and the keyword is verified in
+  place.
+- The rare keywords that start with a non-word character are located with
+  `str.find` and checked against the same boundary rule.
+
+Text can be fed in chunks through `KeywordCounter`, which keeps only a small
+tail between chunks.
+"""
+
+import re
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _is_word(ch: str) -> bool:
+    """Return True if `ch` is a regex word character (same as `\\w`)."""
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Keyword index compiled once per vocabulary."""
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._single = set()
+        self._by_first_word = {}
+        self._fallback = []
+        for kw in self.keywords:
+            m = _WORD_RE.match(kw)
+            if m is None:
+                self._fallback.append(kw)
+            elif m.end() == len(kw):
+                self._single.add(kw)
+            else:
+                self._by_first_word.setdefault(m.group(), []).append(kw)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    @property
+    def max_length(self) -> int:
+        """Length of the longest keyword (0 for an empty vocabulary)."""
+        return max((len(kw) for kw in self.keywords), default=0)
+
+    def counter(self, head_size: int = 0) -> "KeywordCounter":
+        """Return an incremental counter for text delivered in chunks."""
+        return KeywordCounter(self, head_size=head_size)
+
+    def count(self, text: str) -> dict:
+        """Return {keyword: occurrences} for keywords found in `text`."""
+        counter = self.counter()
+        counter.feed(text)
+        return counter.close()
+
+
+class KeywordCounter:
+    """Counts a `KeywordMatcher`'s keywords over a stream of text chunks.
+
+    Only an unprocessed tail of about one keyword length is kept between
+    chunks, so memory stays bounded regardless of the total text size. The
+    window is cut at a non-word character so no token straddles it; a single
+    token longer than `MAX_CARRY` characters (which cannot be a keyword) is
+    cut forcibly. The first `head_size` characters are kept in `head`.
+    """
+
+    MAX_CARRY = 1 << 20
+    CUT_SEARCH = 4096
+
+    def __init__(self, matcher: KeywordMatcher, head_size: int = 0):
+        self.matcher = matcher
+        self.counts = {}
+        self.head = ""
+        self._head_size = head_size
+        self._overlap = matcher.max_length + 1
+        self._buf = ""
+        self._prev = ""
+        self._offset = 0
+        self._last_end = {}
+
+    def feed(self, chunk: str) -> None:
+        """Add the next piece of text."""
+        if len(self.head) < self._head_size:
+            self.head += chunk[: self._head_size - len(self.head)]
+        self._buf += chunk
+        self._process(final=False)
+
+    def close(self) -> dict:
+        """Process the remaining text and return {keyword: occurrences}."""
+        self._process(final=True)
+        return self.counts
+
+    def _boundary(self, buf: str, pos: int) -> bool:
+        """Return True if `\\b` matches at `pos` of the full text."""
+        before = _is_word(buf[pos - 1]) if pos > 0 else _is_word(self._prev)
+        after = pos < len(buf) and _is_word(buf[pos])
+        return before != after
+
+    def _find_cut(self, buf: str) -> int:
+        """Return how much of `buf` can be processed now (0 to wait)."""
+        limit = len(buf) - self._overlap
+        if limit <= 0:
+            return 0
+        i = limit
+        stop = max(0, limit - self.CUT_SEARCH)
+        while i > stop and _is_word(buf[i]):
+            i -= 1
+        if i > 0 and not _is_word(buf[i]):
+            return i
+        return limit if len(buf) > self.MAX_CARRY else 0
+
+    def _process(self, final: bool) -> None:
+        buf = self._buf
+        cut = len(buf) if final else self._find_cut(buf)
+        if cut <= 0:
+            return
+        matcher = self.matcher
+        counts = self.counts
+        last_end = self._last_end
+        offset = self._offset
+        by_first_word = matcher._by_first_word
+        single = matcher._single
+        continues = _is_word(self._prev)
+        truncated = cut < len(buf) and _is_word(buf[cut])
+
+        for m in _WORD_RE.finditer(buf, 0, cut):
+            start, end = m.span()
+            if (start == 0 and continues) or (end == cut and truncated):
+                continue
+            tok = m.group()
+            if tok in single:
+                counts[tok] = counts.get(tok, 0) + 1
+            if tok in by_first_word:
+                for kw in by_first_word[tok]:
+                    kw_end = start + len(kw)
+                    if (
+                        offset + start >= last_end.get(kw, 0)
+                        and buf.startswith(kw, start)
+                        and self._boundary(buf, kw_end)
+                    ):
+                        counts[kw] = counts.get(kw, 0) + 1
+                        last_end[kw] = offset + kw_end
+
+        for kw in matcher._fallback:
+            step = max(len(kw), 1)
+            i = buf.find(kw, max(0, last_end.get(kw, 0) - offset))
+            while i != -1 and i < cut:
+                if self._boundary(buf, i) and self._boundary(buf, i + len(kw)):
+                    counts[kw] = counts.get(kw, 0) + 1
+                    last_end[kw] = offset + i + len(kw)
+                    i = buf.find(kw, i + step)
+                else:
+                    i = buf.find(kw, i + 1)
+
+        self._prev = buf[cut - 1]
+        self._buf = buf[cut:]
+        self._offset += cut
+
+
+class KeywordSet(set):
+    """Set of vocabulary keywords carrying its compiled `KeywordMatcher`.
+
+    `load_vocab_flat` builds the matcher once; `score_keywords_in_text`
+    rebuilds it only if the set was changed afterwards.
+    """
+
+    matcher = None
+
+    def compile(self) -> "KeywordSet":
+        self.matcher = KeywordMatcher(self)
+        return self
@@ -19,6 +19,29 @@ def sample_library(tmp_path):
     return lib
 
 
+@pytest.fixture
+def sqlite_library(sample_library):
+    """The sample library with its manifest switched to the SQLite history."""
+    manifest = sample_library / "borax-library.toml"
+    manifest.write_text(manifest.read_text() + 'history_backend = "sqlite"\n')
+    return sample_library
+
+
+@pytest.fixture
+def sqlite_records(sqlite_library):
+    """Return a function reading the records of `sqlite_library`'s history."""
+    from borax.core.history_sqlite import SQLiteHistory
+
+    def _read():
+        history = SQLiteHistory(sqlite_library / "tag_history.sqlite")
+        try:
+            return dict(history.items())
+        finally:
+            history.close()
+
+    return _read
+
+
 @pytest.fixture
 def run_cli():
     """Run the CLI via the project-local main.py to avoid requiring installation.
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+
+import benchmark
+
+# The tool shims are executable scripts and peak RSS comes from `os.wait4`
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="needs POSIX")
+
+
+def test_benchmark_run_with_fake_tools(tmp_path, capsys):
+    library = tmp_path / "lib"
+    params = benchmark.generate_library(
+        library, files=6, depth=2, text_chars=600, vocab_terms=40, files_per_dir=3
+    )
+    assert params["files"] == 6
+    assert len(list(library.rglob("*.pdf"))) == 6
+
+    report = benchmark.run_benchmark(library, tools="fake")
+    results = {r["command"]: r for r in report["results"]}
+    assert list(results) == ["scan", "tag", "bibtex", "summary"]
+    assert all(r["returncode"] == 0 for r in results.values())
+    assert all(r["peak_rss_kb"] > 0 for r in results.values())
+    # One text extraction and one Finder lookup per file, one stay-open ExifTool
+    assert results["tag"]["subprocesses"] == {"exiftool": 1, "pdftotext": 6, "mdls": 6}
+    assert results["scan"]["subprocesses"] == {"exiftool": 0, "pdftotext": 0, "mdls": 0}
+
+    history = json.loads((library / "tag_history.json").read_text())
+    assert len(history) == 6
+    assert all(record["tags"] for record in history.values())
+    assert (library / "library.bib").read_text().count("Synthetic Document") == 6
+
+    slower = json.loads(json.dumps(report))
+    for result in slower["results"]:
+        result["files_per_sec"] /= 2
+    assert benchmark.compare_reports(report, slower, max_regression=10) == [
+        "scan",
+        "tag",
+        "bibtex",
+        "summary",
+    ]
+    assert benchmark.compare_reports(report, report, max_regression=10) == []
+
+
+def test_hash_benchmark_on_large_pdfs(tmp_path):
+    pdf = tmp_path / "large.pdf"
+    benchmark.write_large_pdf(pdf, 2 * 1024 * 1024)
+    assert pdf.read_bytes().startswith(b"%PDF-1.4")
+    assert abs(pdf.stat().st_size - 2 * 1024 * 1024) < 1024
+
+    report = benchmark.hash_benchmark([pdf], ["sha256", "blake2b"], repeat=1)
+    assert report["bytes"] == pdf.stat().st_size
+    assert [r["algorithm"] for r in report["results"]] == ["sha256", "blake2b"]
+    assert all(r["mb_per_sec"] > 0 for r in report["results"])
@@ -1,3 +1,6 @@
+import json
+
+
 def test_history_shows_processed_counts(run_cli, sample_library):
     stdout, stderr, code = run_cli("tag", str(sample_library))
     assert code == 0
@@ -6,3 +9,23 @@ def test_history_shows_processed_counts(run_cli, sample_library):
     assert code == 0
     assert "processed files" in stdout.lower()
     assert "topics" in stdout.lower()
+
+
+def test_history_repair_prunes_missing_files(run_cli, sample_library):
+    stdout, _, code = run_cli("tag", str(sample_library))
+    assert code == 0
+    history_path = sample_library / "tag_history.json"
+    processed = len(json.loads(history_path.read_text()))
+    (sample_library / "doc2.pdf").unlink()
+
+    stdout, _, code = run_cli("history", "repair", str(sample_library), "--dry-run")
+    assert code == 0
+    assert "Would remove 1 records" in stdout
+    assert len(json.loads(history_path.read_text())) == processed
+
+    stdout, _, code = run_cli("history", "repair", str(sample_library))
+    assert code == 0
+    assert "doc2.pdf" in stdout
+    history = json.loads(history_path.read_text())
+    assert len(history) == processed - 1
+    assert not any(path.endswith("doc2.pdf") for path in history)
@@ -0,0 +1,37 @@
+import json
+
+
+def test_process_dry_run(run_cli, sample_library):
+    stdout, _, code = run_cli("process", str(sample_library), "--dry-run")
+    assert code == 0
+    assert "processing complete" in stdout.lower()
+    assert "would tag" in stdout.lower()
+    assert not (sample_library / "library.bib").exists()
+
+    history_path = sample_library / "tag_history.json"
+    if history_path.exists():
+        history = json.loads(history_path.read_text())
+        assert history == {} or history == []
+
+
+def test_process_dry_run_leaves_sqlite_history_unchanged(
+    run_cli, sqlite_library, sqlite_records
+):
+    _, stderr, code = run_cli("process", str(sqlite_library))
+    assert code == 0, stderr
+    before = sqlite_records()
+    assert before
+    # One moved and one new PDF for the dry run to report
+    (sqlite_library / "doc2.pdf").rename(sqlite_library / "renamed.pdf")
+    new = (sqlite_library / "doc1.pdf").read_bytes() + b"\n%new\n"
+    (sqlite_library / "new.pdf").write_bytes(new)
+
+    stdout, stderr, code = run_cli("process", str(sqlite_library), "--dry-run")
+    assert code == 0, stderr
+    assert "new.pdf" in stdout and "moved from" in stdout
+    assert sqlite_records() == before
+
+    stdout, stderr, code = run_cli("process", str(sqlite_library))
+    assert code == 0, stderr
+    assert "Skipping already-processed file: new.pdf" not in stdout
+    assert str(sqlite_library / "new.pdf") in sqlite_records()
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Import-time budget for `summary`: the borax modules it loads, including
+# everything they import, as reported by `python -X importtime`. Generous
+# so that only a regression (e.g. an eager import of a heavy module) trips
+# it; slow CI runners can raise it with BORAX_IMPORT_BUDGET_MS.
+SUMMARY_IMPORT_BUDGET_MS = float(os.environ.get("BORAX_IMPORT_BUDGET_MS", 500))
+# Heavy modules `summary` must not import
+LAZY_MODULES = {
+    "borax.tagging",
+    "borax.bibtex_exporter",
+    "borax.processing",
+    "borax.core.vocab_cache",
+    "requests",
+    "yaml",
+}
+
+
+def _importtime(*args) -> dict:
+    """Cumulative import time (µs) per module of a CLI run, from `-X importtime`.
+
+    Module names keep their indentation, which shows the import nesting.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(PROJECT_ROOT / "main.py"), *args],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.rstrip()] = int(cumulative)
+    return modules
+
+
+def test_summary_does_not_import_heavy_modules(sample_library):
+    imported = {name.strip() for name in _importtime("summary", str(sample_library))}
+    assert "borax.cli" in imported
+    assert not imported & LAZY_MODULES
+
+
+def test_summary_imports_stay_within_budget(sample_library):
+    modules = _importtime("summary", str(sample_library))
+    # Top-level entries (one leading space) carry the cumulative cost of
+    # their subtree; count those triggered by the CLI itself
+    total_us = sum(
+        us for name, us in modules.items() if name.startswith((" borax", " main"))
+    )
+    assert total_us / 1000 < SUMMARY_IMPORT_BUDGET_MS, (
+        f"borax imports took {total_us / 1000:.0f} ms, budget "
+        f"{SUMMARY_IMPORT_BUDGET_MS:.0f} ms (raise with BORAX_IMPORT_BUDGET_MS)"
+    )
+
+
+def test_cli_batch_size_default_matches_exporter():
+    from borax import bibtex_exporter, cli
+
+    assert cli.DEFAULT_BATCH_SIZE == bibtex_exporter.DEFAULT_BATCH_SIZE
@@ -1,5 +1,34 @@
+import json
+
+
 def test_cli_summary(run_cli, sample_library):
     stdout, stderr, code = run_cli("summary", str(sample_library))
     assert code == 0
     assert "processed files" in stdout.lower()
     assert "bibtex entries" in stdout.lower()
+
+
+def test_cli_summary_profile(run_cli, sample_library, tmp_path):
+    metrics = tmp_path / "metrics.ndjson"
+    _, stderr, code = run_cli(
+        "summary", str(sample_library), "--profile", "--profile-json", str(metrics)
+    )
+    assert code == 0
+    assert "=== Profile: summary ===" in stderr
+    assert "history.load" in stderr
+    lines = [json.loads(line) for line in metrics.read_text().splitlines()]
+    assert lines[0]["type"] == "run" and lines[0]["command"] == "summary"
+    assert any(line.get("stage") == "history.load" for line in lines[1:])
+
+
+def test_extra_libraries_are_rejected_outside_batch_commands(run_cli, sample_library):
+    _, stderr, code = run_cli("summary", str(sample_library), "other-lib")
+    assert code == 2
+    assert "unrecognized arguments for summary: other-lib" in stderr
+
+    _, stderr, code = run_cli("cache", "prune", str(sample_library), "x")
+    assert code == 2
+    assert "unrecognized arguments for cache: x" in stderr
+
+    _, _, code = run_cli("cache", "prune", str(sample_library))
+    assert code == 0
@@ -1,4 +1,5 @@
 import json
+import shutil
 
 
 def test_tag_dry_run(run_cli, sample_library):
@@ -11,3 +12,43 @@ def test_tag_dry_run(run_cli, sample_library):
     if history_path.exists():
         history = json.loads(history_path.read_text())
         assert history == {} or history == []
+
+
+def test_tag_dry_run_over_several_libraries(run_cli, sample_library):
+    second = sample_library.parent / "second"
+    shutil.copytree(sample_library, second)
+    (sample_library.parent / "borax-libraries.toml").write_text(
+        'libraries = ["library", "second"]\n'
+    )
+
+    stdout, stderr, code = run_cli("tag", str(sample_library.parent), "--dry-run")
+    assert code == 0, stderr
+    assert "Tagging 2 libraries" in stdout
+    assert stdout.index(f"at {sample_library}") < stdout.index(f"at {second}")
+    assert stdout.lower().count("would tag") == 2 * len(
+        list(sample_library.glob("*.pdf"))
+    )
+    assert "Tagging complete (2 libraries)" in stdout
+
+
+def test_tag_dry_run_leaves_sqlite_history_unchanged(
+    run_cli, sqlite_library, sqlite_records
+):
+    _, stderr, code = run_cli("tag", str(sqlite_library))
+    assert code == 0, stderr
+    before = sqlite_records()
+    assert before
+    # One moved and one new PDF for the dry run to report
+    (sqlite_library / "doc2.pdf").rename(sqlite_library / "renamed.pdf")
+    new = (sqlite_library / "doc1.pdf").read_bytes() + b"\n%new\n"
+    (sqlite_library / "new.pdf").write_bytes(new)
+
+    stdout, stderr, code = run_cli("tag", str(sqlite_library), "--dry-run")
+    assert code == 0, stderr
+    assert "new.pdf" in stdout and "moved from" in stdout
+    assert sqlite_records() == before
+
+    stdout, stderr, code = run_cli("tag", str(sqlite_library))
+    assert code == 0, stderr
+    assert "Skipping already-tagged file: new.pdf" not in stdout
+    assert str(sqlite_library / "new.pdf") in sqlite_records()
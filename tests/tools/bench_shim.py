@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Stand-in `exiftool`, `pdftotext` and `mdls` for the benchmark suite.
+
+`benchmark.py` installs one wrapper script per tool name that runs
+``python bench_shim.py <tool> <args...>``. The shims understand exactly the
+invocations Borax makes and the synthetic PDFs written by `benchmark.py`:
+
+- `pdftotext -layout FILE -` prints the strings drawn with `Tj` operators.
+- `mdls -name kMDItemUserTags FILE` prints the Finder tags stored in the
+  ``%BENCH-FINDER-TAGS:`` comment.
+- `exiftool -json FIELDS FILES...` reads the document Info dictionary and the
+  most recent ``%BENCH-XMP-Keywords:`` comment; keyword writes append such
+  a comment to the PDF (honouring `-preserve`). `-stay_open True -@ -`
+  sessions are supported.
+
+Environment variables:
+  BORAX_BENCH_CALL_LOG    append the tool name to this file per process start
+  BORAX_BENCH_LATENCY_MS  sleep this long per invocation (per request for
+                          stay-open ExifTool sessions)
+  BORAX_BENCH_REAL        when "1", log the call and exec the real tool found
+                          on PATH after BORAX_BENCH_SHIM_DIR
+  BORAX_BENCH_SHIM_DIR    directory holding the wrapper scripts
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+TJ_RE = re.compile(rb"\(((?:[^()\\]|\\.)*)\)\s*Tj")
+INFO_RE = re.compile(
+    rb"/(Title|Author|Subject|Keywords|Producer|Creator) \(((?:[^()\\]|\\.)*)\)"
+)
+FINDER_TAGS_MARK = b"%BENCH-FINDER-TAGS:"
+KEYWORDS_MARK = b"%BENCH-XMP-Keywords:"
+
+
+def _unescape(raw: bytes) -> str:
+    return re.sub(rb"\\(.)", rb"\1", raw).decode("latin-1")
+
+
+def _latency() -> None:
+    ms = float(os.environ.get("BORAX_BENCH_LATENCY_MS") or 0)
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+
+def _log_call(tool: str) -> None:
+    log = os.environ.get("BORAX_BENCH_CALL_LOG")
+    if not log:
+        return
+    fd = os.open(log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, f"{tool}\n".encode())
+    finally:
+        os.close(fd)
+
+
+def _exec_real(tool: str, args: list[str]) -> int:
+    """Replace this process with the real tool, skipping the shim directory."""
+    shim_dir = os.path.realpath(os.environ.get("BORAX_BENCH_SHIM_DIR", ""))
+    path = os.pathsep.join(
+        d
+        for d in os.environ.get("PATH", "").split(os.pathsep)
+        if d and os.path.realpath(d) != shim_dir
+    )
+    real = shutil.which(tool, path=path)
+    if real is None:
+        print(f"{tool}: real tool not found on PATH", file=sys.stderr)
+        return 127
+    os.execv(real, [real, *args])
+    return 127  # pragma: no cover - execv does not return
+
+
+def _last_line_value(data: bytes, mark: bytes) -> str | None:
+    pos = data.rfind(mark)
+    if pos < 0:
+        return None
+    end = data.find(b"\n", pos)
+    return data[pos + len(mark) : end if end >= 0 else None].strip().decode("utf-8")
+
+
+def pdftotext(args: list[str]) -> int:
+    files = [a for a in args if not a.startswith("-")]
+    if not files:
+        return 99
+    try:
+        data = Path(files[0]).read_bytes()
+    except OSError:
+        return 1
+    out = sys.stdout
+    for match in TJ_RE.finditer(data):
+        out.write(_unescape(match.group(1)))
+        out.write("\n")
+    out.flush()
+    return 0
+
+
+def mdls(args: list[str]) -> int:
+    files = [a for a in args if not a.startswith("-") and a != "kMDItemUserTags"]
+    try:
+        data = Path(files[0]).read_bytes()
+    except (IndexError, OSError):
+        return 1
+    tags = _last_line_value(data, FINDER_TAGS_MARK)
+    if tags:
+        quoted = ", ".join(f'"{t.strip()}"' for t in tags.split(",") if t.strip())
+        print(f"kMDItemUserTags = ({quoted})")
+    else:
+        print("kMDItemUserTags = (null)")
+    return 0
+
+
+def _read_tags(path: str, fields: list[str]) -> dict:
+    data = Path(path).read_bytes()
+    info = {m.group(1).decode(): _unescape(m.group(2)) for m in INFO_RE.finditer(data)}
+    keywords = _last_line_value(data, KEYWORDS_MARK)
+    if keywords is not None:
+        info["Keywords"] = keywords
+    rec = {"SourceFile": path}
+    for field in fields:
+        name = field.lstrip("-").split(":")[-1]
+        if name in info and info[name] != "":
+            rec[name] = info[name]
+    return rec
+
+
+def _exiftool_command(args: list[str]) -> tuple:
+    """Run one ExifTool command; return (stdout, exit status)."""
+    _latency()
+    if "-json" in args:
+        fields = [a for a in args if a.startswith("-") and a != "-json"]
+        files = [a for a in args if not a.startswith("-")]
+        records, status = [], 0
+        for path in files:
+            try:
+                records.append(_read_tags(path, fields))
+            except OSError:
+                status = 1
+        return (json.dumps(records, indent=2) + "\n" if records else ""), status
+    assignments = [a for a in args if a.startswith("-") and "=" in a]
+    files = [a for a in args if not a.startswith("-")]
+    updated = 0
+    for path in files:
+        keywords = ""
+        for assignment in assignments:
+            tag, value = assignment[1:].split("=", 1)
+            if tag.split(":")[-1] == "Keywords":
+                keywords = value
+        try:
+            st = os.stat(path)
+            with open(path, "ab") as f:
+                f.write(KEYWORDS_MARK + b" " + keywords.encode("utf-8") + b"\n")
+            if "-preserve" in args:
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            updated += 1
+        except OSError:
+            pass
+    status = 0 if updated == len(files) else 1
+    return f"    {updated} image files updated\n", status
+
+
+def exiftool(args: list[str]) -> int:
+    if args[:2] != ["-stay_open", "True"]:
+        out, status = _exiftool_command(args)
+        sys.stdout.write(out)
+        return status
+    pending = []
+    for line in sys.stdin:
+        arg = line.rstrip("\r\n")
+        if arg.startswith("-execute"):
+            out, _ = _exiftool_command(pending)
+            sys.stdout.write(f"{out}{{ready{arg[len('-execute') :]}}}\n")
+            sys.stdout.flush()
+            pending = []
+        elif pending == ["-stay_open"] and arg == "False":
+            return 0
+        else:
+            pending.append(arg)
+    return 0
+
+
+TOOLS = {"exiftool": exiftool, "pdftotext": pdftotext, "mdls": mdls}
+
+
+def main() -> int:
+    tool, args = sys.argv[1], sys.argv[2:]
+    _log_call(tool)
+    if os.environ.get("BORAX_BENCH_REAL") == "1":
+        return _exec_real(tool, args)
+    if tool != "exiftool":
+        _latency()
+    return TOOLS[tool](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
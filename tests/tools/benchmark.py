@@ -0,0 +1,802 @@
+#!/usr/bin/env python3
+"""Benchmark Borax CLI commands against synthetic libraries.
+
+Generates a library of N small PDFs (spread over folders named after
+vocabulary terms, with a matching `vocab.yaml`), runs CLI commands against it
+with either stand-in tool shims (`bench_shim.py`, with configurable latency)
+or the real `exiftool`/`pdftotext`/`mdls`, and writes files/sec, peak RSS
+and external-tool process counts to a JSON report. Two reports can be
+compared to spot regressions between commits.
+
+Usage (with Poetry):
+  poetry run python tests/tools/benchmark.py generate --out .bench/lib-1k \\
+      --files 1k
+  poetry run python tests/tools/benchmark.py run --library .bench/lib-1k \\
+      --files 1k --output .bench/1k.json
+  poetry run python tests/tools/benchmark.py compare base.json new.json \\
+      --max-regression 10
+  poetry run python tests/tools/benchmark.py hash --size-mb 256 --count 4
+
+`run` generates the library first when `--library` does not exist yet. Each
+run clears the library's history, bib and state directory, then runs the
+commands in order (default: scan, tag, bibtex, summary), so later commands
+see the results of earlier ones as in a real session. With `--tools real`
+the same wrappers are used to count processes but exec the real tools.
+
+`hash` measures checksum throughput (MB/s, best of `--repeat` passes over
+warm files) of every checksum algorithm available here on large PDFs: the
+given files, or generated ones with incompressible image-like streams.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SHIM = Path(__file__).resolve().parent / "bench_shim.py"
+TOOLS = ("exiftool", "pdftotext", "mdls")
+DEFAULT_COMMANDS = ("scan", "tag", "bibtex", "summary")
+PARAMS_FILE = ".bench.json"
+REPORT_VERSION = 1
+
+DOC_TYPES = ["Textbook", "Thesis", "Article", "Notes"]
+LEVELS = ["Introductory", "Graduate", "Advanced"]
+FILLER = [
+    "the",
+    "of",
+    "and",
+    "to",
+    "in",
+    "is",
+    "that",
+    "for",
+    "on",
+    "with",
+    "as",
+    "by",
+    "this",
+    "are",
+    "from",
+    "be",
+    "at",
+    "an",
+    "which",
+    "method",
+    "result",
+    "data",
+    "model",
+    "analysis",
+    "study",
+    "system",
+    "process",
+    "value",
+    "figure",
+    "table",
+    "section",
+    "chapter",
+    "example",
+    "theory",
+    "measure",
+    "sample",
+    "effect",
+    "approach",
+]
+SYLLABLES = [
+    "al",
+    "an",
+    "ar",
+    "bo",
+    "ca",
+    "chem",
+    "co",
+    "de",
+    "di",
+    "el",
+    "en",
+    "er",
+    "fi",
+    "ga",
+    "geo",
+    "hy",
+    "io",
+    "ka",
+    "la",
+    "li",
+    "lo",
+    "ma",
+    "mi",
+    "na",
+    "ne",
+    "no",
+    "or",
+    "pa",
+    "phy",
+    "po",
+    "ra",
+    "ri",
+    "ro",
+    "sa",
+    "se",
+    "si",
+    "ta",
+    "te",
+    "ti",
+    "to",
+    "ul",
+    "um",
+    "va",
+    "ve",
+    "xo",
+    "zy",
+]
+
+
+def parse_count(value: str) -> int:
+    """Parse counts like `1000`, `10k` or `1m`."""
+    value = value.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    digits = value[:-1] if scale != 1 else value
+    return int(float(digits) * scale)
+
+
+def _term(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).title()
+
+
+def make_vocab(rng: random.Random, terms: int) -> dict:
+    """Return a vocab with about `terms` discipline terms and keywords.
+
+    A quarter of the terms are disciplines/subfields/topics (used as folder
+    names); the rest are keywords scattered through the PDF texts.
+    """
+    names = set()
+    while len(names) < max(terms, 8):
+        names.add(_term(rng, rng.randint(2, 4)))
+    names = sorted(names)
+    rng.shuffle(names)
+    n_disc = max(len(names) // 4, 4)
+    disc_terms, keyword_terms = names[:n_disc], names[n_disc:]
+    disciplines = {}
+    for i in range(0, len(disc_terms), 8):
+        group = disc_terms[i : i + 8]
+        head, rest = group[0], group[1:]
+        disciplines[head] = {
+            "Subfields": {rest[j]: rest[j + 1 : j + 3] for j in range(0, len(rest), 3)}
+        }
+    keywords = {}
+    for i in range(0, len(keyword_terms), 25):
+        keywords[f"Group {i // 25 + 1}"] = [
+            k.lower() for k in keyword_terms[i : i + 25]
+        ]
+    return {
+        "Disciplines": disciplines,
+        "Document_Types": DOC_TYPES,
+        "Levels": LEVELS,
+        "Keywords": keywords,
+    }
+
+
+def _pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(
+    lines: list[str], info: dict, finder_tags: list[str] | None = None
+) -> bytes:
+    """Build a minimal valid PDF (with xref) drawing `lines` in Helvetica."""
+    per_page = 60
+    pages = [lines[i : i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+    objects = {1: None, 2: None}
+    font_id = 3
+    objects[font_id] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    kids = []
+    next_id = 4
+    for page_lines in pages:
+        ops = []
+        y = 800
+        for line in page_lines:
+            ops.append(f"BT /F1 10 Tf 50 {y} Td ({_pdf_string(line)}) Tj ET")
+            y -= 12
+        content = "\n".join(ops).encode("latin-1", errors="replace")
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        objects[content_id] = (
+            b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (font_id, content_id)
+        )
+        kids.append(page_id)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        len(kids),
+    )
+    info_id = next_id
+    objects[info_id] = (
+        b"<< "
+        + b" ".join(
+            b"/%s (%s)"
+            % (k.encode(), _pdf_string(v).encode("latin-1", errors="replace"))
+            for k, v in info.items()
+        )
+        + b" >>"
+    )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (info_id + 1)
+    for obj_id in range(1, info_id + 1):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\n" % (
+        info_id + 1,
+        info_id,
+    )
+    out += b"startxref\n%d\n%%%%EOF\n" % xref
+    if finder_tags:
+        out += b"%BENCH-FINDER-TAGS: " + ", ".join(finder_tags).encode() + b"\n"
+    return bytes(out)
+
+
+def write_large_pdf(path: Path, size: int) -> None:
+    """Write a valid one-page PDF of about `size` bytes.
+
+    The bulk is a random (incompressible) image XObject, like a scanned page.
+    """
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /XObject << /Im1 4 0 R >> >> >>"
+        ),
+    ]
+    data_len = max(size - 600, 0)
+    offsets = []
+    with open(path, "wb") as f:
+        f.write(header)
+        for obj_id, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+        offsets.append(f.tell())
+        f.write(
+            b"4 0 obj\n<< /Type /XObject /Subtype /Image /Width 1 /Height 1 "
+            b"/BitsPerComponent 8 /ColorSpace /DeviceGray /Length %d >>\nstream\n"
+            % data_len
+        )
+        remaining = data_len
+        while remaining:
+            chunk = os.urandom(min(remaining, 1 << 20))
+            f.write(chunk)
+            remaining -= len(chunk)
+        f.write(b"\nendstream\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 5\n0000000000 65535 f \n")
+        f.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+        f.write(b"trailer\n<< /Size 5 /Root 1 0 R >>\n")
+        f.write(b"startxref\n%d\n%%%%EOF\n" % xref)
+
+
+def hash_benchmark(paths, algorithms=None, repeat: int = 3) -> dict:
+    """Time `file_checksum` per algorithm over `paths`; return the report.
+
+    Each algorithm hashes all files `repeat` times and the fastest pass is
+    kept, so results reflect hashing and read overhead rather than disk
+    speed. Algorithms whose optional package is missing are skipped.
+    """
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from borax.core.utils import (
+        CHECKSUM_ALGORITHMS,
+        CHECKSUM_READ_SIZE,
+        checksum_available,
+        file_checksum,
+    )
+
+    paths = [Path(p) for p in paths]
+    total = sum(p.stat().st_size for p in paths)
+    results = []
+    for algorithm in algorithms or CHECKSUM_ALGORITHMS:
+        if not checksum_available(algorithm):
+            print(f"{algorithm:<8} (not installed)")
+            continue
+        best = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            for path in paths:
+                file_checksum(path, algorithm)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rate = total / 1e6 / best if best else None
+        results.append(
+            {"algorithm": algorithm, "seconds": round(best, 6), "mb_per_sec": rate}
+        )
+        print(f"{algorithm:<8} {best:>9.3f}s {rate or 0:>10.1f} MB/s")
+    return {
+        "version": REPORT_VERSION,
+        "commit": _git_commit(),
+        "created": _utc_now(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "files": len(paths),
+        "bytes": total,
+        "read_size": CHECKSUM_READ_SIZE,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _text_lines(rng: random.Random, chars: int, keywords: list[str]) -> list[str]:
+    lines, line, size = [], [], 0
+    while size < chars:
+        word = (
+            rng.choice(keywords)
+            if keywords and rng.random() < 0.03
+            else rng.choice(FILLER)
+        )
+        line.append(word)
+        size += len(word) + 1
+        if len(line) >= 12:
+            lines.append(" ".join(line))
+            line = []
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def generate_library(
+    out: Path,
+    files: int,
+    depth: int = 3,
+    text_chars: int = 4000,
+    vocab_terms: int = 400,
+    files_per_dir: int = 50,
+    seed: int = 0,
+    force: bool = False,
+) -> dict:
+    """Generate a synthetic library under `out` and return its parameters.
+
+    Folders are `depth` levels deep and named after discipline terms (with
+    underscores and casing variations so folder matching stays fuzzy).
+    Each PDF holds roughly `text_chars` characters of text; about one in ten
+    carries Finder tags for the `mdls` shim.
+    """
+    import yaml
+
+    if out.exists():
+        if not force:
+            raise SystemExit(f"{out} exists; pass --force to regenerate")
+        shutil.rmtree(out)
+    rng = random.Random(seed)
+    vocab = make_vocab(rng, vocab_terms)
+    folder_terms = []
+    for head, data in vocab["Disciplines"].items():
+        folder_terms.append(head)
+        for sub, topics in data["Subfields"].items():
+            folder_terms.append(sub)
+            folder_terms.extend(topics)
+    keywords = [k for group in vocab["Keywords"].values() for k in group]
+
+    out.mkdir(parents=True)
+    (out / "vocab.yaml").write_text(
+        yaml.safe_dump(vocab, sort_keys=False), encoding="utf-8"
+    )
+    (out / "borax-library.toml").write_text(
+        f'name = "Synthetic benchmark library ({files} PDFs)"\n'
+        'description = "Generated by tests/tools/benchmark.py"\n'
+        'vocab = "vocab.yaml"\n'
+        'history = "tag_history.json"\n'
+        'bib = "library.bib"\n',
+        encoding="utf-8",
+    )
+    dirs = set()
+    for n in range(files):
+        if n % files_per_dir == 0:
+            parts = []
+            for _ in range(depth):
+                term = rng.choice(folder_terms)
+                parts.append(
+                    term.lower().replace(" ", "_") if rng.random() < 0.5 else term
+                )
+            folder = out.joinpath(*parts)
+            folder.mkdir(parents=True, exist_ok=True)
+            dirs.add(folder)
+        finder_tags = None
+        if rng.random() < 0.1:
+            finder_tags = [rng.choice(DOC_TYPES), rng.choice(LEVELS)]
+        info = {
+            "Title": f"Synthetic Document {n}",
+            "Author": f"{_term(rng, 2)}, {_term(rng, 1)[0]}.",
+            "Subject": rng.choice(keywords) if keywords else "",
+        }
+        pdf = make_pdf(_text_lines(rng, text_chars, keywords), info, finder_tags)
+        (folder / f"doc{n:07d}.pdf").write_bytes(pdf)
+
+    params = {
+        "files": files,
+        "depth": depth,
+        "text_chars": text_chars,
+        "vocab_terms": vocab_terms,
+        "files_per_dir": files_per_dir,
+        "seed": seed,
+        "dirs": len(dirs),
+    }
+    (out / PARAMS_FILE).write_text(json.dumps(params, indent=2), encoding="utf-8")
+    return params
+
+
+def install_shims(bin_dir: Path) -> None:
+    """Write one wrapper script per tool that runs `bench_shim.py`."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for tool in TOOLS:
+        path = bin_dir / tool
+        path.write_text(
+            f'#!/bin/sh\nexec "{sys.executable}" "{SHIM}" {tool} "$@"\n',
+            encoding="utf-8",
+        )
+        path.chmod(0o755)
+
+
+def reset_library_state(library: Path) -> None:
+    """Remove history, bib and caches so every run starts cold."""
+    for name in ("tag_history.json", "tag_history.json.journal", "library.bib"):
+        (library / name).unlink(missing_ok=True)
+    shutil.rmtree(library / ".borax", ignore_errors=True)
+
+
+def _maxrss_kb(rusage) -> int:
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    if rusage is None:
+        return 0
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss // 1024
+    return rusage.ru_maxrss
+
+
+def _exitcode(status: int) -> int:
+    # `os.waitstatus_to_exitcode` needs Python 3.9
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _wait(proc: subprocess.Popen):
+    """Wait for `proc`; return its resource usage, or None if unavailable.
+
+    Peak RSS of a child comes from `os.wait4`, which only exists on POSIX;
+    elsewhere the report records 0.
+    """
+    if not hasattr(os, "wait4"):
+        proc.wait()
+        return None
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = _exitcode(status)
+    return rusage
+
+
+def run_command(
+    command: str, library: Path, extra: list[str], env: dict, call_log: Path
+) -> dict:
+    """Run one CLI command; return timing, peak RSS and tool process counts."""
+    call_log.write_text("", encoding="utf-8")
+    argv = [
+        sys.executable,
+        str(PROJECT_ROOT / "main.py"),
+        command,
+        str(library),
+        *extra,
+    ]
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=stderr, env=env)
+        rusage = _wait(proc)
+        seconds = time.perf_counter() - start
+        stderr.seek(0)
+        errors = stderr.read().decode("utf-8", errors="replace")
+    calls = call_log.read_text(encoding="utf-8").split()
+    return {
+        "command": command,
+        "args": extra,
+        "returncode": proc.returncode,
+        "seconds": round(seconds, 4),
+        "peak_rss_kb": _maxrss_kb(rusage),
+        "subprocesses": {tool: calls.count(tool) for tool in TOOLS},
+        "stderr": errors[-2000:],
+    }
+
+
+def _utc_now() -> str:
+    # `datetime.UTC` needs Python 3.11
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+
+def _git_commit() -> str | None:
+    try:
+        res = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return None
+    if res.returncode != 0:
+        return None
+    return res.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+
+def run_benchmark(
+    library: Path,
+    commands=DEFAULT_COMMANDS,
+    tools: str = "fake",
+    latency_ms: float = 0.0,
+    jobs: int = 1,
+) -> dict:
+    """Run `commands` in order against `library` and return the report."""
+    params = json.loads((library / PARAMS_FILE).read_text(encoding="utf-8"))
+    reset_library_state(library)
+    with tempfile.TemporaryDirectory(prefix="borax-bench-") as tmp:
+        bin_dir = Path(tmp) / "bin"
+        install_shims(bin_dir)
+        call_log = Path(tmp) / "calls.log"
+        env = dict(os.environ)
+        env.update(
+            PATH=f"{bin_dir}{os.pathsep}{env.get('PATH', '')}",
+            BORAX_BENCH_CALL_LOG=str(call_log),
+            BORAX_BENCH_LATENCY_MS=str(latency_ms),
+            BORAX_BENCH_REAL="1" if tools == "real" else "0",
+            BORAX_BENCH_SHIM_DIR=str(bin_dir),
+        )
+        results = []
+        for command in commands:
+            extra = ["--jobs", str(jobs)] if command in ("tag", "bibtex") else []
+            result = run_command(command, library, extra, env, call_log)
+            result["files"] = params["files"]
+            result["files_per_sec"] = (
+                round(params["files"] / result["seconds"], 2)
+                if result["seconds"]
+                else None
+            )
+            results.append(result)
+            print(
+                f"{command:<8} {result['seconds']:>9.2f}s "
+                f"{result['files_per_sec'] or 0:>10.1f} files/s "
+                f"{result['peak_rss_kb'] / 1024:>8.1f} MiB  "
+                + " ".join(f"{t}={n}" for t, n in result["subprocesses"].items())
+                + (
+                    ""
+                    if result["returncode"] == 0
+                    else f"  (exit {result['returncode']})"
+                )
+            )
+    return {
+        "version": REPORT_VERSION,
+        "commit": _git_commit(),
+        "created": _utc_now(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "tools": tools,
+        "latency_ms": latency_ms,
+        "jobs": jobs,
+        "library": params,
+        "results": results,
+    }
+
+
+def _keyed(report: dict) -> dict:
+    """Key results as `command`, `command#2`, ... in run order."""
+    keyed, seen = {}, {}
+    for result in report["results"]:
+        seen[result["command"]] = seen.get(result["command"], 0) + 1
+        n = seen[result["command"]]
+        keyed[result["command"] if n == 1 else f"{result['command']}#{n}"] = result
+    return keyed
+
+
+def compare_reports(
+    base: dict, new: dict, max_regression: float | None = None
+) -> list[str]:
+    """Print a comparison table; return commands slower than `max_regression` %."""
+    print(f"base: {base.get('commit')} ({base.get('created')})")
+    print(f"new:  {new.get('commit')} ({new.get('created')})")
+    for key in ("tools", "latency_ms", "jobs", "library"):
+        if base.get(key) != new.get(key):
+            print(f"warning: {key} differs: {base.get(key)} != {new.get(key)}")
+    print(
+        f"{'command':<10} {'base f/s':>10} {'new f/s':>10} {'change':>8} "
+        f"{'base MiB':>9} {'new MiB':>9} {'base procs':>10} {'new procs':>10}"
+    )
+    regressions = []
+    base_results, new_results = _keyed(base), _keyed(new)
+    for key, b in base_results.items():
+        n = new_results.get(key)
+        if n is None:
+            continue
+        b_fps, n_fps = b.get("files_per_sec") or 0, n.get("files_per_sec") or 0
+        change = (n_fps - b_fps) / b_fps * 100 if b_fps else 0.0
+        print(
+            f"{key:<10} {b_fps:>10.1f} {n_fps:>10.1f} {change:>+7.1f}% "
+            f"{b['peak_rss_kb'] / 1024:>9.1f} {n['peak_rss_kb'] / 1024:>9.1f} "
+            f"{sum(b['subprocesses'].values()):>10} "
+            f"{sum(n['subprocesses'].values()):>10}"
+        )
+        if max_regression is not None and change < -max_regression:
+            regressions.append(key)
+    return regressions
+
+
+def _add_library_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--files",
+        type=parse_count,
+        default=1000,
+        help="Number of PDFs (e.g. 1k, 10k, 100k)",
+    )
+    p.add_argument("--depth", type=int, default=3, help="Folder nesting depth")
+    p.add_argument(
+        "--text-chars", type=int, default=4000, help="Approximate text size per PDF"
+    )
+    p.add_argument(
+        "--vocab-terms", type=int, default=400, help="Approximate vocabulary size"
+    )
+    p.add_argument("--files-per-dir", type=int, default=50, help="PDFs per leaf folder")
+    p.add_argument("--seed", type=int, default=0, help="Random seed")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse CLI arguments for the benchmark suite."""
+    p = argparse.ArgumentParser(
+        description="Benchmark Borax against synthetic libraries"
+    )
+    sub = p.add_subparsers(dest="action", required=True)
+
+    gen = sub.add_parser("generate", help="Generate a synthetic library")
+    gen.add_argument(
+        "--out", type=Path, required=True, help="Library directory to create"
+    )
+    gen.add_argument(
+        "--force", action="store_true", help="Replace an existing directory"
+    )
+    _add_library_args(gen)
+
+    run = sub.add_parser("run", help="Run CLI commands and write a JSON report")
+    run.add_argument(
+        "--library", type=Path, required=True, help="Library (generated if missing)"
+    )
+    run.add_argument("--output", type=Path, help="JSON report path")
+    run.add_argument(
+        "--tools",
+        choices=("fake", "real"),
+        default="fake",
+        help="Tool shims or real tools",
+    )
+    run.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Fake tool latency per call"
+    )
+    run.add_argument(
+        "--jobs", type=int, default=1, help="--jobs passed to tag and bibtex"
+    )
+    run.add_argument(
+        "--commands",
+        default=",".join(DEFAULT_COMMANDS),
+        help="Comma-separated commands to run in order (default: %(default)s)",
+    )
+    _add_library_args(run)
+
+    cmp_ = sub.add_parser("compare", help="Compare two JSON reports")
+    cmp_.add_argument("base", type=Path)
+    cmp_.add_argument("new", type=Path)
+    cmp_.add_argument(
+        "--max-regression",
+        type=float,
+        metavar="PCT",
+        help="Exit non-zero if files/sec drops by more than PCT percent",
+    )
+
+    hash_ = sub.add_parser("hash", help="Compare checksum algorithm throughput")
+    hash_.add_argument(
+        "pdfs", nargs="*", type=Path, help="PDFs to hash (default: generated)"
+    )
+    hash_.add_argument(
+        "--size-mb", type=float, default=256, help="Size of each generated PDF"
+    )
+    hash_.add_argument("--count", type=int, default=2, help="PDFs to generate")
+    hash_.add_argument("--repeat", type=int, default=3, help="Passes per algorithm")
+    hash_.add_argument(
+        "--algorithms", default="", help="Comma-separated algorithms (default: all)"
+    )
+    hash_.add_argument("--output", type=Path, help="JSON report path")
+    return p.parse_args(argv)
+
+
+def _write_report(report: dict, output: Path | None) -> None:
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {output}")
+
+
+def main(argv=None) -> int:
+    """CLI entrypoint: generate, run or compare benchmarks."""
+    args = parse_args(argv)
+    if args.action == "hash":
+        algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+        with tempfile.TemporaryDirectory(prefix="borax-hash-") as tmp:
+            paths = list(args.pdfs)
+            if not paths:
+                for i in range(args.count):
+                    paths.append(Path(tmp) / f"large-{i}.pdf")
+                    write_large_pdf(paths[-1], int(args.size_mb * 1024 * 1024))
+            report = hash_benchmark(paths, algorithms or None, repeat=args.repeat)
+        _write_report(report, args.output)
+        return 0
+    if args.action == "compare":
+        base = json.loads(args.base.read_text(encoding="utf-8"))
+        new = json.loads(args.new.read_text(encoding="utf-8"))
+        regressions = compare_reports(base, new, args.max_regression)
+        if regressions:
+            print(f"regressed: {', '.join(regressions)}")
+            return 1
+        return 0
+
+    lib_args = {
+        "files": args.files,
+        "depth": args.depth,
+        "text_chars": args.text_chars,
+        "vocab_terms": args.vocab_terms,
+        "files_per_dir": args.files_per_dir,
+        "seed": args.seed,
+    }
+    if args.action == "generate":
+        params = generate_library(args.out, force=args.force, **lib_args)
+        print(
+            f"Generated {params['files']} PDFs in {params['dirs']} folders "
+            f"under {args.out}"
+        )
+        return 0
+
+    if not (args.library / PARAMS_FILE).exists():
+        params = generate_library(args.library, **lib_args)
+        print(
+            f"Generated {params['files']} PDFs in {params['dirs']} folders "
+            f"under {args.library}"
+        )
+    commands = [c.strip() for c in args.commands.split(",") if c.strip()]
+    report = run_benchmark(
+        args.library,
+        commands,
+        tools=args.tools,
+        latency_ms=args.latency_ms,
+        jobs=args.jobs,
+    )
+    _write_report(report, args.output)
+    return 0 if all(r["returncode"] == 0 for r in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,72 @@
+from collections import Counter
 from pathlib import Path
 import sys
 
+import pytest
+
 # Ensure project root is importable for `import borax` in unit tests
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+
+@pytest.fixture
+def make_library():
+    """Return `make(root, count=12)` to write a small PDF library.
+
+    The PDFs are named `doc00.pdf`, `doc01.pdf`, ... and alternate between
+    the `Chemistry/` and `Organic/` folders; `make` returns a matching vocab.
+    """
+
+    def make(root: Path, count: int = 12) -> dict:
+        for i in range(count):
+            folder = root / ("Organic" if i % 2 else "Chemistry")
+            folder.mkdir(exist_ok=True)
+            (folder / f"doc{i:02d}.pdf").write_bytes(f"%PDF-1.4 {i}".encode())
+        return {
+            "Disciplines": {"Chemistry": {"Subfields": {"Organic": []}}},
+            "Document_Types": ["Textbook"],
+            "Levels": ["Graduate"],
+            "Keywords": {"Core": ["acid", "base"]},
+        }
+
+    return make
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    """Stub pdftotext, ExifTool and Finder tags for tagging and processing.
+
+    Each PDF's text names a DOI derived from its file name; every third
+    `docNN.pdf` only mentions "acid". Returns a `Counter` of text
+    extractions, metadata reads and checksums made by `processing`.
+    """
+    from borax import processing, tagging
+
+    calls = Counter()
+
+    def fake_text(path):
+        calls["pdftotext"] += 1
+        number = path.stem[3:]
+        one_keyword = number.isdigit() and int(number) % 3 == 0
+        yield f"doi: 10.1000/doc{number}. " + (
+            "acid acid" if one_keyword else "acid acid base base"
+        )
+        return True
+
+    def fake_read(path, *fields):
+        calls["exiftool_read"] += 1
+        return {"Title": "Acids", "Author": "Doe"}
+
+    def fake_checksum(path, *args):
+        calls["checksum"] += 1
+        return tagging.file_checksum(path, *args)
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", fake_text)
+    monkeypatch.setattr(tagging, "get_macos_tags", lambda p: [])
+    monkeypatch.setattr(tagging, "exiftool_read_json", lambda *a, **k: {})
+    monkeypatch.setattr(tagging, "exiftool_write_keywords", lambda *a, **k: None)
+    monkeypatch.setattr(processing, "get_macos_tags", lambda p: [])
+    monkeypatch.setattr(processing, "exiftool_read_json", fake_read)
+    monkeypatch.setattr(processing, "file_checksum", fake_checksum)
+    return calls
@@ -1,4 +1,7 @@
+import json
+
 from borax import bibtex_exporter
+from borax.core import utils
 
 
 def test_make_bibtex_entry_basic_fields(tmp_path):
@@ -25,3 +28,149 @@ def test_make_bibtex_entry_basic_fields(tmp_path):
     assert "isbn      = {1234567890}" in entry
     assert "doi       = {10.1000/xyz}" in entry
     assert f"file      = {{{pdf}}}" in entry
+
+
+def test_extract_metadata_batch_maps_by_source_file(tmp_path, monkeypatch):
+    pdfs = [tmp_path / f"doc{i}.pdf" for i in range(3)]
+    calls = []
+
+    def fake_run_exiftool(*args, check=True):
+        calls.append(args)
+        # Out of order, and doc1 failed to read
+        return json.dumps(
+            [
+                {"SourceFile": str(pdfs[2]), "Title": "Third"},
+                {"SourceFile": str(pdfs[0]), "Title": "First"},
+            ]
+        )
+
+    monkeypatch.setattr(utils, "run_exiftool", fake_run_exiftool)
+    metas = bibtex_exporter.extract_metadata_batch(pdfs)
+
+    assert len(calls) == 1
+    assert metas[pdfs[0]]["Title"] == "First"
+    assert metas[pdfs[1]] == {}
+    assert metas[pdfs[2]]["Title"] == "Third"
+
+
+def test_extract_metadata_batch_isolates_unparseable_output(tmp_path, monkeypatch):
+    pdfs = [tmp_path / "good.pdf", tmp_path / "bad.pdf"]
+
+    def fake_run_exiftool(*args, check=True):
+        if len(args) > len(bibtex_exporter.EXIF_FIELDS) + 2:
+            return "not json"
+        path = args[-1]
+        if path.endswith("bad.pdf"):
+            return None
+        return json.dumps([{"SourceFile": path, "Title": "Good"}])
+
+    monkeypatch.setattr(utils, "run_exiftool", fake_run_exiftool)
+    metas = bibtex_exporter.extract_metadata_batch(pdfs)
+
+    assert metas[pdfs[0]]["Title"] == "Good"
+    assert metas[pdfs[1]] == {}
+
+
+def test_bib_index_dedupes_by_exact_path_doi_and_isbn(tmp_path):
+    bib = tmp_path / "library.bib"
+    short = tmp_path / "a.pdf"
+    long = tmp_path / "aa.pdf"
+    _, entry = bibtex_exporter.make_bibtex_entry(
+        long, {"Title": "Long", "Author": "Doe", "PDF:DOI": "10.1/ABC"}
+    )
+    bib.write_text(entry, encoding="utf-8")
+
+    index = bibtex_exporter.BibIndex.load(bib)
+    assert index.has_file(long)
+    # A path that is a substring of an indexed path is not a duplicate
+    assert not index.has_file(short)
+
+    _, same_doi = bibtex_exporter.make_bibtex_entry(
+        short, {"Title": "Other", "Author": "Roe", "PDF:DOI": "doi:10.1/abc"}
+    )
+    assert not bibtex_exporter.append_to_bib(bib, short, same_doi, index=index)
+
+    _, by_isbn = bibtex_exporter.make_bibtex_entry(
+        short, {"Title": "Book", "Author": "Roe", "PDF:ISBN": "0-306-40615-2"}
+    )
+    assert bibtex_exporter.append_to_bib(bib, short, by_isbn, index=index)
+    _, same_isbn = bibtex_exporter.make_bibtex_entry(
+        tmp_path / "b.pdf", {"Title": "Book", "PDF:ISBN": "0306406152"}
+    )
+    assert not bibtex_exporter.append_to_bib(
+        bib, tmp_path / "b.pdf", same_isbn, index=index
+    )
+    # The file being exported is checked too, not just the entry's fields
+    _, new_entry = bibtex_exporter.make_bibtex_entry(
+        tmp_path / "c.pdf", {"Title": "New", "Author": "Poe"}
+    )
+    assert not bibtex_exporter.append_to_bib(bib, long, new_entry, index=index)
+
+    # Nothing is written until the index is flushed
+    assert bib.read_text(encoding="utf-8") == entry
+    assert index.flush(bib) == 1
+    assert str(short) in bib.read_text(encoding="utf-8")
+
+
+def test_bib_index_suffixes_colliding_keys(tmp_path):
+    bib = tmp_path / "library.bib"
+    index = bibtex_exporter.BibIndex.load(bib)
+    meta = {"Title": "Notes", "Author": "Doe", "PDF:PublicationYear": "2001"}
+    keys = []
+    for name in ("one", "two", "three"):
+        pdf = tmp_path / f"{name}.pdf"
+        key, entry = bibtex_exporter.make_bibtex_entry(pdf, meta)
+        keys.append(index.add(entry))
+    index.flush(bib)
+
+    assert keys == [key, key + "a", key + "b"]
+    reloaded = bibtex_exporter.BibIndex.load(bib)
+    assert reloaded.keys == set(keys)
+    assert reloaded.entries == 3
+
+
+def test_export_all_to_bib_writes_once_and_skips_known_files(tmp_path, monkeypatch):
+    library = tmp_path / "lib"
+    (library / "Chemistry").mkdir(parents=True)
+    for i in range(5):
+        (library / "Chemistry" / f"doc{i}.pdf").write_bytes(b"%PDF-1.4")
+    bib = tmp_path / "library.bib"
+    read = []
+
+    def fake_batch(paths):
+        read.extend(paths)
+        return {p: {"Title": p.stem, "Author": "Doe"} for p in paths}
+
+    monkeypatch.setattr(bibtex_exporter, "extract_metadata_batch", fake_batch)
+    monkeypatch.setattr(bibtex_exporter, "enrich_metadata", lambda meta, **kw: meta)
+
+    assert bibtex_exporter.export_all_to_bib(library, bib, batch_size=2) == 5
+    assert len(read) == 5
+    assert bib.read_text(encoding="utf-8").count("@misc{") == 5
+
+    read.clear()
+    assert bibtex_exporter.export_all_to_bib(library, bib) == 0
+    assert read == []
+
+
+def test_list_valued_identifier_is_enriched_by_its_first_string(tmp_path, monkeypatch):
+    library = tmp_path / "lib"
+    library.mkdir()
+    metas = {
+        "bag": {"Author": "Doe", "XMP:Identifier": ["doi:10.1000/ABC", "urn:x"]},
+        "numbers": {"Author": "Roe", "XMP:Identifier": [42]},
+    }
+    for name in metas:
+        (library / f"{name}.pdf").write_bytes(b"%PDF-1.4")
+    looked_up = []
+    monkeypatch.setattr(
+        bibtex_exporter,
+        "extract_metadata_batch",
+        lambda paths: {p: dict(metas[p.stem]) for p in paths},
+    )
+    monkeypatch.setattr(
+        bibtex_exporter, "fetch_from_doi", lambda doi, **kw: looked_up.append(doi) or {}
+    )
+
+    assert bibtex_exporter.export_all_to_bib(library, tmp_path / "library.bib") == 2
+    assert looked_up == ["10.1000/abc"]
@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from borax.bibtex_exporter import http_client, metadata_fetcher  # noqa: E402
+from borax.bibtex_exporter.enrichment_cache import EnrichmentCache  # noqa: E402
+
+WORKS = {
+    "10.1000/known": {
+        "title": ["Known Work"],
+        "author": [{"family": "Doe", "given": "Jane"}],
+        "issued": {"date-parts": [[2001]]},
+        "publisher": "Example Press",
+    }
+}
+
+
+@pytest.fixture
+def crossref(monkeypatch):
+    """Serve CrossRef-style /works/<doi> responses from a local server."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            doi = self.path.split("/works/", 1)[1]
+            requests_seen.append(doi)
+            if doi == "10.1000/flaky":
+                status, body = 503, b""
+            elif doi in WORKS:
+                status = 200
+                body = json.dumps({"message": WORKS[doi]}).encode()
+            else:
+                status, body = 404, b"Resource not found."
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        metadata_fetcher,
+        "CROSSREF_URL",
+        f"http://127.0.0.1:{server.server_port}/works/",
+    )
+    # No retries, so every fetch maps to exactly one request
+    monkeypatch.setattr(
+        metadata_fetcher, "_default_client", http_client.HttpClient(max_retries=0)
+    )
+    yield requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_doi_lookups_hit_cache_after_first_fetch(tmp_path, crossref):
+    cache = EnrichmentCache(tmp_path / "enrichment.sqlite")
+
+    first = metadata_fetcher.fetch_from_doi("https://doi.org/10.1000/KNOWN", cache)
+    second = metadata_fetcher.fetch_from_doi("doi:10.1000/known", cache)
+
+    assert first["title"] == "Known Work"
+    assert first["author"] == "Doe, Jane"
+    assert second == first
+    assert crossref == ["10.1000/known"]
+
+    # Persisted across instances; refresh bypasses the cached result
+    cache.close()
+    cache = EnrichmentCache(tmp_path / "enrichment.sqlite")
+    metadata_fetcher.fetch_from_doi("10.1000/known", cache)
+    assert len(crossref) == 1
+    metadata_fetcher.fetch_from_doi("10.1000/known", cache, refresh=True)
+    assert len(crossref) == 2
+
+
+def test_not_found_is_cached_but_transient_errors_are_not(tmp_path, crossref):
+    cache = EnrichmentCache(tmp_path / "enrichment.sqlite")
+
+    assert metadata_fetcher.fetch_from_doi("10.1000/missing", cache) == {}
+    assert metadata_fetcher.fetch_from_doi("10.1000/missing", cache) == {}
+    assert crossref.count("10.1000/missing") == 1
+    assert cache.get("doi", "10.1000/missing") == {}
+
+    assert metadata_fetcher.fetch_from_doi("10.1000/flaky", cache) == {}
+    assert metadata_fetcher.fetch_from_doi("10.1000/flaky", cache) == {}
+    assert crossref.count("10.1000/flaky") == 2
+    assert cache.get("doi", "10.1000/flaky") is None
+
+
+def test_cache_entries_expire_after_ttl(tmp_path):
+    cache = EnrichmentCache(
+        tmp_path / "enrichment.sqlite", ttl_seconds=100, negative_ttl_seconds=10
+    )
+    cache.put("doi", "10.1/a", {"title": "A"}, now=1000)
+    cache.put("doi", "10.1/b", {}, now=1000)
+
+    assert cache.get("doi", "10.1/a", now=1050) == {"title": "A"}
+    assert cache.get("doi", "10.1/b", now=1005) == {}
+    assert cache.get("doi", "10.1/b", now=1050) is None
+    assert cache.get("doi", "10.1/a", now=1200) is None
+    assert cache.clear() == 2
@@ -0,0 +1,116 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+from borax.core import utils
+
+FAKE_EXIFTOOL = textwrap.dedent(
+    """\
+    import json, os, sys
+
+    def log(msg):
+        with open(os.environ["FAKE_EXIFTOOL_LOG"], "a") as f:
+            f.write(msg + "\\n")
+
+    def run(args):
+        path = args[-1]
+        sidecar = path + ".kw"
+        for a in args:
+            if a.startswith("-XMP-pdf:Keywords="):
+                with open(sidecar, "w") as f:
+                    f.write(a.split("=", 1)[1])
+                return ""
+        rec = {"SourceFile": path}
+        if os.path.exists(sidecar):
+            rec["XMP-pdf:Keywords"] = open(sidecar).read()
+        return json.dumps([rec]) + "\\n"
+
+    argv = sys.argv[1:]
+    log("spawn " + argv[0])
+    if argv[:2] == ["-stay_open", "True"]:
+        if os.environ.get("FAKE_EXIFTOOL_BROKEN"):
+            sys.exit(1)
+        args = []
+        for line in sys.stdin:
+            line = line.rstrip("\\n")
+            if line.startswith("-execute"):
+                sys.stdout.write(run(args) + "{ready%s}\\n" % line[8:])
+                sys.stdout.flush()
+                args = []
+            elif line == "False" and args == ["-stay_open"]:
+                break
+            else:
+                args.append(line)
+    else:
+        sys.stdout.write(run(argv))
+    """
+)
+
+
+@pytest.fixture
+def fake_exiftool(tmp_path, monkeypatch):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    script = bindir / "exiftool"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_EXIFTOOL)
+    script.chmod(0o755)
+    log = tmp_path / "exiftool.log"
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_EXIFTOOL_LOG", str(log))
+    monkeypatch.setattr(utils, "_SESSIONS", utils._SessionPool())
+    yield log
+    utils.close_exiftool_sessions()
+
+
+def test_session_is_reused_across_reads_and_writes(tmp_path, fake_exiftool):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    utils.exiftool_write_keywords(str(pdf), ["acid", "base", "acid"])
+    meta = utils.exiftool_read_json(str(pdf), "-XMP-pdf:Keywords")
+    assert meta["XMP-pdf:Keywords"] == "acid; base"
+    assert utils.exiftool_read_json(str(pdf), "-XMP-pdf:Keywords") == meta
+
+    spawns = fake_exiftool.read_text().splitlines()
+    assert spawns == ["spawn -stay_open"]
+
+
+def test_broken_session_falls_back_to_one_shot(tmp_path, fake_exiftool, monkeypatch):
+    monkeypatch.setenv("FAKE_EXIFTOOL_BROKEN", "1")
+    pdf = tmp_path / "b.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    utils.exiftool_write_keywords(str(pdf), ["organic"])
+    meta = utils.exiftool_read_json(str(pdf), "-XMP-pdf:Keywords")
+    assert meta["XMP-pdf:Keywords"] == "organic"
+    assert "spawn -XMP-pdf:Keywords=organic" in fake_exiftool.read_text()
+
+    for _ in range(5):
+        utils.exiftool_read_json(str(pdf), "-XMP-pdf:Keywords")
+    spawns = fake_exiftool.read_text().splitlines()
+    assert spawns.count("spawn -stay_open") == utils._SessionPool.MAX_FAILURES
+
+
+@pytest.mark.parametrize(
+    "name", ["new\nline.pdf", os.fsdecode(b"caf\xe9.pdf")], ids=["newline", "bytes"]
+)
+def test_unframable_paths_use_one_shot_and_keep_the_session(
+    tmp_path, fake_exiftool, name
+):
+    good = tmp_path / "good.pdf"
+    good.write_bytes(b"%PDF-1.4")
+    bad = os.path.join(str(tmp_path), name)
+    with open(os.fsencode(bad), "wb") as f:
+        f.write(b"%PDF-1.4")
+
+    assert utils.exiftool_read_json(str(good))["SourceFile"] == str(good)
+    for _ in range(utils._SessionPool.MAX_FAILURES + 1):
+        assert utils.exiftool_read_json(bad)["SourceFile"] == bad
+    assert utils.exiftool_read_json(str(good))["SourceFile"] == str(good)
+
+    assert not utils._SESSIONS.disabled
+    spawns = fake_exiftool.read_text().splitlines()
+    assert spawns.count("spawn -stay_open") == 1
+    assert spawns.count("spawn -json") == utils._SessionPool.MAX_FAILURES + 1
@@ -0,0 +1,51 @@
+import random
+import string
+from difflib import get_close_matches
+
+from borax.tagging import match_vocab_terms
+from borax.tagging.folder_matcher import FolderMatcher
+
+
+def _mutate(rng, word):
+    chars = list(word)
+    for _ in range(rng.randint(0, 3)):
+        op = rng.choice("sdi")
+        pos = rng.randrange(len(chars) + 1)
+        if op == "i" or not chars:
+            chars.insert(pos, rng.choice(string.ascii_lowercase + " "))
+        elif op == "d":
+            del chars[min(pos, len(chars) - 1)]
+        else:
+            chars[min(pos, len(chars) - 1)] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def test_matches_equal_get_close_matches():
+    rng = random.Random(15)
+    words = [
+        "".join(rng.choice("abcdeilmnorst") for _ in range(rng.randint(1, 12)))
+        for _ in range(300)
+    ]
+    terms = sorted({w.title() for w in words} | {"Organic Chemistry", "Abcd"})
+    matcher = FolderMatcher(terms)
+    parts = [_mutate(rng, rng.choice(words)) for _ in range(2000)]
+    parts += ["abxd", "organic_chemistry", "2021", "papers", ""]
+
+    for part in parts:
+        expected = get_close_matches(
+            part.replace("_", " ").title(), terms, n=1, cutoff=0.75
+        )
+        assert matcher.match(part) == (expected[0] if expected else None), part
+
+
+def test_match_vocab_terms_memoizes_per_part():
+    matcher = FolderMatcher(["Chemistry", "Physics"])
+    calls = []
+    original = matcher._best
+    matcher._best = lambda word: calls.append(word) or original(word)
+
+    for _ in range(3):
+        assert match_vocab_terms(["chemistry", "papers"], matcher) == ["Chemistry"]
+    assert calls == ["Chemistry", "Papers"]
+    # Plain iterables still work
+    assert match_vocab_terms(["physic"], ["Chemistry", "Physics"]) == ["Physics"]
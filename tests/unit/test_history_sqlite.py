@@ -0,0 +1,109 @@
+import json
+import os
+import sqlite3
+
+from borax import history_tracker
+from borax.core.history_sqlite import SQLiteHistory
+from borax.core.library_config import load_library_config
+
+
+def test_sqlite_history_supports_tracker_api(tmp_path):
+    db = tmp_path / "tag_history.sqlite"
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"version 1")
+    os.utime(pdf, ns=(10**9, 10**9))
+
+    history = history_tracker.load_history(db)
+    assert isinstance(history, SQLiteHistory)
+    history_tracker.record_original(pdf, history, tags=["Organic"])
+    history_tracker.update_modified_checksum(pdf, history, tags=["Organic", "acid"])
+    history_tracker.save_history(db, history)
+    history.close()
+
+    reloaded = history_tracker.load_history(db)
+    assert len(reloaded) == 1
+    assert reloaded[str(pdf)]["tags"] == ["Organic", "acid"]
+    assert history_tracker.already_processed(pdf, reloaded) is True
+
+    pdf.write_bytes(b"version 2")
+    assert history_tracker.already_processed(pdf, reloaded) is False
+
+    summary = history_tracker.library_summary(tmp_path, db, tmp_path / "x.bib")
+    assert summary["processed"] == 1
+    assert summary["topics"] == 2
+
+
+def test_json_history_is_migrated_once(tmp_path):
+    legacy = tmp_path / "tag_history.json"
+    legacy.write_text(
+        json.dumps({"/lib/a.pdf": {"original_checksum": "abc", "tags": ["x"]}})
+    )
+    db = tmp_path / "tag_history.sqlite"
+
+    history = history_tracker.load_history(db)
+    assert history["/lib/a.pdf"]["tags"] == ["x"]
+    history["/lib/b.pdf"] = {"original_checksum": "def", "tags": []}
+    history.close()
+
+    # A second load must not re-import (and overwrite) from the JSON file
+    legacy.write_text("{}")
+    assert sorted(history_tracker.load_history(db)) == ["/lib/a.pdf", "/lib/b.pdf"]
+
+
+def test_manifest_selects_sqlite_backend(tmp_path):
+    (tmp_path / "borax-library.toml").write_text(
+        'name = "L"\nhistory = "tag_history.json"\nhistory_backend = "sqlite"\n'
+    )
+    config = load_library_config(str(tmp_path))
+    assert config.history_backend == "sqlite"
+    assert config.history_path == tmp_path / "tag_history.sqlite"
+
+
+def test_tag_counts_follow_upserts_and_deletes(tmp_path):
+    db = tmp_path / "tag_history.sqlite"
+    history = SQLiteHistory(db)
+    history["a"] = {"tags": ["x", "y", "x"]}
+    history.update_many({"b": {"tags": ["x"]}, "c": {"tags": []}})
+    assert history.stats() == {"processed": 3, "tags": {"x": 2, "y": 1}}
+
+    history["a"] = {"tags": ["z"]}
+    del history["b"]
+    assert history.stats() == {"processed": 2, "tags": {"z": 1}}
+    history.close()
+
+
+def test_tag_counts_are_rebuilt_for_older_databases(tmp_path):
+    db = tmp_path / "tag_history.sqlite"
+    history = SQLiteHistory(db)
+    history.update_many({"a": {"tags": ["x"]}, "b": {"tags": ["x", "y"]}})
+    # Simulate a database written before tag counts existed
+    with history._conn:
+        history._conn.execute("DELETE FROM tag_counts")
+        history._conn.execute("PRAGMA user_version = 0")
+    history.close()
+
+    summary = history_tracker.library_summary(tmp_path, db, tmp_path / "x.bib")
+    assert summary["tag_counts"] == {"x": 2, "y": 1}
+
+
+def test_checksum_algorithm_column_is_added_to_older_databases(tmp_path):
+    db = tmp_path / "tag_history.sqlite"
+    conn = sqlite3.connect(str(db))
+    conn.executescript(
+        "CREATE TABLE files (path TEXT PRIMARY KEY, original_checksum TEXT, "
+        "modified_checksum TEXT, record TEXT NOT NULL);"
+    )
+    record = {"original_checksum": "abc", "checksum_algorithm": "blake2b"}
+    conn.execute(
+        "INSERT INTO files VALUES (?, ?, ?, ?)",
+        ("/lib/a.pdf", "abc", None, json.dumps(record)),
+    )
+    conn.commit()
+    conn.close()
+
+    history = SQLiteHistory(db)
+    assert history.checksum_algorithms() == {"blake2b"}
+    history["/lib/b.pdf"] = {"original_checksum": "def"}
+    assert history.checksum_algorithms() == {"blake2b", None}
+    assert [path for path, _ in history.find_checksum("abc")] == ["/lib/a.pdf"]
+    history.close()
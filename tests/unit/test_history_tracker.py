@@ -1,4 +1,13 @@
+import hashlib
+import json
+import os
+
 from borax import history_tracker
+from borax.core.utils import (
+    QUICK_FINGERPRINT_BLOCK,
+    file_checksum,
+    quick_fingerprint,
+)
 
 
 def test_record_and_detect_already_processed(tmp_path):
@@ -39,3 +48,202 @@ def test_update_modified_and_library_summary(tmp_path):
     assert summary["processed"] == 2
     assert summary["topics"] == 2
     assert summary["bib_entries"] == 2
+
+
+def test_stat_fast_path_skips_hashing_unless_verify(tmp_path, monkeypatch):
+    pdf = tmp_path / "old.pdf"
+    pdf.write_bytes(b"content")
+    # Back-date the file so its stat is not considered racy
+    os.utime(pdf, ns=(1_000_000_000, 1_000_000_000))
+
+    history = history_tracker.record_original(pdf, {}, tags=["Chemistry"])
+    record = history[str(pdf)]
+    assert record["size"] == len(b"content")
+    assert record["mtime_ns"] == 1_000_000_000
+
+    calls = []
+    real_checksum = history_tracker.file_checksum
+
+    def counting_checksum(path, *args):
+        calls.append(path)
+        return real_checksum(path, *args)
+
+    monkeypatch.setattr(history_tracker, "file_checksum", counting_checksum)
+    assert history_tracker.already_processed(pdf, history) is True
+    assert calls == []
+
+    assert history_tracker.already_processed(pdf, history, verify=True) is True
+    assert calls == [pdf]
+
+
+def test_racy_stat_falls_back_to_checksum(tmp_path):
+    pdf = tmp_path / "fresh.pdf"
+    pdf.write_bytes(b"aaaa")
+    history = history_tracker.record_original(pdf, {})
+    mtime = pdf.stat().st_mtime_ns
+
+    # Same size, same inode, same mtime: only the checksum can tell them apart
+    pdf.write_bytes(b"bbbb")
+    os.utime(pdf, ns=(mtime, mtime))
+    assert history_tracker.already_processed(pdf, history) is False
+
+
+def test_journal_is_replayed_on_load(tmp_path):
+    history_path = tmp_path / "tag_history.json"
+    history_tracker.save_history(history_path, {"/lib/a.pdf": {"tags": ["a"]}})
+
+    history = history_tracker.load_history(history_path)
+    journal = history_tracker.HistoryJournal(history_path, history)
+    history["/lib/b.pdf"] = {"tags": ["b"]}
+    journal.record("/lib/b.pdf")
+    # Simulate a crash: the journal is never closed and its last line is torn
+    with open(history_tracker.journal_path(history_path), "a") as f:
+        f.write('{"path": "/lib/c.pdf", "rec')
+
+    resumed = history_tracker.load_history(history_path)
+    assert resumed == {"/lib/a.pdf": {"tags": ["a"]}, "/lib/b.pdf": {"tags": ["b"]}}
+
+
+def test_journal_checkpoints_and_cleans_up(tmp_path):
+    history_path = tmp_path / "tag_history.json"
+    history = {}
+    journal = history_tracker.HistoryJournal(history_path, history, checkpoint_every=2)
+    for name in ("a", "b", "c"):
+        history[name] = {"tags": [name]}
+        journal.record(name)
+
+    # Two records were checkpointed into the history file, one is journaled
+    assert sorted(json.loads(history_path.read_text())) == ["a", "b"]
+    assert len(history_tracker.journal_path(history_path).read_text().splitlines()) == 1
+
+    journal.close()
+    assert sorted(json.loads(history_path.read_text())) == ["a", "b", "c"]
+    assert not history_tracker.journal_path(history_path).exists()
+
+
+def test_legacy_sha256_record_is_upgraded_to_library_algorithm(tmp_path):
+    pdf = tmp_path / "test.pdf"
+    pdf.write_bytes(b"tagged content")
+    legacy = hashlib.sha256(b"tagged content").hexdigest()
+    # Written before records named their algorithm; the stat fields are stale
+    history = {
+        str(pdf): {
+            "original_checksum": hashlib.sha256(b"untagged").hexdigest(),
+            "modified_checksum": legacy,
+            "tags": ["Chemistry"],
+        }
+    }
+
+    assert history_tracker.already_processed(pdf, history) is True
+    assert history[str(pdf)]["modified_checksum"] == legacy
+    assert "checksum_algorithm" not in history[str(pdf)]
+
+    assert history_tracker.already_processed(pdf, history, algorithm="blake2b")
+    record = history[str(pdf)]
+    assert record["checksum_algorithm"] == "blake2b"
+    assert record["modified_checksum"] == file_checksum(pdf, "blake2b")
+    assert "original_checksum" not in record
+    assert record["tags"] == ["Chemistry"]
+    assert history_tracker.already_processed(pdf, history, verify=True) is True
+
+
+def test_records_store_their_checksum_algorithm(tmp_path):
+    pdf = tmp_path / "test.pdf"
+    pdf.write_bytes(b"content")
+    history = history_tracker.record_original(pdf, {}, algorithm="blake2b")
+    record = history[str(pdf)]
+    assert record["checksum_algorithm"] == "blake2b"
+    assert (
+        record["original_checksum"]
+        == hashlib.blake2b(b"content", digest_size=32).hexdigest()
+    )
+    assert history_tracker.already_processed(pdf, history, verify=True) is True
+
+    record["checksum_algorithm"] = "no-such-hash"
+    assert history_tracker.already_processed(pdf, history, verify=True) is False
+
+
+def test_quick_fingerprint_decides_before_full_checksum(tmp_path, monkeypatch):
+    block = QUICK_FINGERPRINT_BLOCK
+    content = bytearray(os.urandom(10 * block))
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(content)
+    history = history_tracker.record_original(pdf, {})
+    assert history[str(pdf)]["quick_fingerprint"] == quick_fingerprint(pdf)
+
+    calls = []
+    real_checksum = history_tracker.file_checksum
+
+    def counting_checksum(path, *args):
+        calls.append(path)
+        return real_checksum(path, *args)
+
+    monkeypatch.setattr(history_tracker, "file_checksum", counting_checksum)
+
+    # Restored from backup: new inode and mtime, same content
+    restored = tmp_path / "restored.pdf"
+    restored.write_bytes(content)
+    os.replace(restored, pdf)
+    assert history_tracker.already_processed(pdf, dict(history)) is True
+    assert calls == [pdf]
+
+    # A change in a sampled block is caught without the full checksum
+    calls.clear()
+    content[5 * block] ^= 0xFF
+    pdf.write_bytes(content)
+    assert history_tracker.already_processed(pdf, dict(history)) is False
+    assert calls == []
+
+    # A change outside the samples needs the full checksum to be found
+    content[5 * block] ^= 0xFF
+    content[2 * block] ^= 0xFF
+    pdf.write_bytes(content)
+    assert history_tracker.already_processed(pdf, dict(history)) is False
+    assert calls == [pdf]
+
+
+def test_prune_history_removes_vanished_files(tmp_path):
+    history_path = tmp_path / "tag_history.json"
+    kept, gone = tmp_path / "kept.pdf", tmp_path / "gone.pdf"
+    kept.write_bytes(b"kept")
+    gone.write_bytes(b"gone")
+    history = history_tracker.record_original(kept, {})
+    history = history_tracker.record_original(gone, history)
+    history_tracker.save_history(history_path, history)
+    gone.unlink()
+
+    assert history_tracker.prune_history(history_path, dry_run=True) == [str(gone)]
+    assert str(gone) in history_tracker.load_history(history_path)
+
+    assert history_tracker.prune_history(history_path) == [str(gone)]
+    assert list(history_tracker.load_history(history_path)) == [str(kept)]
+
+
+def test_journaled_removal_is_replayed(tmp_path):
+    history_path = tmp_path / "tag_history.json"
+    history_tracker.save_history(history_path, {"/lib/a.pdf": {"tags": ["a"]}})
+    history = history_tracker.load_history(history_path)
+    journal = history_tracker.HistoryJournal(history_path, history)
+    history["/lib/b.pdf"] = history.pop("/lib/a.pdf")
+    journal.record("/lib/a.pdf")
+    journal.record("/lib/b.pdf")
+
+    assert history_tracker.load_history(history_path) == {"/lib/b.pdf": {"tags": ["a"]}}
+
+
+def test_checksum_index_finds_records_by_content(tmp_path):
+    index = history_tracker.ChecksumIndex()
+    assert index.lookup("abc") is None
+    history = {
+        "/lib/a.pdf": {
+            "original_checksum": "orig",
+            "modified_checksum": "mod",
+            "tags": ["x"],
+        }
+    }
+    index.build(history)
+    assert index.lookup("orig") == ("/lib/a.pdf", ["x"], False)
+    assert index.lookup("mod") == ("/lib/a.pdf", ["x"], True)
+
+    index.add("/lib/b.pdf", {"modified_checksum": "mod", "tags": ["y"]})
+    assert index.lookup("mod") == ("/lib/b.pdf", ["y"], True)
@@ -0,0 +1,104 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from borax import bibtex_exporter  # noqa: E402
+from borax.bibtex_exporter import http_client, metadata_fetcher  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    """Local server answering from `responses[path]` (a list popped per hit)."""
+    state = {"responses": {}, "hits": Counter()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            state["hits"][self.path] += 1
+            queue = state["responses"].get(self.path) or [(404, {}, b"")]
+            status, headers, body = queue.pop(0) if len(queue) > 1 else queue[0]
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_port}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_token_bucket_spaces_out_acquisitions():
+    clock = {"now": 0.0}
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clock["now"] += seconds
+
+    bucket = http_client.TokenBucket(
+        2.0, burst=1, clock=lambda: clock["now"], sleep=sleep
+    )
+    for _ in range(3):
+        bucket.acquire()
+    assert sum(slept) == pytest.approx(1.0)
+
+    bucket.pause(5)
+    bucket.acquire()
+    assert clock["now"] >= 6.0
+
+
+def test_retry_after_header_parsing():
+    assert http_client.retry_after_seconds("3") == 3.0
+    assert http_client.retry_after_seconds(None) is None
+    assert http_client.retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert http_client.retry_after_seconds("soon") is None
+
+
+def test_client_retries_429_and_5xx_then_gives_up(server):
+    ok = (200, {}, b"ok")
+    server["responses"]["/limited"] = [(429, {"Retry-After": "0"}, b""), ok]
+    server["responses"]["/down"] = [(503, {}, b"")]
+    client = http_client.HttpClient(
+        host_rates={"127.0.0.1": 100.0}, max_retries=2, backoff_base=0.001
+    )
+
+    assert client.get(server["url"] + "/limited").status_code == 200
+    assert server["hits"]["/limited"] == 2
+    assert client.get(server["url"] + "/down").status_code == 503
+    assert server["hits"]["/down"] == 3
+    assert client.get(server["url"] + "/missing").status_code == 404
+    assert server["hits"]["/missing"] == 1
+    client.close()
+
+
+def test_enrich_many_looks_up_each_identifier_once(server, monkeypatch):
+    for i in range(4):
+        work = {"title": [f"Work {i}"], "publisher": "Example Press"}
+        body = json.dumps({"message": work}).encode()
+        server["responses"][f"/works/10.1000/{i}"] = [(200, {}, body)]
+    monkeypatch.setattr(metadata_fetcher, "CROSSREF_URL", server["url"] + "/works/")
+    metas = [{"PDF:DOI": f"10.1000/{i % 4}"} for i in range(8)]
+    metas.append({"Title": "No identifier"})
+    client = http_client.HttpClient()
+
+    enriched = bibtex_exporter.enrich_many(metas, jobs=4, client=client)
+
+    assert enriched == 8
+    assert all(server["hits"][f"/works/10.1000/{i}"] == 1 for i in range(4))
+    assert metas[5]["title"] == "Work 1"
+    assert "title" not in metas[8]
+    client.close()
@@ -0,0 +1,83 @@
+import random
+import re
+
+from borax import tagging
+from borax.tagging.keyword_matcher import KeywordMatcher
+
+KEYWORDS = [
+    "acid",
+    "acid base",
+    "base",
+    "ab ab",
+    "c++",
+    "+ve",
+    "x-ray",
+    "naïve",
+    "under_score",
+    "3d",
+    "é",
+    "a.b.",
+]
+
+
+def _reference_counts(text, keywords):
+    counts = {}
+    for kw in keywords:
+        n = len(re.findall(rf"\b{re.escape(kw)}\b", text))
+        if n:
+            counts[kw] = n
+    return counts
+
+
+def test_matcher_agrees_with_per_keyword_regex():
+    rng = random.Random(1234)
+    pieces = KEYWORDS + [" ", " ", "\n", "-", ".", "x", "_", "9", "acidic", "+"]
+    matcher = KeywordMatcher(KEYWORDS)
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+        assert matcher.count(text) == _reference_counts(text, KEYWORDS), text
+
+
+def test_overlapping_occurrences_of_one_keyword_are_not_double_counted():
+    matcher = KeywordMatcher(["ab ab", "ab"])
+    assert matcher.count("ab ab ab") == {"ab ab": 1, "ab": 3}
+
+
+def test_vocab_keyword_set_scores_like_plain_list():
+    vocab = {"Keywords": {"Core": ["Acid", "Base", "Acid Base"]}}
+    _, _, _, keywords = tagging.load_vocab_flat(vocab)
+    assert keywords.matcher is not None
+
+    text = "acid base. acid base buffer; acid " + "filler " * 400 + "base"
+    assert tagging.score_keywords_in_text(
+        text, keywords
+    ) == tagging.score_keywords_in_text(text, list(keywords))
+
+
+def test_chunked_counting_matches_whole_text():
+    rng = random.Random(99)
+    pieces = KEYWORDS + [" ", "\n", "-", "x", "acidic"]
+    matcher = KeywordMatcher(KEYWORDS)
+    for _ in range(200):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 200)))
+        counter = matcher.counter(head_size=50)
+        pos = 0
+        while pos < len(text):
+            step = rng.randint(1, 30)
+            counter.feed(text[pos : pos + step])
+            pos += step
+        assert counter.close() == _reference_counts(text, KEYWORDS), text
+        assert counter.head == text[:50]
+
+
+def test_oversized_token_is_cut_without_losing_matches(monkeypatch):
+    from borax.tagging.keyword_matcher import KeywordCounter
+
+    monkeypatch.setattr(KeywordCounter, "MAX_CARRY", 64)
+    monkeypatch.setattr(KeywordCounter, "CUT_SEARCH", 8)
+    text = "acid " + "x" * 500 + "acid base acid"
+    counter = KeywordMatcher(KEYWORDS).counter()
+    for i in range(0, len(text), 16):
+        counter.feed(text[i : i + 16])
+        assert len(counter._buf) <= 64 + 16
+    assert counter.close() == _reference_counts(text, KEYWORDS)
@@ -1,4 +1,14 @@
-from borax.core.library_config import merge_vocab
+import dataclasses
+
+import pytest
+
+from borax.core.library_config import (
+    DEFAULT_VOCAB_PATH_YAML,
+    LibraryConfig,
+    load_library_config,
+    merge_vocab,
+    resolve_library_paths,
+)
 
 
 def test_merge_vocab_unions_lists_and_merges_maps():
@@ -24,3 +34,88 @@ def test_merge_vocab_unions_lists_and_merges_maps():
     assert merged["Disciplines"]["Chemistry"]["Subfields"]["Organic"] == ["Synthesis"]
     assert set(merged["Keywords"]["Core"]) == {"theory", "methods", "simulation"}
     assert set(merged["Keywords"]["Extra"]) == {"appendix"}
+
+
+def test_checksum_algorithm_is_read_from_manifest(tmp_path):
+    (tmp_path / "borax-library.toml").write_text('name = "lib"\nchecksum = "BLAKE2b"\n')
+    assert load_library_config(str(tmp_path)).checksum_algorithm == "blake2b"
+
+    (tmp_path / "borax-library.toml").write_text('name = "lib"\nchecksum = "md5"\n')
+    with pytest.raises(ValueError, match="Unknown checksum 'md5'"):
+        load_library_config(str(tmp_path))
+
+
+def test_default_checksum_algorithm_is_sha256(tmp_path):
+    (tmp_path / "borax-library.toml").write_text('name = "lib"\n')
+    assert load_library_config(str(tmp_path)).checksum_algorithm == "sha256"
+
+
+def test_resolve_library_paths_expands_globs_and_library_lists(tmp_path):
+    groups = tmp_path / "groups"
+    for name in ("alpha", "beta", "gamma"):
+        (groups / name).mkdir(parents=True)
+        (groups / name / "borax-library.toml").write_text(f'name = "{name}"\n')
+    (groups / "notes").mkdir()
+    (tmp_path / "borax-libraries.toml").write_text(
+        'libraries = ["groups/gamma", "groups/*"]\n'
+    )
+
+    alpha, beta, gamma = (groups / n for n in ("alpha", "beta", "gamma"))
+    assert resolve_library_paths([str(groups / "*")]) == [alpha, beta, gamma]
+    # Listed order first, duplicates dropped; a directory holding the list works
+    assert resolve_library_paths([str(tmp_path), str(beta)]) == [gamma, alpha, beta]
+
+    with pytest.raises(FileNotFoundError, match="No borax-library"):
+        resolve_library_paths([str(groups / "notes")])
+    with pytest.raises(FileNotFoundError, match="No Borax libraries match"):
+        resolve_library_paths([str(groups / "x*")])
+
+
+def test_vocab_argument_seeds_the_lazy_vocab(tmp_path):
+    (tmp_path / "borax-library.toml").write_text('name = "Lib"\n', encoding="utf-8")
+    config = load_library_config(str(tmp_path))
+    fields = {
+        f.name: getattr(config, f.name) for f in dataclasses.fields(config) if f.compare
+    }
+    vocab = {"Keywords": {"Core": ["acid"]}}
+    seeded = LibraryConfig(**fields, vocab=vocab)
+    assert seeded.vocab is vocab
+    assert seeded.vocab_path == DEFAULT_VOCAB_PATH_YAML
+
+    loads = []
+    lazy = LibraryConfig(**fields, vocab_loader=lambda: loads.append(1) or vocab)
+    assert loads == []
+    assert lazy.vocab is vocab
+    assert lazy.vocab is vocab
+    assert loads == [1]
+
+
+def test_baseline_positional_constructor_still_works(tmp_path):
+    vocab = {"Keywords": {"Core": ["acid"]}}
+    config = LibraryConfig(
+        tmp_path,
+        "Lib",
+        "",
+        vocab,
+        tmp_path / "vocab.yaml",
+        tmp_path / "history.json",
+        tmp_path / "refs.bib",
+    )
+    assert config.vocab is vocab
+    assert config.vocab_path == tmp_path / "vocab.yaml"
+    assert config.history_path == tmp_path / "history.json"
+    assert config.bib_path == tmp_path / "refs.bib"
+
+
+def test_optional_settings_default_like_an_empty_manifest(tmp_path):
+    (tmp_path / "borax-library.toml").write_text('name = "Lib"\n', encoding="utf-8")
+    (tmp_path / "vocab.yaml").write_text(
+        "Keywords:\n  Core: [acid]\n", encoding="utf-8"
+    )
+    loaded = load_library_config(str(tmp_path))
+
+    config = LibraryConfig(tmp_path, "Lib", "", vocab_loader=loaded.vocab_loader)
+
+    assert config == loaded
+    assert config.vocab == loaded.vocab
+    assert config.vocab_path == loaded.vocab_path == tmp_path / "vocab.yaml"
@@ -0,0 +1,147 @@
+import json
+import os
+
+import pytest
+
+from borax import history_tracker
+from borax.bibtex_exporter.bib_index import BibIndex
+from borax.core.library_stats import (
+    count_bib_entries,
+    read_stats,
+    stats_path,
+    write_stats,
+)
+
+
+def _history(tmp_path):
+    return {
+        str(tmp_path / "a.pdf"): {"tags": ["Organic", "acid"]},
+        str(tmp_path / "b.pdf"): {"tags": ["Organic"]},
+    }
+
+
+def test_count_bib_entries_ignores_at_signs_in_fields():
+    text = (
+        "@comment{generated}\n"
+        "@article{key1,\n  title = {Reactions @ 300 K},\n"
+        "  note = {mail author@example.org},\n}\n"
+        "@string{jacs = {J. Am. Chem. Soc.}}\n"
+        "@book{key2, title = {On {@nested} braces}}\n"
+    )
+    assert text.count("@") == 7
+    assert count_bib_entries(text) == 2
+
+
+def test_summary_reads_sidecars_without_loading_history(tmp_path, monkeypatch):
+    history_path = tmp_path / "tag_history.json"
+    bib_path = tmp_path / "library.bib"
+    history_tracker.save_history(history_path, _history(tmp_path))
+    assert read_stats(history_path) == {
+        "processed": 2,
+        "tags": {"Organic": 2, "acid": 1},
+    }
+
+    index = BibIndex()
+    index.add("@article{key1,\n  title = {Reactions @ 300 K},\n}\n")
+    index.add("@book{key2,\n  title = {Second},\n}\n")
+    assert index.flush(bib_path) == 2
+    index.add("@book{key3,\n  title = {Third},\n}\n")
+    assert index.flush(bib_path) == 1
+    assert read_stats(bib_path) == {"entries": 3}
+
+    def no_load(*args):
+        raise AssertionError("history loaded")
+
+    monkeypatch.setattr(history_tracker, "load_history", no_load)
+    summary = history_tracker.library_summary(tmp_path, history_path, bib_path)
+    assert summary == {
+        "processed": 2,
+        "topics": 2,
+        "tag_counts": {"Organic": 2, "acid": 1},
+        "bib_entries": 3,
+    }
+
+
+def test_stale_sidecars_are_rebuilt(tmp_path):
+    history_path = tmp_path / "tag_history.json"
+    bib_path = tmp_path / "library.bib"
+    history_tracker.save_history(history_path, _history(tmp_path))
+    bib_path.write_text("@book{key1,\n  title = {One},\n}\n", encoding="utf-8")
+    write_stats(bib_path, {"entries": 7})
+
+    # Edited outside Borax: the recorded size no longer matches
+    history_path.write_text(json.dumps({"x.pdf": {"tags": ["New"]}}))
+    with open(bib_path, "a", encoding="utf-8") as f:
+        f.write("@book{key2,\n  title = {Two},\n}\n")
+    assert read_stats(history_path) is None
+    assert read_stats(bib_path) is None
+
+    summary = history_tracker.library_summary(tmp_path, history_path, bib_path)
+    assert summary["processed"] == 1
+    assert summary["tag_counts"] == {"New": 1}
+    assert summary["bib_entries"] == 2
+    assert read_stats(history_path)["processed"] == 1
+    assert read_stats(bib_path) == {"entries": 2}
+
+    # A flush on top of a file without valid counts drops the sidecar
+    os.utime(bib_path, ns=(10**9, 10**9))
+    index = BibIndex()
+    index.add("@book{key3,\n  title = {Three},\n}\n")
+    index.flush(bib_path)
+    assert not stats_path(bib_path).exists()
+    assert (
+        history_tracker.library_summary(tmp_path, history_path, bib_path)["bib_entries"]
+        == 3
+    )
+
+
+def test_flush_counts_entries_from_the_index(tmp_path):
+    bib_path = tmp_path / "library.bib"
+    bib_path.write_text(
+        "@book{key1,\n  title = {One},\n}\n@book{key2,\n  title = {Two},\n}\n",
+        encoding="utf-8",
+    )
+    assert not stats_path(bib_path).exists()
+
+    index = BibIndex.load(bib_path)
+    index.add("@book{key3,\n  title = {Three},\n}\n")
+    index.flush(bib_path)
+    assert read_stats(bib_path) == {"entries": 3}
+
+    # Edited since the index was loaded: its count can no longer be trusted
+    index.add("@book{key4,\n  title = {Four},\n}\n")
+    with open(bib_path, "a", encoding="utf-8") as f:
+        f.write("@book{key5,\n  title = {Five},\n}\n")
+    index.flush(bib_path)
+    assert not stats_path(bib_path).exists()
+
+
+def test_journaled_records_are_counted(tmp_path):
+    history_path = tmp_path / "tag_history.json"
+    history = _history(tmp_path)
+    history_tracker.save_history(history_path, history)
+
+    journal = history_tracker.HistoryJournal(history_path, history)
+    history[str(tmp_path / "c.pdf")] = {"tags": ["acid"]}
+    journal.record(tmp_path / "c.pdf")
+    summary = history_tracker.library_summary(
+        tmp_path, history_path, tmp_path / "library.bib"
+    )
+    assert summary["processed"] == 3
+    assert summary["tag_counts"] == {"Organic": 2, "acid": 2}
+    assert summary["bib_entries"] == 0
+
+    journal.close()
+    assert read_stats(history_path)["processed"] == 3
+
+
+@pytest.mark.parametrize("contents", ["not json", "[1, 2]"])
+def test_unreadable_sidecar_is_ignored(tmp_path, contents):
+    history_path = tmp_path / "tag_history.json"
+    history_tracker.save_history(history_path, _history(tmp_path))
+    stats_path(history_path).write_text(contents)
+    assert read_stats(history_path) is None
+    summary = history_tracker.library_summary(
+        tmp_path, history_path, tmp_path / "library.bib"
+    )
+    assert summary["processed"] == 2
@@ -0,0 +1,36 @@
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+from borax.core.pipeline import ordered_map
+
+
+def test_ordered_map_keeps_input_order():
+    def work(i):
+        time.sleep(0.001 * (5 - i % 5))
+        return i
+
+    assert list(ordered_map(work, ((i,) for i in range(20)), 4)) == list(range(20))
+
+
+def test_interrupted_ordered_map_cancels_queued_tasks():
+    started = []
+    release = threading.Event()
+
+    def work(i):
+        started.append(i)
+        if i:
+            release.wait(5)
+        return i
+
+    jobs = 2
+    timer = threading.Timer(0.2, release.set)
+    results = ordered_map(work, ((i,) for i in range(100)), jobs)
+    with pytest.raises(KeyboardInterrupt), closing(results):
+        for _ in results:
+            timer.start()
+            raise KeyboardInterrupt
+    # Only the tasks already running when interrupted were allowed to finish
+    assert sorted(started) == [0, 1, 2]
@@ -0,0 +1,119 @@
+from borax import bibtex_exporter, history_tracker, processing
+
+
+def test_process_shares_one_read_per_file(tmp_path, capsys, fake_tools, make_library):
+    calls = fake_tools
+    vocab = make_library(tmp_path, count=4)
+    history_path = tmp_path / "tag_history.json"
+    bib_path = tmp_path / "library.bib"
+
+    stats = processing.process_library(
+        tmp_path, history_path, bib_path, vocab, enrich=False, jobs=2
+    )
+
+    assert stats == {"tagged": 4, "moved": 0, "skipped": 0, "bib_added": 4}
+    # One metadata read and one text extraction per file; the second hash
+    # is of the rewritten file
+    assert calls == {"pdftotext": 4, "exiftool_read": 4, "checksum": 8}
+    index = bibtex_exporter.BibIndex.load(bib_path)
+    assert index.dois == {f"10.1000/doc{i:02d}" for i in range(4)}
+    assert "acid" in capsys.readouterr().out
+
+    calls.clear()
+    stats = processing.process_library(
+        tmp_path, history_path, bib_path, vocab, enrich=False
+    )
+    assert stats == {"tagged": 0, "moved": 0, "skipped": 4, "bib_added": 0}
+    assert calls == {}
+
+
+def test_process_rebuilds_bib_without_retagging(
+    tmp_path, capsys, fake_tools, make_library
+):
+    calls = fake_tools
+    vocab = make_library(tmp_path, count=4)
+    history_path = tmp_path / "tag_history.json"
+    bib_path = tmp_path / "library.bib"
+    processing.process_library(tmp_path, history_path, bib_path, vocab, enrich=False)
+    bib_path.unlink()
+    calls.clear()
+
+    stats = processing.process_library(
+        tmp_path, history_path, bib_path, vocab, enrich=False
+    )
+
+    assert stats == {"tagged": 0, "moved": 0, "skipped": 4, "bib_added": 4}
+    assert calls["checksum"] == 0
+    assert calls["exiftool_read"] == 4
+    assert bib_path.read_text(encoding="utf-8").count("@misc{") == 4
+
+
+def test_process_dry_run_writes_nothing(tmp_path, capsys, fake_tools, make_library):
+    vocab = make_library(tmp_path, count=4)
+    history_path = tmp_path / "tag_history.json"
+    bib_path = tmp_path / "library.bib"
+
+    processing.process_library(
+        tmp_path, history_path, bib_path, vocab, dry_run=True, enrich=False
+    )
+
+    assert not history_path.exists()
+    assert not bib_path.exists()
+    assert "would add BibTeX entry" in capsys.readouterr().out
+
+
+def test_process_rekeys_moved_files(tmp_path, capsys, fake_tools, make_library):
+    calls = fake_tools
+    vocab = make_library(tmp_path, count=4)
+    history_path = tmp_path / "tag_history.json"
+    bib_path = tmp_path / "library.bib"
+    processing.process_library(tmp_path, history_path, bib_path, vocab, enrich=False)
+    (tmp_path / "Other").mkdir()
+    (tmp_path / "Organic" / "doc01.pdf").rename(tmp_path / "Other" / "doc01.pdf")
+    calls.clear()
+
+    stats = processing.process_library(
+        tmp_path, history_path, bib_path, vocab, enrich=False
+    )
+
+    assert stats == {"tagged": 0, "moved": 1, "skipped": 3, "bib_added": 0}
+    assert calls == {"checksum": 1}
+    history = history_tracker.load_history(history_path)
+    assert str(tmp_path / "Organic" / "doc01.pdf") not in history
+    assert "Organic" not in history[str(tmp_path / "Other" / "doc01.pdf")]["tags"]
+    assert bib_path.read_text(encoding="utf-8").count("@misc{") == 4
+
+
+def test_process_libraries_keeps_bib_files_apart(
+    tmp_path, capsys, fake_tools, make_library
+):
+    roots = [tmp_path / "a", tmp_path / "b"]
+    for root in roots:
+        root.mkdir()
+        vocab = make_library(root, count=4)
+
+    def libraries():
+        for root in roots:
+            processor = processing.LibraryProcessor(
+                root,
+                root / "tag_history.json",
+                root / "library.bib",
+                vocab,
+                enrich=False,
+            )
+            yield processor, None
+
+    totals = processing.process_libraries(libraries(), jobs=3)
+    assert totals == {
+        "tagged": 8,
+        "moved": 0,
+        "skipped": 0,
+        "bib_added": 8,
+        "libraries": 2,
+    }
+    out = capsys.readouterr().out
+    assert "✅ a: 4 tagged, 0 moved, 0 unchanged, 4 entries added" in out
+    for root in roots:
+        index = bibtex_exporter.BibIndex.load(root / "library.bib")
+        assert index.files == {str(path) for path in root.rglob("*.pdf")}
+        assert len(history_tracker.load_history(root / "tag_history.json")) == 4
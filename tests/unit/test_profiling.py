@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+from borax.core import profiling
+from borax.core.utils import file_checksum
+
+
+@pytest.fixture
+def profiler():
+    prof = profiling.enable()
+    yield prof
+    profiling.disable()
+
+
+def test_disabled_instrumentation_is_passthrough():
+    profiling.disable()
+    items = iter(["a", "b"])
+    assert profiling.timed_iter("x", items) is items
+    with profiling.stage("x") as st:
+        st.add_bytes(10)
+    profiling.add_bytes(10)
+    assert profiling.active() is None
+
+
+def test_nested_stages_split_self_time(profiler):
+    with profiling.stage("outer"):
+        time.sleep(0.02)
+        with profiling.stage("inner") as st:
+            time.sleep(0.02)
+            st.add_bytes(5)
+    stats = profiler.stats
+    assert stats["outer"]["calls"] == 1 and stats["inner"]["calls"] == 1
+    assert stats["inner"]["bytes"] == 5
+    assert stats["outer"]["seconds"] >= stats["inner"]["seconds"] + 0.015
+    assert stats["outer"]["self_seconds"] < stats["outer"]["seconds"] - 0.015
+
+
+def test_timed_iter_counts_one_call_and_keeps_return_value(profiler):
+    def producer():
+        yield "abc"
+        yield "de"
+        return True
+
+    @profiling.profiled("consume")
+    def consume(chunks):
+        result = yield from chunks
+        return result
+
+    gen = consume(profiling.timed_iter("produce", producer()))
+    assert list(gen) == ["abc", "de"]
+    assert profiler.stats["produce"]["calls"] == 1
+    assert profiler.stats["produce"]["bytes"] == 5
+
+
+def test_hash_stage_and_ndjson(profiler, tmp_path):
+    path = tmp_path / "f.bin"
+    path.write_bytes(b"x" * 20000)
+    file_checksum(path)
+    assert profiler.stats["hash"] == pytest.approx(
+        {"calls": 1, "bytes": 20000, "seconds": 0, "self_seconds": 0}, abs=1
+    )
+    out = tmp_path / "metrics.ndjson"
+    profiler.write_ndjson(out, command="tag", argv=["tag", "lib"])
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert lines[0]["type"] == "run" and lines[0]["argv"] == ["tag", "lib"]
+    assert {line["stage"] for line in lines[1:]} == {"hash"}
+    assert "hash" in profiler.format_table()
@@ -0,0 +1,172 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from borax import history_tracker, tagging
+
+
+def test_parallel_tagging_matches_sequential(
+    tmp_path, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / "tag_history.json"
+
+    outputs = []
+    histories = []
+    for jobs in (1, 4):
+        tagging.tag_library(tmp_path, history_path, vocab, override=True, jobs=jobs)
+        outputs.append(capsys.readouterr().out)
+        history = json.loads(history_path.read_text())
+        histories.append(
+            {str(Path(k).relative_to(tmp_path)): v["tags"] for k, v in history.items()}
+        )
+
+    assert outputs[0] == outputs[1]
+    assert histories[0] == histories[1]
+    assert len(histories[0]) == 12
+    tags = histories[0]["Organic/doc01.pdf"]
+    assert tags[0] == "Organic"
+    assert set(tags[1:]) == {"acid", "base"}
+
+
+def test_parallel_tagging_skips_processed_files(
+    tmp_path, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / "tag_history.json"
+
+    tagging.tag_library(tmp_path, history_path, vocab, jobs=4)
+    capsys.readouterr()
+    tagging.tag_library(tmp_path, history_path, vocab, jobs=4)
+    out = capsys.readouterr().out
+    assert out.count("Skipping already-tagged file") == 12
+
+
+def test_interrupted_run_resumes_where_it_stopped(
+    tmp_path, monkeypatch, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / "tag_history.json"
+    seen = []
+
+    def flaky_iter_pdf_text(path):
+        seen.append(path)
+        if len(seen) == 5:
+            raise KeyboardInterrupt
+        yield "acid acid"
+        return True
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", flaky_iter_pdf_text)
+    with pytest.raises(KeyboardInterrupt):
+        tagging.tag_library(tmp_path, history_path, vocab)
+    assert len(json.loads(history_path.read_text())) == 4
+
+    capsys.readouterr()
+    tagging.tag_library(tmp_path, history_path, vocab)
+    out = capsys.readouterr().out
+    assert out.count("Skipping already-tagged file") == 4
+    assert len(json.loads(history_path.read_text())) == 12
+
+
+def _make_legacy(history_path, drop=()):
+    """Strip stat fields and fingerprints, as in histories from older versions."""
+    history = json.loads(history_path.read_text())
+    for key in drop:
+        del history[key]
+    for record in history.values():
+        for field in ("size", "mtime_ns", "inode", "stat_checked_ns"):
+            record.pop(field, None)
+        record.pop("quick_fingerprint", None)
+    history_path.write_text(json.dumps(history))
+
+
+def _count_checksums(monkeypatch):
+    calls = []
+    real = history_tracker.file_checksum
+
+    def counting(path, *args):
+        calls.append(path)
+        return real(path, *args)
+
+    monkeypatch.setattr(history_tracker, "file_checksum", counting)
+    return calls
+
+
+def test_scan_saves_refreshed_records(
+    tmp_path, monkeypatch, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    for pdf in tmp_path.rglob("*.pdf"):
+        os.utime(pdf, ns=(10**9, 10**9))
+    history_path = tmp_path / "tag_history.json"
+    tagging.tag_library(tmp_path, history_path, vocab)
+    _make_legacy(history_path)
+
+    calls = _count_checksums(monkeypatch)
+    stats = tagging.scan_library(tmp_path, history_path, vocab)
+    assert stats["unprocessed"] == [] and len(calls) == 12
+    stats = tagging.scan_library(tmp_path, history_path, vocab)
+    assert stats["unprocessed"] == [] and len(calls) == 12
+
+
+def test_refreshed_skips_are_journaled(
+    tmp_path, monkeypatch, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    for pdf in tmp_path.rglob("*.pdf"):
+        os.utime(pdf, ns=(10**9, 10**9))
+    history_path = tmp_path / "tag_history.json"
+    tagging.tag_library(tmp_path, history_path, vocab)
+    last = str(tmp_path / "Organic" / "doc11.pdf")
+    _make_legacy(history_path, drop=[last])
+
+    def interrupted(path):
+        raise KeyboardInterrupt
+        yield
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", interrupted)
+    monkeypatch.setattr(history_tracker.HistoryJournal, "close", lambda self: None)
+    with pytest.raises(KeyboardInterrupt):
+        tagging.tag_library(tmp_path, history_path, vocab)
+
+    history = history_tracker.load_history(history_path)
+    assert last not in history
+    assert all("stat_checked_ns" in record for record in history.values())
+
+
+def _file_lines(out):
+    return [line for line in out.splitlines() if line.startswith(("📄", "   →"))]
+
+
+def test_libraries_share_one_pool_and_keep_separate_histories(
+    tmp_path, capsys, fake_tools, make_library
+):
+    roots = [tmp_path / "a", tmp_path / "b"]
+    for root in roots:
+        root.mkdir()
+        vocab = make_library(root)
+    (roots[1] / "Organic" / "doc01.pdf").unlink()
+
+    def libraries():
+        for root in roots:
+            tagger = tagging.LibraryTagger(root, root / "tag_history.json", vocab)
+            yield tagger, None
+
+    assert tagging.tag_libraries(libraries(), jobs=4) == 2
+    shared = capsys.readouterr().out
+    for root in roots:
+        tagging.tag_library(root, root / "history2.json", vocab, override=True)
+    separate = capsys.readouterr().out
+
+    assert shared.index(f"Tagging library: a at {roots[0]}") < shared.index(
+        f"Tagging library: b at {roots[1]}"
+    )
+    # Same per-file output, library by library, as one run per library
+    assert _file_lines(shared) == _file_lines(separate)
+    for root, count in zip(roots, (12, 11)):
+        history = json.loads((root / "tag_history.json").read_text())
+        assert len(history) == count
+        assert all(path.startswith(str(root)) for path in history)
+        assert not (root / "tag_history.json.journal").exists()
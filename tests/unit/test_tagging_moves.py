@@ -0,0 +1,123 @@
+import json
+import shutil
+
+import pytest
+
+from borax import history_tracker, tagging
+from borax.core.history_sqlite import SQLiteHistory
+
+
+def _count_tools(monkeypatch):
+    texts, writes = [], []
+    fake_text = tagging.iter_pdf_text
+
+    def counting_text(path):
+        texts.append(path.name)
+        return fake_text(path)
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", counting_text)
+    monkeypatch.setattr(
+        tagging,
+        "exiftool_write_keywords",
+        lambda path, tags, **kw: writes.append((path, list(tags))),
+    )
+    return texts, writes
+
+
+def test_moved_file_is_rekeyed_with_new_folder_tags(
+    tmp_path, monkeypatch, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / "tag_history.json"
+    tagging.tag_library(tmp_path, history_path, vocab)
+    old = tmp_path / "Organic" / "doc01.pdf"
+    old_tags = json.loads(history_path.read_text())[str(old)]["tags"]
+    assert old_tags[0] == "Organic"
+
+    texts, writes = _count_tools(monkeypatch)
+    new = tmp_path / "Chemistry" / "renamed.pdf"
+    old.rename(new)
+    tagging.tag_library(tmp_path, history_path, vocab, jobs=2)
+
+    # No text extraction; only the folder-derived tag changes
+    assert texts == []
+    assert writes == [(str(new), ["Chemistry"] + old_tags[1:])]
+    history = json.loads(history_path.read_text())
+    assert str(old) not in history
+    record = history[str(new)]
+    assert record["moved_from"] == str(old)
+    assert record["tags"] == ["Chemistry"] + old_tags[1:]
+    assert "moved from" in capsys.readouterr().out
+
+    # Unchanged on the next run
+    tagging.tag_library(tmp_path, history_path, vocab)
+    assert texts == [] and len(writes) == 1
+
+
+def test_copied_file_reuses_record_without_rewriting(
+    tmp_path, monkeypatch, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / "tag_history.json"
+    tagging.tag_library(tmp_path, history_path, vocab)
+
+    texts, writes = _count_tools(monkeypatch)
+    source = tmp_path / "Chemistry" / "doc00.pdf"
+    copy = tmp_path / "Chemistry" / "doc20.pdf"
+    shutil.copyfile(source, copy)
+    tagging.tag_library(tmp_path, history_path, vocab)
+
+    assert texts == [] and writes == []
+    history = json.loads(history_path.read_text())
+    assert history[str(copy)]["tags"] == history[str(source)]["tags"]
+
+    # --override reprocesses unknown files as new
+    copy2 = tmp_path / "Chemistry" / "doc21.pdf"
+    shutil.copyfile(source, copy2)
+    tagging.tag_library(tmp_path, history_path, vocab, override=True)
+    assert "doc21.pdf" in texts
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_move_is_found_for_records_of_an_older_algorithm(
+    tmp_path, monkeypatch, capsys, backend, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / f"tag_history.{backend}"
+    tagging.tag_library(tmp_path, history_path, vocab)
+
+    # The library switched algorithms; no record was upgraded yet
+    texts, writes = _count_tools(monkeypatch)
+    old = tmp_path / "Organic" / "doc01.pdf"
+    new = tmp_path / "Organic" / "renamed.pdf"
+    old.rename(new)
+    tagging.tag_library(tmp_path, history_path, vocab, checksum_algorithm="blake2b")
+
+    assert texts == [] and writes == []
+    history = history_tracker.load_history(history_path)
+    record = history[str(new)]
+    assert record["moved_from"] == str(old)
+    assert record["checksum_algorithm"] == "blake2b"
+    assert "original_checksum" not in record
+    assert history_tracker.already_processed(new, history, verify=True)
+    if isinstance(history, SQLiteHistory):
+        history.close()
+
+
+def test_sqlite_moves_are_looked_up_without_loading_history(
+    tmp_path, monkeypatch, capsys, fake_tools, make_library
+):
+    vocab = make_library(tmp_path)
+    history_path = tmp_path / "tag_history.sqlite"
+    tagging.tag_library(tmp_path, history_path, vocab)
+
+    def no_scan(self):
+        raise AssertionError("history scanned")
+
+    monkeypatch.setattr(SQLiteHistory, "items", no_scan)
+    monkeypatch.setattr(SQLiteHistory, "values", no_scan)
+    old = tmp_path / "Chemistry" / "doc00.pdf"
+    new = tmp_path / "Chemistry" / "renamed.pdf"
+    old.rename(new)
+    tagging.tag_library(tmp_path, history_path, vocab, jobs=2)
+    assert "moved from" in capsys.readouterr().out
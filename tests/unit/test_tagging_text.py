@@ -0,0 +1,56 @@
+import os
+import sys
+
+from borax import tagging
+
+FAKE_PDFTOTEXT = """\
+import sys
+assert sys.argv[-1] == "-"
+out = sys.stdout.buffer
+out.write("ACID Base ".encode() * 50000)
+out.write("na\\u00efve".encode()[:-1])  # split a multi-byte character
+out.write("na\\u00efve".encode()[-1:] + b" BASE\\n")
+"""
+
+
+def _install_fake_pdftotext(tmp_path, monkeypatch):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    script = bindir / "pdftotext"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_PDFTOTEXT)
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_iter_pdf_text_streams_stdout_without_temp_files(tmp_path, monkeypatch):
+    _install_fake_pdftotext(tmp_path, monkeypatch)
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    chunks = list(tagging.iter_pdf_text(pdf, chunk_size=4096))
+
+    assert len(chunks) > 100
+    assert max(len(c) for c in chunks) <= 4096
+    text = "".join(chunks)
+    assert text.endswith("naïve base\n")
+    assert text == text.lower()
+    assert sorted(os.listdir(tmp_path)) == ["bin", "doc.pdf"]
+
+
+def test_streamed_scores_match_whole_text_scores(tmp_path, monkeypatch):
+    _install_fake_pdftotext(tmp_path, monkeypatch)
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    keywords = ["acid", "base", "acid base", "naïve"]
+
+    streamed = tagging.score_keywords_in_chunks(
+        tagging.iter_pdf_text(pdf, chunk_size=1000), keywords
+    )
+    whole = tagging.score_keywords_in_text(tagging.extract_text_from_pdf(pdf), keywords)
+    assert streamed == whole
+    assert dict(streamed)["acid base"] == 50000 + tagging.TITLE_WEIGHT
+
+
+def test_missing_pdftotext_yields_no_text(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    assert tagging.extract_text_from_pdf(tmp_path / "doc.pdf") == ""
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+from borax import tagging
+from borax.core.text_cache import TextCache, TextCacheError
+
+
+def test_round_trip_and_alias(tmp_path):
+    cache = TextCache(tmp_path / "cache", max_bytes=1 << 20)
+    assert cache.read("abc123") is None
+
+    writer = cache.writer("abc123")
+    writer.write("organic ")
+    writer.write("chemistry")
+    writer.commit()
+    assert "".join(cache.read("abc123")) == "organic chemistry"
+
+    cache.alias("def456", "abc123")
+    assert "".join(cache.read("def456")) == "organic chemistry"
+
+    aborted = cache.writer("zzz")
+    aborted.write("partial")
+    aborted.abort()
+    assert cache.read("zzz") is None
+    assert not list((tmp_path / "cache").glob("*/*.tmp"))
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = TextCache(tmp_path / "cache", max_bytes=1 << 20)
+    for i, key in enumerate(["aa01", "bb02", "cc03"]):
+        writer = cache.writer(key)
+        writer.write(os.urandom(2000).hex())
+        writer.commit()
+        os.utime(cache._path(key), ns=(i * 10**9, i * 10**9))
+    # Reading "aa01" makes it the most recently used entry
+    list(cache.read("aa01"))
+    entry_size = cache._path("bb02").stat().st_size
+
+    removed, freed = cache.prune(max_bytes=cache.size() - entry_size)
+
+    assert removed == 1
+    assert freed == entry_size
+    assert cache.read("bb02") is None
+    assert cache.read("aa01") is not None
+    assert cache.read("cc03") is not None
+
+
+def test_cached_pdf_text_extracts_once(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_iter_pdf_text(path):
+        calls.append(path)
+        yield "acid base "
+        yield "acid"
+        return True
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", fake_iter_pdf_text)
+    cache = TextCache(tmp_path / "cache", max_bytes=1 << 20)
+    pdf = tmp_path / "doc.pdf"
+
+    first = "".join(tagging.cached_pdf_text(pdf, "f00d", cache))
+    second = "".join(tagging.cached_pdf_text(pdf, "f00d", cache))
+
+    assert first == second == "acid base acid"
+    assert calls == [pdf]
+
+
+def test_failed_extraction_is_not_cached(tmp_path, monkeypatch):
+    def failing_iter_pdf_text(path):
+        return False
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", failing_iter_pdf_text)
+    cache = TextCache(tmp_path / "cache", max_bytes=1 << 20)
+
+    assert "".join(tagging.cached_pdf_text(tmp_path / "x.pdf", "beef", cache)) == ""
+    assert cache.read("beef") is None
+
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage"])
+def test_corrupt_entry_is_a_miss_and_replaced(tmp_path, monkeypatch, damage):
+    words = [f"word{i:06d} " for i in range(20000)]
+    calls = []
+
+    def fake_iter_pdf_text(path):
+        calls.append(path)
+        for i in range(0, len(words), 1000):
+            yield "".join(words[i : i + 1000])
+        return True
+
+    monkeypatch.setattr(tagging, "iter_pdf_text", fake_iter_pdf_text)
+    cache = TextCache(tmp_path / "cache", max_bytes=1 << 30)
+    pdf = tmp_path / "doc.pdf"
+    expected = "".join(words)
+    assert "".join(tagging.cached_pdf_text(pdf, "f00d", cache)) == expected
+
+    entry = cache._path("f00d")
+    data = entry.read_bytes()
+    if damage == "truncate":
+        # Fails only after some text was already streamed from the entry
+        entry.write_bytes(data[: len(data) // 2])
+    else:
+        entry.write_bytes(b"not gzip at all")
+    with pytest.raises(TextCacheError):
+        "".join(cache.read("f00d"))
+    assert not entry.exists()
+
+    entry.write_bytes(data[: len(data) // 2] if damage == "truncate" else b"bad")
+    assert "".join(tagging.cached_pdf_text(pdf, "f00d", cache)) == expected
+    assert len(calls) == 2
+    # The entry was rewritten and is served from the cache again
+    assert "".join(cache.read("f00d")) == expected
+    assert "".join(tagging.cached_pdf_text(pdf, "f00d", cache)) == expected
+    assert len(calls) == 2
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from borax import tagging
+from borax.core import library_config, vocab_cache
+from borax.core.vocab_cache import Vocab, VocabPool, vocab_cache_path
+
+
+def _make_library(root):
+    (root / "borax-library.toml").write_text('name = "Lib"\n', encoding="utf-8")
+    (root / "vocab.yaml").write_text(
+        "Keywords:\n  Core: [enzyme, kinetics]\n", encoding="utf-8"
+    )
+
+
+def _count_yaml_loads(monkeypatch):
+    loads = []
+    real = library_config.load_yaml
+    monkeypatch.setattr(
+        library_config, "load_yaml", lambda p: loads.append(p) or real(p)
+    )
+    return loads
+
+
+def test_vocab_is_parsed_once_until_sources_change(tmp_path, monkeypatch):
+    _make_library(tmp_path)
+    loads = _count_yaml_loads(monkeypatch)
+
+    first = library_config.load_library_config(str(tmp_path))
+    assert loads == []  # loaded lazily
+    assert "enzyme" in first.vocab["Keywords"]["Core"]
+    assert len(loads) == 2
+    assert vocab_cache_path(tmp_path).exists()
+    assert not (tmp_path / ".borax" / "vocab.pickle").exists()
+
+    second = library_config.load_library_config(str(tmp_path))
+    assert len(loads) == 2
+    assert isinstance(second.vocab, Vocab)
+    assert second.vocab == first.vocab
+    assert second.vocab_path == tmp_path / "vocab.yaml"
+
+    vocab_file = tmp_path / "vocab.yaml"
+    vocab_file.write_text("Keywords:\n  Core: [enzyme, ligand]\n", encoding="utf-8")
+    st = vocab_file.stat()
+    os.utime(vocab_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    third = library_config.load_library_config(str(tmp_path))
+    assert "ligand" in third.vocab["Keywords"]["Core"]
+    assert len(loads) == 4
+
+
+def test_flattened_vocab_and_matchers_are_cached(tmp_path, monkeypatch):
+    _make_library(tmp_path)
+    config = library_config.load_library_config(str(tmp_path))
+    flat = tagging.load_vocab_flat(config.vocab)
+    terms = tagging.vocab_folder_matcher(config.vocab, flat[0]).terms
+
+    reloaded = library_config.load_library_config(str(tmp_path)).vocab
+    monkeypatch.setattr(
+        tagging.KeywordSet,
+        "compile",
+        lambda self: (_ for _ in ()).throw(AssertionError),
+    )
+    cached = tagging.load_vocab_flat(reloaded)
+
+    assert cached[:3] == flat[:3]
+    assert set(cached[3]) == set(flat[3]) and "enzyme" in cached[3]
+    assert cached[3].matcher.count("enzyme kinetics enzyme")["enzyme"] == 2
+    assert tagging.vocab_folder_matcher(reloaded, cached[0]).terms == terms
+
+
+def test_vocab_pool_shares_parsed_and_compiled_vocabs(tmp_path, monkeypatch):
+    roots = [tmp_path / name for name in ("a", "b", "c")]
+    for root in roots:
+        root.mkdir()
+        (root / "borax-library.toml").write_text('name = "Lib"\n', encoding="utf-8")
+    _make_library(roots[2])
+    loads = _count_yaml_loads(monkeypatch)
+
+    pool = VocabPool()
+    configs = [library_config.load_library_config(str(r), pool) for r in roots]
+    first, second, custom = (config.vocab for config in configs)
+    # Default parsed once; `c` adds its own vocab.yaml
+    assert len(loads) == 2
+    assert second == first and "enzyme" in custom["Keywords"]["Core"]
+    assert custom.meta["custom"] and not first.meta["custom"]
+    assert tagging.load_vocab_flat(second) is tagging.load_vocab_flat(first)
+    assert tagging.load_vocab_flat(custom) is not tagging.load_vocab_flat(first)
+    # Each library still gets its own cache file
+    assert all(vocab_cache_path(r).exists() for r in roots)
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+@pytest.mark.parametrize("target", ["file", "dir"])
+def test_cache_writable_by_others_is_not_loaded(tmp_path, monkeypatch, target):
+    _make_library(tmp_path)
+    assert library_config.load_library_config(str(tmp_path)).vocab
+    cache = vocab_cache_path(tmp_path)
+    shared = cache if target == "file" else cache.parent
+    os.chmod(shared, os.stat(shared).st_mode | 0o022)
+
+    monkeypatch.setattr(
+        vocab_cache.pickle, "load", lambda f: pytest.fail("untrusted cache loaded")
+    )
+    loads = _count_yaml_loads(monkeypatch)
+    vocab = library_config.load_library_config(str(tmp_path)).vocab
+    assert "enzyme" in vocab["Keywords"]["Core"]
+    assert len(loads) == 2
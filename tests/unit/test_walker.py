@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+from borax.core import walker
+
+
+def _make_tree(root):
+    for rel in (
+        "a.pdf",
+        "B/b.PDF",
+        "B/notes.txt",
+        "B/C/c.pdf",
+        "Archive/old.pdf",
+        "B/draft.tmp.pdf",
+        ".borax/text-cache/x.pdf",
+    ):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"%PDF-1.4")
+    # Age every directory past the racy window so listings can be reused
+    past = time.time_ns() - 10_000_000_000
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, ns=(past, past))
+
+
+def _flatten(walk, root):
+    return [(os.path.relpath(dirpath, root), names) for dirpath, names in walk]
+
+
+def test_walk_lists_pdfs_sorted_and_honours_ignore(tmp_path):
+    _make_tree(tmp_path)
+    walk = walker.walk_pdfs(tmp_path, ignore=["Archive", "*.tmp.pdf"])
+    assert _flatten(walk, tmp_path) == [
+        (".", ["a.pdf"]),
+        ("B", ["b.PDF"]),
+        ("B/C", ["c.pdf"]),
+    ]
+
+
+def test_unchanged_directories_are_answered_from_index(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    index_path = tmp_path / ".borax" / "dir-index.json"
+    first = _flatten(walker.walk_pdfs(tmp_path, index_path=index_path), tmp_path)
+
+    listed = []
+    real_list_dir = walker._list_dir
+    monkeypatch.setattr(
+        walker, "_list_dir", lambda d: listed.append(d) or real_list_dir(d)
+    )
+    second = _flatten(walker.walk_pdfs(tmp_path, index_path=index_path), tmp_path)
+    assert second == first
+    assert listed == []
+
+    # Adding an entry bumps only that directory's mtime
+    (tmp_path / "B" / "C" / "new.pdf").write_bytes(b"%PDF-1.4")
+    third = dict(_flatten(walker.walk_pdfs(tmp_path, index_path=index_path), tmp_path))
+    assert third["B/C"] == ["c.pdf", "new.pdf"]
+    assert listed == [tmp_path / "B" / "C"]
+
+
+def test_index_forgets_removed_directories(tmp_path):
+    _make_tree(tmp_path)
+    index_path = tmp_path / "dir-index.json"
+    list(walker.walk_pdfs(tmp_path, index_path=index_path))
+    (tmp_path / "Archive" / "old.pdf").unlink()
+    (tmp_path / "Archive").rmdir()
+
+    list(walker.walk_pdfs(tmp_path, index_path=index_path))
+    dirs = json.loads(index_path.read_text())["dirs"]
+    assert "Archive" not in dirs
+    assert "B/C" in dirs
+
+
+def test_library_walk_uses_manifest_ignore_and_state_dir(tmp_path):
+    from borax.core.library_config import load_library_config
+
+    _make_tree(tmp_path)
+    (tmp_path / "borax-library.toml").write_text(
+        'name = "Lib"\nignore = ["Archive"]\nstate_dir = "B/C"\n', encoding="utf-8"
+    )
+    config = load_library_config(str(tmp_path))
+
+    walked = _flatten(walker.library_walk(config), tmp_path)
+
+    assert [rel for rel, _ in walked] == [".", ".borax", ".borax/text-cache", "B"]
+    assert (tmp_path / "B" / "C" / "dir-index.json").exists()
@@ -0,0 +1,157 @@
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from borax import processing, tagging
+from borax.core import fs_watch
+from borax.processing.watch import watch_library
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _pdf(path, data=b"%PDF-1.4"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def _read_until(watcher, expected, timeout=5.0):
+    seen = set()
+    deadline = time.monotonic() + timeout
+    while not expected <= seen and time.monotonic() < deadline:
+        seen.update(watcher.read(0.2))
+    return seen
+
+
+def test_debouncer_waits_for_quiet_and_stable_files(tmp_path):
+    clock = FakeClock()
+    debouncer = fs_watch.Debouncer(settle=2.0, clock=clock)
+    done = _pdf(tmp_path / "done.pdf")
+    growing = _pdf(tmp_path / "growing.pdf")
+    gone = _pdf(tmp_path / "gone.pdf")
+    debouncer.touch([done, growing, gone, done])
+    assert len(debouncer) == 3
+    clock.now += 1.0
+    assert debouncer.ready() == []
+    assert debouncer.next_deadline() == pytest.approx(1.0)
+
+    growing.write_bytes(b"%PDF-1.4 more")  # no event, but size changed
+    gone.unlink()
+    clock.now += 1.5
+    assert debouncer.ready() == [done]
+    assert len(debouncer) == 1
+    clock.now += 2.0
+    assert debouncer.ready() == [growing]
+
+
+def test_polling_watcher_reports_new_and_changed_pdfs(tmp_path):
+    old = _pdf(tmp_path / "A" / "old.pdf")
+    watcher = fs_watch.PollingWatcher(tmp_path, ignore=["Archive"], interval=0)
+    assert watcher.read(0) == []
+    new = _pdf(tmp_path / "B" / "new.pdf")
+    _pdf(tmp_path / "Archive" / "skip.pdf")
+    _pdf(tmp_path / ".borax" / "skip.pdf")
+    (tmp_path / "A" / "notes.txt").write_text("x")
+    old.write_bytes(b"%PDF-1.4 changed")
+    assert sorted(watcher.read(0)) == [old, new]
+    assert watcher.read(0) == []
+
+
+def test_inotify_watcher_follows_new_directories(tmp_path):
+    try:
+        watcher = fs_watch.InotifyWatcher(tmp_path, ignore=["Archive"])
+    except fs_watch.WatchError as e:
+        pytest.skip(f"inotify unavailable: {e}")
+    try:
+        existing = _pdf(tmp_path / "existing.pdf")
+        # A new directory's files are found even if written before its watch
+        nested = _pdf(tmp_path / "New" / "Deep" / "nested.pdf")
+        _pdf(tmp_path / "Archive" / "skip.pdf")
+        _pdf(tmp_path / ".borax" / "skip.pdf")
+        seen = _read_until(watcher, {existing, nested})
+        assert seen == {existing, nested}
+
+        later = _pdf(tmp_path / "New" / "Deep" / "later.pdf")
+        assert _read_until(watcher, {later}) == {later}
+
+        moved = tmp_path / "Moved"
+        (tmp_path / "New").rename(moved)
+        seen = _read_until(watcher, {moved / "Deep" / "nested.pdf"})
+        assert moved / "Deep" / "later.pdf" in seen
+        fresh = _pdf(moved / "Deep" / "fresh.pdf")
+        assert _read_until(watcher, {fresh}) == {fresh}
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("poll_interval", [None, 0.05])
+def test_watch_processes_only_new_pdfs(
+    tmp_path, monkeypatch, capsys, poll_interval, fake_tools, make_library
+):
+    calls = fake_tools
+
+    def fake_write(path, tags, **kwargs):
+        # Like ExifTool: rewrite the file, which fires watch events of its own
+        with open(path, "ab") as f:
+            f.write(b" %% keywords")
+
+    monkeypatch.setattr(tagging, "exiftool_write_keywords", fake_write)
+    vocab = make_library(tmp_path, count=4)
+    config = SimpleNamespace(
+        root=tmp_path,
+        ignore=[],
+        state_dir=tmp_path / ".borax",
+        dir_index_path=None,
+    )
+    processor = processing.LibraryProcessor(
+        tmp_path,
+        tmp_path / "tag_history.json",
+        tmp_path / "library.bib",
+        vocab,
+        enrich=False,
+    )
+    batches = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch_library,
+        args=(config, processor),
+        kwargs={
+            "settle": 0.05,
+            "poll_interval": poll_interval,
+            "stop": stop,
+            "on_batch": batches.append,
+        },
+    )
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert batches[0] == {"tagged": 4, "moved": 0, "skipped": 0, "bib_added": 4}
+        calls.clear()
+
+        _pdf(Path(tmp_path / "Organic" / "new.pdf"), b"%PDF-1.4 new")
+        while not any(b["tagged"] for b in batches[1:]) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        # Give the events of our own keyword writes time to settle
+        time.sleep(0.5)
+    finally:
+        stop.set()
+        thread.join(5)
+        processor.close()
+    assert sum(b["tagged"] for b in batches[1:]) == 1
+    assert sum(b["bib_added"] for b in batches[1:]) == 1
+    # Files written by the watch itself are not processed again
+    assert sum(b["skipped"] for b in batches[1:]) == 0
+    # Only the new file went through text extraction
+    assert calls["pdftotext"] == 1
+    assert str(tmp_path / "Organic" / "new.pdf") in processor.history